@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+End-to-end benchmark of every habitica command against a fake server.
+
+Each command runs on a fresh fake Habitica (tests/fakehabitica.py, seeded
+from tests/fixtures) that answers after LATENCY seconds, as a real server
+across the internet would, optionally with a rate limit. Each starts
+from the same local stores, already holding the content catalog and the
+task lists, as after ordinary use. Reported per command: wall time,
+requests sent and response bytes received.
+
+    python benchmarks/commands.py      (or: make bench)
+
+Set BENCH_LATENCY (seconds, default 0.05) and BENCH_RATE_LIMIT (requests
+per minute, default none) to change the conditions.
+"""
+
+
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+import fakehabitica
+from test_commands import COMMANDS
+
+LATENCY = 0.05
+# run on the template home first, so every command finds warm stores
+PRIME = (['collection'], ['habits'], ['dailies'], ['todos'])
+
+
+def measure(argv, template, latency, rate_limit):
+    """The Run of `argv` on a fresh server, from a copy of `template`."""
+    from habitica import core
+
+    home = tempfile.mkdtemp()
+    try:
+        shutil.rmtree(home)
+        shutil.copytree(template, home)
+        fake = fakehabitica.FakeHabitica(latency=latency,
+                                         rate_limit=rate_limit)
+        try:
+            for name, path in fakehabitica.configure(fake, home).items():
+                setattr(core, name, path)
+            return fakehabitica.run(fake, argv)
+        finally:
+            fake.stop()
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+def main():
+    from habitica import core
+
+    latency = float(os.environ.get('BENCH_LATENCY', LATENCY))
+    rate_limit = int(os.environ.get('BENCH_RATE_LIMIT', 0)) or None
+
+    template = tempfile.mkdtemp()
+    fake = fakehabitica.FakeHabitica()
+    try:
+        for name, path in fakehabitica.configure(fake, template).items():
+            setattr(core, name, path)
+        for argv in PRIME:
+            fakehabitica.run(fake, argv)
+    finally:
+        fake.stop()
+
+    totals = [0.0, 0, 0]
+    failed = False
+    print('%-28s %9s %5s %9s' % ('command', 'ms', 'reqs', 'bytes'))
+    try:
+        for argv, expected in COMMANDS:
+            run = measure(argv, template, latency, rate_limit)
+            # a command that did the wrong thing quickly is no benchmark
+            if run.code != 0:
+                problem = '  (exit %s)' % run.code
+            elif expected not in run.out:
+                problem = '  (no %r in output)' % expected
+            else:
+                problem = ''
+            failed = failed or bool(problem)
+            print('%-28s %9.1f %5d %9d%s' % (' '.join(argv),
+                                             run.seconds * 1000,
+                                             len(run.requests), run.bytes,
+                                             problem))
+            totals[0] += run.seconds
+            totals[1] += len(run.requests)
+            totals[2] += run.bytes
+    finally:
+        shutil.rmtree(template, ignore_errors=True)
+    print('%-28s %9.1f %5d %9d' % ('total', totals[0] * 1000, totals[1],
+                                   totals[2]))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
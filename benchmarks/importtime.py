@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Import-time budget check for the habitica CLI.
+
+Runs each entry point under `python -X importtime` in a fresh interpreter
+and fails if it imports any of the modules it should not need, or takes
+longer than its budget. Budgets are multiples of the time REFERENCE, a
+few standard library modules, takes to import, measured alongside each
+check, so they travel between machines better than milliseconds would,
+though not perfectly: see BUDGETS. Each time is the best of RUNS runs.
+
+    python benchmarks/importtime.py      (or: make importtime)
+"""
+
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+RUNS = 10
+# imported by every command anyway, and about as slow to import as
+# the smallest entry point
+REFERENCE = 'import logging, sqlite3'
+
+# slow to import, and only wanted by the commands that use them
+HEAVY = ('requests', 'asyncio', 'humanize', 'dateutil', 'pytz')
+
+# (what to run, budget in REFERENCE imports, modules it must not import).
+# The ratios are not the same on every machine: the notes give the best
+# of RUNS as measured on two of them, the first and then the second.
+# Each budget is about twice the first's ratio and above the second's
+# worst, so a module newly imported on the way fails on either
+BUDGETS = [
+    # bin/habitica on its way to a running daemon (0.5; 0.4 to 1.0)
+    ('import habitica; import habitica.daemon', 1.25,
+     HEAVY + ('habitica.core', 'docopt', 'logging')),
+    # everything up to dispatching a command (1.4 to 1.7; 2.0 to 2.8)
+    ('import habitica.core', 3.5, HEAVY),
+]
+# commands: core plus the command's own module, so a little above it
+# (up to 2.0; 2.3 to 3.8, and home, which imports webbrowser, 3.0 to
+# 3.5); status renders with humanize and dateutil (3.4; 3.2 to 4.9)
+for command, budget, banned in [('home', 4.5, HEAVY),
+                                ('server', 4, HEAVY),
+                                ('habits', 4, HEAVY),
+                                ('dailies', 4, HEAVY),
+                                ('todos', 4, HEAVY),
+                                ('status', 6.5, ('requests', 'asyncio'))]:
+    BUDGETS.append(('import habitica.core; '
+                    'habitica.commands.handler(%r)' % command,
+                    budget, banned))
+
+
+def importtime(code):
+    """{module: (self us, cumulative us, depth)} for running `code`."""
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                         cwd=ROOT, stderr=subprocess.PIPE,
+                         universal_newlines=True, check=True).stderr
+    times = {}
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, total, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        times[name.strip()] = (int(own), int(total), depth)
+    return times
+
+
+def took(code, startup):
+    """
+    (ms, modules) of the best of RUNS imports of `code`: what it
+    imported, over and above startup, and every module it loaded.
+    """
+    spent = None
+    for _ in range(RUNS):
+        times = importtime(code)
+        ms = sum(total for name, (_, total, depth) in times.items()
+                 if depth == 0 and name not in startup) / 1000.0
+        spent = ms if spent is None else min(spent, ms)
+    return spent, times
+
+
+def main():
+    startup = set(importtime('pass'))
+    failed = False
+    for code, budget, banned in BUDGETS:
+        unit = took(REFERENCE, startup)[0]
+        spent, times = took(code, startup)
+        loaded = sorted(name for name in times
+                        if name.split('.')[0] in banned or name in banned)
+        ok = spent <= budget * unit and not loaded
+        failed = failed or not ok
+        print('%-4s %6.1f ms / %5.1f ms (%g x %.1f)  %s'
+              % ('ok' if ok else 'FAIL', spent, budget * unit, budget, unit,
+                 code))
+        if loaded:
+            print('     should not import: %s' % ', '.join(loaded))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
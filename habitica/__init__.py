@@ -1,2 +1,20 @@
-from . import api
-from .core import cli
+"""
+habitica: commandline interface for http://habitica.com
+
+`habitica.api` and `habitica.cli` are loaded on first use, so that
+importing the package (e.g. from bin/habitica, to reach a running daemon)
+stays cheap.
+"""
+
+import importlib
+
+
+def cli(argv=None, warm=None):
+    from .core import cli
+    return cli(argv, warm)
+
+
+def __getattr__(name):
+    if name in ('api', 'core'):
+        return importlib.import_module('.%s' % name, __name__)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
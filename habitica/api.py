@@ -9,12 +9,295 @@ http://github.com/philadams/habitica
 """
 
 
+from collections import Counter, OrderedDict
+from datetime import datetime
+import functools
 import json
+import logging
+import marshal
+import threading
+import time
 
-import requests
+from .trace import Span, Tracer
+
+# requests and asyncio are imported where used: they take longer to
+# import than most commands take to run from the daemon
 
 API_URI_BASE = 'api/v3'
 API_CONTENT_TYPE = 'application/json'
+API_POOL_SIZE = 10  # connections kept open per host
+API_RATE_LIMIT = 30  # requests per window, until the server tells us
+API_RATE_WINDOW = 60  # seconds
+API_RETRIES = 3  # attempts per request when the server says slow down
+API_CONCURRENCY = 8  # requests in flight at once
+API_MEMO_WINDOW = 0  # seconds a GET may be reused by later commands
+API_VALIDATORS = 64  # GET bodies kept for conditional requests
+API_TIMEOUT = 30  # seconds to connect, or to wait for more of a response
+HTTP_NOT_MODIFIED = 304
+HTTP_TOO_MANY_REQUESTS = 429
+
+
+def url_template(path, args):
+    """
+    `path` with the ids and item keys among the `args` ({name: value}) it
+    was built from replaced by '{name}', and any other id by '{id}': e.g.
+    'tasks/{id}/score/up', 'user/feed/{one}/{two}',
+    'tasks/{id}/checklist/{id}/score'.
+    """
+    names = dict((str(value), name) for name, value in args.items()
+                 if value is not None and _is_key(str(value)))
+    steps = path.split('/')
+    for i, step in enumerate(steps):
+        if step in names:
+            steps[i] = '{%s}' % names[step]
+        elif i > 0 and any(c.isdigit() for c in step):
+            steps[i] = '{id}'
+    return '/'.join(steps)
+
+
+def _is_key(value):
+    # ids have digits, item keys (Wolf-Base, Meat) capitals; the words of
+    # the API itself (score, up, quests) have neither
+    return value[:1].isupper() or any(c.isdigit() for c in value)
+
+
+def new_session(pool_size=API_POOL_SIZE, keep_alive=True, gzip=True,
+                timeout=API_TIMEOUT):
+    """
+    Build a pooled HTTP session to be shared by every Habitica object.
+
+    Reusing one session means one TCP+TLS handshake per host instead of
+    one per request. Requests give up after `timeout` seconds without a
+    byte from the server, instead of hanging the command (and a daemon)
+    for good.
+    """
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size,
+                                            pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    session.headers['Accept-Encoding'] = 'gzip, deflate' if gzip \
+        else 'identity'
+    # requests has no default timeout of its own; a timeout= given to a
+    # request still wins
+    session.request = functools.partial(session.request, timeout=timeout)
+    return session
+
+
+def parse_reset(value, now=None):
+    """
+    Turn an X-RateLimit-Reset or Retry-After value into epoch seconds.
+
+    Habitica sends a JavaScript date string, e.g.
+    'Thu Oct 16 2026 12:00:00 GMT+0000 (Coordinated Universal Time)',
+    which drops the milliseconds, so it is rounded up a second; plain
+    numbers are taken as an epoch (s or ms) or a delay in seconds.
+    """
+    now = time.time() if now is None else now
+    try:
+        number = float(value)
+    except ValueError:
+        stamp = value.split(' (')[0].replace('GMT', '')
+        try:
+            return datetime.strptime(stamp, '%a %b %d %Y %H:%M:%S %z') \
+                .timestamp() + 1
+        except ValueError:
+            return None
+    if number > 1e12:
+        return number / 1000.0
+    if number > 1e9:
+        return number
+    return now + number
+
+
+class RateLimiter(object):
+    """
+    Request budget driven by Habitica's X-RateLimit-* response headers.
+
+    Requests go out as fast as the remaining budget allows; once it is
+    spent, callers wait until the server's reset time instead of taking
+    a 429. It also caps how many requests are in flight at once. Shared
+    by every Habitica object using the same session, and safe to use from
+    several threads.
+    """
+
+    def __init__(self, limit=API_RATE_LIMIT, window=API_RATE_WINDOW,
+                 concurrency=API_CONCURRENCY):
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset = None
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(concurrency)
+
+    def _refill(self, now):
+        if self.reset is not None and now >= self.reset:
+            self.remaining = self.limit
+            self.reset = None
+
+    def acquire(self):
+        """Take one request from the budget, waiting for a refill."""
+        while True:
+            with self.lock:
+                now = time.time()
+                self._refill(now)
+                if self.reset is None:
+                    self.reset = now + self.window
+                if self.remaining > 0:
+                    self.remaining -= 1
+                    return
+                wake = self.reset
+            # sleep without the lock, so the headers of responses still
+            # in flight can move the reset, then look again
+            time.sleep(max(wake - now, 0))
+
+    def update(self, headers, status=None):
+        """Fold the server's view of our budget into ours."""
+        with self.lock:
+            limit = headers.get('X-RateLimit-Limit')
+            remaining = headers.get('X-RateLimit-Remaining')
+            reset = headers.get('X-RateLimit-Reset')
+            if limit is not None:
+                self.limit = int(limit)
+            if reset is not None:
+                reset = parse_reset(reset)
+            if status == HTTP_TOO_MANY_REQUESTS:
+                retry = headers.get('Retry-After')
+                self.remaining = 0
+                self.reset = parse_reset(retry) if retry else \
+                    (reset or time.time() + self.window)
+            elif remaining is not None:
+                if reset is not None and (self.reset is None or
+                                          abs(reset - self.reset) > 1):
+                    # the server's window is authoritative over our guess
+                    self.remaining = int(remaining)
+                    self.reset = reset
+                else:
+                    self.remaining = min(self.remaining, int(remaining))
+
+    def budget(self):
+        """Current budget as {'limit', 'remaining', 'reset'}."""
+        with self.lock:
+            self._refill(time.time())
+            return {'limit': self.limit,
+                    'remaining': self.remaining,
+                    'reset': self.reset}
+
+
+class Memo(object):
+    """
+    Single-flight memo of GET responses, shared like the rate limiter.
+
+    Identical GETs (same URL and query) made while one is in flight wait
+    for it instead of going out again, and later ones get its response
+    until the memo is restarted or something is written: a mutating call
+    forgets everything read from the same resource, and from `user`,
+    which almost every write changes. Only the raw response is kept, so
+    every caller decodes its own copy of the data.
+    """
+
+    def __init__(self, window=API_MEMO_WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.entries = {}  # key -> [resource, done event, response, time]
+        self.stats = Counter()  # ('memo', 'hit' or 'miss') -> GETs
+
+    def fetch(self, resource, key, send):
+        """The response to `key`, calling `send()` only if nobody has."""
+        with self.lock:
+            entry = self.entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self.entries[key] = [resource, threading.Event(),
+                                             None, None]
+            self.stats['memo', 'miss' if owner else 'hit'] += 1
+        if not owner:
+            entry[1].wait()
+            if entry[2] is not None and entry[2].ok:
+                return entry[2]
+            # the request we waited for failed, or was answered with an
+            # error; try it ourselves
+            return send()
+
+        try:
+            entry[2] = res = send()
+            entry[3] = time.time()
+        finally:
+            if entry[2] is None or not entry[2].ok:
+                with self.lock:
+                    if self.entries.get(key) is entry:
+                        del self.entries[key]
+            entry[1].set()
+        return res
+
+    def invalidate(self, resource):
+        """Forget what was read from `resource` (and the user)."""
+        with self.lock:
+            for key, entry in list(self.entries.items()):
+                if entry[0] in (resource, 'user'):
+                    del self.entries[key]
+
+    def start(self):
+        """
+        Begin another command: forget responses older than the window
+        (all of them, by default), keeping those still in flight.
+        """
+        with self.lock:
+            now = time.time()
+            for key, entry in list(self.entries.items()):
+                if entry[3] is not None and entry[3] + self.window <= now:
+                    del self.entries[key]
+
+
+class Validators(object):
+    """
+    ETags and bodies of recent GETs, for conditional requests.
+
+    A GET whose URL and query were answered before is sent with the
+    ETag it came with; if the server says 304 Not Modified, the body we
+    kept is served instead of downloading and decoding it again. Bodies
+    are kept as marshal snapshots, so each caller still gets its own
+    copy to modify, several times cheaper than decoding the JSON. Only
+    the `size` most recently used are kept.
+    """
+
+    def __init__(self, size=API_VALIDATORS):
+        self.size = size
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (etag, snapshot)
+
+    def etag(self, key):
+        """The ETag to send for `key`, or None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry[0] if entry else None
+
+    def body(self, key):
+        """A copy of the body kept for `key`, or None if we have none."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+        return marshal.loads(entry[1])
+
+    def store(self, key, etag, body):
+        """Keep `body` as the answer to `key` while its ETag matches."""
+        if not etag:
+            return
+        try:
+            snapshot = marshal.dumps(body)
+        except ValueError:
+            return
+        with self.lock:
+            self.entries[key] = (etag, snapshot)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
 
 
 class Habitica(object):
@@ -22,29 +305,58 @@ class Habitica(object):
     A minimalist Habitica API class.
     """
 
-    def __init__(self, auth=None, resource=None, aspect=None):
+    def __init__(self, auth=None, resource=None, aspect=None, session=None,
+                 limiter=None, meta=None, memo=None, validators=None,
+                 tracer=None):
         self.auth = auth
         self.resource = resource
         self.aspect = aspect
         self.headers = auth if auth else {}
         self.headers.update({'content-type': API_CONTENT_TYPE})
+        self.session = session if session is not None else new_session()
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.memo = memo if memo is not None else Memo()
+        self.validators = validators if validators is not None \
+            else Validators()
+        self.tracer = tracer if tracer is not None else Tracer()
+        # what the server has told us about itself, e.g. its appVersion
+        self.meta = meta if meta is not None else {}
 
     def __getattr__(self, m):
         try:
             return object.__getattr__(self, m)
         except AttributeError:
             if not self.resource:
-                return Habitica(auth=self.auth, resource=m)
+                return self._derive(resource=m)
             else:
-                return Habitica(auth=self.auth, resource=self.resource,
-                                aspect=m)
+                return self._derive(resource=self.resource, aspect=m)
+
+    def aio(self):
+        """Awaitable twin of this object, sharing its connections."""
+        return self._derive(self.resource, self.aspect, cls=AsyncHabitica)
+
+    def _derive(self, resource=None, aspect=None, cls=None):
+        """
+        New Habitica object for another URL, sharing our connections,
+        rate-limit budget, GET memo, ETags, tracer and server metadata.
+        """
+        cls = cls if cls is not None else self.__class__
+        return cls(auth=self.auth, resource=resource, aspect=aspect,
+                   session=self.session, limiter=self.limiter,
+                   meta=self.meta, memo=self.memo,
+                   validators=self.validators, tracer=self.tracer)
 
     def __call__(self, **kwargs):
         method = kwargs.pop('_method', 'get')
+        # query string arguments, for POSTs that take some (e.g. amount)
+        params = kwargs.pop('_params', {})
+        # raise requests' HTTPError for a 4xx or 5xx, rather than None
+        strict = kwargs.pop('_raise', False)
 
         # build up URL... Habitica's api is the *teeniest* bit annoying
         # so either i need to find a cleaner way here, or i should
         # get involved in the API itself and... help it.
+        args = {}
         if self.aspect:
             aspect_id = kwargs.pop('_id', None)
             direction = kwargs.pop('_direction', None)
@@ -56,6 +368,8 @@ class Habitica(object):
                                           str(aspect_id))
             arg_one = kwargs.pop('_one', None)
             arg_two = kwargs.pop('_two', None)
+            args = {'id': aspect_id, 'one': arg_one, 'two': arg_two,
+                    'direction': direction}
             uri = '%s/%s' % (self.auth['url'], API_URI_BASE)
             if arg_one is not None:
                 uri += '/%s/%s/%s' % (self.resource, self.aspect,
@@ -74,7 +388,8 @@ class Habitica(object):
             uri = '%s/%s/%s' % (self.auth['url'],
                                 API_URI_BASE,
                                 self.resource)
-        #print(uri)
+        template = url_template(uri[len('%s/%s/' % (self.auth['url'],
+                                                   API_URI_BASE)):], args)
         # actually make the request of the API
         if method in ['put', 'post'] and self.aspect \
                 not in ['class', 'inventory']:
@@ -83,19 +398,140 @@ class Habitica(object):
             else:
                 data = json.dumps(kwargs)
             #print(data)
-            res = getattr(requests, method)(uri, headers=self.headers,
-                                            data=data)
+            request = functools.partial(getattr(self.session, method), uri,
+                                        headers=self.headers, data=data,
+                                        params=params)
+        elif method == 'get':
+            params.update(kwargs)
+            key = (uri, json.dumps(params, sort_keys=True))
+            return self._get(key, uri, params, template, strict)
         else:
             # from ipdb import set_trace; set_trace()
-            res = getattr(requests, method)(uri, headers=self.headers,
-                                            params=kwargs)
+            params.update(kwargs)
+            request = functools.partial(getattr(self.session, method), uri,
+                                        headers=self.headers, params=params)
+        res = self._send(request, self._span(method, uri, template))
+        self.memo.invalidate(self.resource)
+        return self._data(res, strict=strict)
+
+    def _get(self, key, uri, params, template, strict=False):
+        """GET, shared with identical GETs and conditional on its ETag."""
+        etag = self.validators.etag(key)
+        headers = dict(self.headers, **{'If-None-Match': etag}) \
+            if etag else self.headers
+        request = functools.partial(self.session.get, uri, headers=headers,
+                                    params=params)
+        res = self.memo.fetch(self.resource, key, lambda: self._send(
+            request, self._span('get', uri, template)))
+        if res.status_code == HTTP_NOT_MODIFIED:
+            body = self.validators.body(key)
+            if body is not None:
+                return self._data(res, body, replayed=True)
+            # forgotten meanwhile; ask for the whole thing
+            res = self._send(functools.partial(self.session.get, uri,
+                                               headers=self.headers,
+                                               params=params),
+                             self._span('get', uri, template))
+        body = res.json() if res.ok else None
+        if body is not None:
+            self.validators.store(key, res.headers.get('ETag'), body)
+        return self._data(res, body, strict=strict)
 
-        # print(res.url)  # debug...
-        if res.status_code == requests.codes.ok or requests.codes.created:
-            if "data" in res.json():
-                return res.json()["data"]
+    def _data(self, res, body=None, replayed=False, strict=False):
+        """
+        The `data` of a response, decoding its `body` if not given. A
+        `replayed` body was kept from an earlier response, so what it says
+        about the server may be out of date. A failed response gives None,
+        or if `strict` raises requests' HTTPError.
+        """
+        import requests
+
+        if replayed or \
+                res.status_code in (requests.codes.ok, requests.codes.created):
+            if body is None:
+                body = res.json()
+            if 'appVersion' in body and not replayed:
+                self.meta['appVersion'] = body['appVersion']
+            if "data" in body:
+                return body["data"]
             else:
                 return None
-        else:
-            print(res.url)
+        elif strict:
+            logging.debug('%s %s' % (res.status_code, res.url))
             res.raise_for_status()
+        return None
+
+    def _span(self, method, uri, template):
+        """A Span for a request about to be sent, if anyone is tracing."""
+        return Span(method, uri, template) if self.tracer else None
+
+    def _send(self, request, span=None):
+        """Send a request within the rate-limit budget, retrying on 429."""
+        for attempt in range(API_RETRIES):
+            queued = time.time()
+            # wait for the budget before taking a slot, so a wait does
+            # not hold up requests that could go out
+            self.limiter.acquire()
+            with self.limiter.slots:
+                if span is not None:
+                    span.waited += time.time() - queued
+                res = request()
+                self.limiter.update(res.headers, res.status_code)
+            if res.status_code != HTTP_TOO_MANY_REQUESTS:
+                break
+        if span is not None:
+            span.seconds = time.time() - span.start
+            span.status = res.status_code
+            span.bytes = int(res.headers.get('Content-Length',
+                                             len(res.content)))
+            span.retries = attempt
+            span.headroom = self.limiter.budget()['remaining']
+            self.tracer.emit(span)
+        return res
+
+
+class AsyncHabitica(Habitica):
+    """
+    Habitica API class whose calls are awaitable.
+
+    Same URL grammar as Habitica (`_one`, `_two`, `_id`, `_direction`,
+    `_method`); requests run on a thread pool over the shared session so
+    independent reads can be in flight at once.
+    """
+
+    async def __call__(self, **kwargs):
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        call = functools.partial(Habitica.__call__, self, **kwargs)
+        return await loop.run_in_executor(None, call)
+
+
+def gather(*calls):
+    """Run awaitable API calls concurrently, returning results in order."""
+    import asyncio
+
+    async def _gather():
+        return await asyncio.gather(*calls)
+    return asyncio.run(_gather())
+
+
+def bulk(calls, progress=None):
+    """
+    Run many awaitable API calls, pipelined within the rate limiter's
+    bounds, calling `progress(done, total)` as each one completes.
+    Results come back in the order of `calls`.
+    """
+    import asyncio
+
+    async def _bulk():
+        done = [0]
+
+        async def one(call):
+            result = await call
+            done[0] += 1
+            if progress is not None:
+                progress(done[0], len(calls))
+            return result
+        return await asyncio.gather(*[one(call) for call in calls])
+    return asyncio.run(_bulk())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Small key-value cache for things derived from the server (quest details,
+guild names), kept in an SQLite file.
+
+Several habitica processes may run at once (cron jobs, status bars, the
+daemon), so the file is in WAL mode: readers never block, writers wait
+their turn for up to CACHE_TIMEOUT seconds, and every write is one
+transaction, however many keys it sets.
+"""
+
+
+from collections import Counter
+import sqlite3
+import time
+
+CACHE_TIMEOUT = 10  # seconds to wait for another process's write
+
+
+class Cache(object):
+    """
+    Sectioned key -> string cache, with an optional expiry per key.
+
+    Expired keys read as missing; `get(..., stale=True)` still returns
+    them, for callers that would rather show an old value than wait.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=CACHE_TIMEOUT)
+        # (section, 'hit' or 'miss') -> get()s, for metrics
+        self.stats = Counter()
+        self.db.execute('PRAGMA journal_mode=WAL')
+        with self.db:
+            self.db.execute('CREATE TABLE IF NOT EXISTS cache '
+                            '(section TEXT, key TEXT, value TEXT, '
+                            'expires REAL, PRIMARY KEY (section, key))')
+
+    def _row(self, section, key):
+        return self.db.execute('SELECT value, expires FROM cache '
+                               'WHERE section = ? AND key = ?',
+                               (section, key)).fetchone()
+
+    def get(self, section, key, default=None, stale=False):
+        """The value of `key`, or `default` if missing or expired."""
+        row = self._row(section, key)
+        if row is None or (not stale and row[1] is not None and
+                           row[1] < time.time()):
+            self.stats[section.lower(), 'miss'] += 1
+            return default
+        self.stats[section.lower(), 'hit'] += 1
+        return row[0]
+
+    def expired(self, section, key):
+        """True if `key` is missing or past its expiry."""
+        row = self._row(section, key)
+        return row is None or (row[1] is not None and row[1] < time.time())
+
+    def set(self, section, key, value, ttl=None):
+        """Store one key, expiring after `ttl` seconds (None: never)."""
+        self.update(section, {key: value}, ttl)
+
+    def update(self, section, values, ttl=None):
+        """Store several keys of `section` in a single transaction."""
+        expires = None if ttl is None else time.time() + ttl
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO cache '
+                                'VALUES (?, ?, ?, ?)',
+                                [(section, key, str(value), expires)
+                                 for key, value in values.items()])
+        return self
+
+    def items(self, section):
+        """Unexpired {key: value} of a whole section."""
+        return dict(self.db.execute('SELECT key, value FROM cache '
+                                    'WHERE section = ? AND (expires IS NULL '
+                                    'OR expires >= ?)',
+                                    (section, time.time())))
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The user's pet and mount collection as an egg x potion matrix.
+
+Every pet or mount is the pairing of an egg with a hatching potion, so
+instead of building '<Egg>-<Potion>' names and looking each one up, the
+collection is read once into flat arrays, one cell per pairing, and the
+questions the inventory commands ask (what is missing, what is surplus,
+how far is each pet from a mount) are answered a row or a column at a
+time.
+"""
+
+
+from array import array
+from collections import OrderedDict
+
+MOUNT_SATIETY = 50  # a pet this well fed becomes a mount
+BITE = 5  # satiety gained from a serving of a favourite food
+
+
+def to_mount(satiety):
+    """Servings of favourite food a pet at `satiety` needs to be a mount."""
+    # less than ideal food raises satiety by less than a bite, so round to
+    # whole bites; a pet rounded up to a mount's satiety still needs one
+    satiety = BITE * int(round(satiety / float(BITE)))
+    return max((MOUNT_SATIETY - satiety) // BITE, 1)
+
+
+class Collection(object):
+    """
+    Ownership of every pairing of `eggs` with `potions`.
+
+    Cell `i * len(potions) + j` is the pet/mount hatched from eggs[i] with
+    potions[j]: `pets` holds its satiety (0: never hatched, -1: raised to
+    a mount), `mounts` whether the mount is owned. Pets and mounts whose
+    egg or potion is not on the axes are left out.
+    """
+
+    def __init__(self, items, eggs, potions):
+        self.eggs = list(eggs)
+        self.potions = list(potions)
+        self.width = len(self.potions)
+        self._eggs = dict((egg, i) for i, egg in enumerate(self.eggs))
+        self._potions = dict((potion, j)
+                             for j, potion in enumerate(self.potions))
+
+        size = len(self.eggs) * self.width
+        self.pets = array('i', [0]) * size
+        self.mounts = array('b', [0]) * size
+        for name, satiety in (items.get('pets') or {}).items():
+            cell = self.cell(name)
+            if cell is not None and satiety:
+                self.pets[cell] = satiety
+        for name, owned in (items.get('mounts') or {}).items():
+            cell = self.cell(name)
+            if cell is not None and owned:
+                self.mounts[cell] = 1
+
+        eggs = items.get('eggs') or {}
+        potions = items.get('hatchingPotions') or {}
+        self.egg_count = array('i', [eggs.get(egg) or 0
+                                     for egg in self.eggs])
+        self.potion_count = array('i', [potions.get(potion) or 0
+                                        for potion in self.potions])
+
+    def cell(self, name):
+        """The cell of an '<Egg>-<Potion>' name, or None if off the axes."""
+        egg, _, potion = name.partition('-')
+        i = self._eggs.get(egg)
+        j = self._potions.get(potion)
+        if i is None or j is None:
+            return None
+        return i * self.width + j
+
+    def pair(self, cell):
+        """The (egg, potion) of a cell."""
+        return self.eggs[cell // self.width], self.potions[cell % self.width]
+
+    def name(self, cell):
+        return '%s-%s' % self.pair(cell)
+
+    def row(self, egg):
+        """The cells of one egg, in potion order."""
+        start = self._eggs[egg] * self.width
+        return range(start, start + self.width)
+
+    def unhatched(self):
+        """0/1 per cell: no pet to show for it (never hatched, or raised)."""
+        return array('b', [satiety <= 0 for satiety in self.pets])
+
+    def unmounted(self):
+        """0/1 per cell: the mount is not owned."""
+        return array('b', [not owned for owned in self.mounts])
+
+    def by_egg(self, flags):
+        """Per-egg totals of a per-cell array."""
+        width = self.width
+        return array('i', [sum(flags[start:start + width])
+                           for start in range(0, len(flags), width)])
+
+    def by_potion(self, flags):
+        """Per-potion totals of a per-cell array."""
+        return array('i', [sum(flags[j::self.width])
+                           for j in range(self.width)])
+
+    def missing_pets(self):
+        """Names of the pets we have nothing to show for."""
+        return [self.name(cell) for cell, flag in enumerate(self.unhatched())
+                if flag]
+
+    def missing_mounts(self):
+        """Names of the mounts we don't own."""
+        return [self.name(cell) for cell, flag in enumerate(self.unmounted())
+                if flag]
+
+    def surplus_eggs(self, extra=0):
+        """
+        Ordered {egg: count} of eggs beyond what hatching every missing
+        pet and raising every missing mount takes, keeping `extra` more.
+        """
+        need = self.by_egg(self.unhatched())
+        mounts = self.by_egg(self.unmounted())
+        return OrderedDict((egg, left) for egg, left in
+                           zip(self.eggs, [count - pets - more - extra
+                                           for count, pets, more in
+                                           zip(self.egg_count, need,
+                                               mounts)])
+                           if left > 0)
+
+    def surplus_potions(self, extra=0):
+        """Like surplus_eggs(), for hatching potions."""
+        need = self.by_potion(self.unhatched())
+        mounts = self.by_potion(self.unmounted())
+        return OrderedDict((potion, left) for potion, left in
+                           zip(self.potions, [count - pets - more - extra
+                                              for count, pets, more in
+                                              zip(self.potion_count, need,
+                                                  mounts)])
+                           if left > 0)
+
+    def servings(self):
+        """
+        Ordered {pet: servings of favourite food until its mount}, for the
+        hatched pets whose mount we lack, closest first.
+        """
+        cells = [cell for cell, satiety in enumerate(self.pets)
+                 if satiety > 0 and not self.mounts[cell]]
+        todo = [to_mount(self.pets[cell]) for cell in cells]
+        return OrderedDict((self.name(cell), servings) for servings, cell in
+                           sorted(zip(todo, cells)))
+
+    def hatch(self, egg, potion):
+        """Record a hatching: one egg and one potion fewer, one pet more."""
+        i = self._eggs[egg]
+        j = self._potions[potion]
+        self.egg_count[i] -= 1
+        self.potion_count[j] -= 1
+        self.pets[i * self.width + j] = BITE
+
+    def feed(self, cell, servings):
+        """Record a feeding: a pet fed up to its mount is one no more."""
+        if servings >= to_mount(self.pets[cell]):
+            self.pets[cell] = -1
+            self.mounts[cell] = 1
+        else:
+            self.pets[cell] += servings * BITE
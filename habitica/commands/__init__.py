@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The habitica commands, one module each.
+
+A command's module, and whatever it imports, is only loaded when that
+command runs, so e.g. `habitica home` never pays for the date and HTTP
+libraries `habitica status` needs. Each module has a `run(ctx)`, where
+`ctx` holds the parsed `args`, the `auth`, `settings` and `cache`
+configs, the user `fields` the command reads, and the objects built by
+core.connect().
+"""
+
+
+import importlib
+
+# command -> module in this package
+COMMANDS = {'server': 'server',
+            'daemon': 'daemon',
+            'home': 'home',
+            'item': 'item',
+            'feed': 'feed',
+            'hatch': 'hatch',
+            'sell': 'sell',
+            'collection': 'collection',
+            'dump': 'dump',
+            'cast': 'cast',
+            'gems': 'gems',
+            'armoire': 'armoire',
+            'quest': 'quest',
+            'ride': 'stable',
+            'walk': 'stable',
+            'equip': 'equip',
+            'sleep': 'inn',
+            'arise': 'inn',
+            'status': 'status',
+            'habits': 'habits',
+            'dailies': 'dailies',
+            'todos': 'todos',
+            'chat': 'chat',
+            'newday': 'newday',
+            'metrics': 'metrics',
+           }
+# commands that never talk to the server
+OFFLINE = ('home', 'metrics')
+
+
+def handler(command):
+    """The run(ctx) function of `command`, or None if there is no such."""
+    module = COMMANDS.get(command)
+    if module is None:
+        return None
+    return importlib.import_module('.%s' % module, __name__).run
@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica armoire` command.
+"""
+
+
+from ..core import ARMOIRE_GOLD_COST, show_delta
+
+
+def run(ctx):
+    hbt = ctx['hbt']
+    state = ctx['state']
+    fields = ctx['fields']
+
+    user = state.fetch(fields)
+    before_user = user
+    purchase = getattr(hbt.user, 'buy-armoire')
+    received = purchase(_method='post')
+    if 'dropText' in received['armoire']:
+        print('Got ' + received['armoire']['dropText'] + '!')
+    state.apply_purchase(received, gold=ARMOIRE_GOLD_COST)
+    show_delta(hbt, before_user, state.snapshot())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica cast` command.
+"""
+
+
+import sys
+
+from ..core import hp_down_ten, party_hp_down_ten, show_delta
+
+
+# cast/skill on task/self/party (v3 ok)
+def run(ctx):
+    args = ctx['args']
+    auth = ctx['auth']
+    hbt = ctx['hbt']
+    state = ctx['state']
+    fields = ctx['fields']
+
+    user = state.fetch(fields)
+    stats = user.get('stats', '')
+    uclass = stats['class']
+
+    # class: {spell: target}
+    spells = {'warrior': {'valorousPresence': 'party',
+                          'defensiveStance': 'self',
+                          'smash': 'task',
+                          'intimidate': 'party'},
+              'rogue': {'pickPocket': 'task',
+                        'backStab': 'task',
+                        'toolsOfTrade': 'party',
+                        'stealth': 'self'},
+              'wizard': {'fireball': 'task',
+                         'mpheal': 'party',
+                         'earth': 'party',
+                         'frost': 'self'
+                        },
+              'healer': {'heal': 'self',
+                         'healAll': 'party',
+                         'protectAura': 'party',
+                         'brightness': 'self'
+                        }
+             }
+
+    smart = {'heal': hp_down_ten,
+             'healAll': party_hp_down_ten,
+            }
+
+    if len(args['<args>']) == 0:
+        for spell in spells[uclass]:
+            print("%s (%s)" % (spell, spells[uclass][spell]))
+        sys.exit(0)
+
+    spell = args['<args>'][0]
+
+    precast = None
+    if spell == "smart":
+        spell = args['<args>'].pop(1)
+        if spell not in smart:
+            print("There's no smart way to cast that.")
+            sys.exit(1)
+        precast = smart[spell]
+
+    if len(args['<args>']) == 2:
+        task = args['<args>'][1]
+    else:
+        task = ''
+
+    if spell not in spells[uclass]:
+        print("That isn't a spell you know.")
+        sys.exit(1)
+    target = spells[uclass][spell]
+    if target == 'task' and not task:
+        print("You need to provide a task id to target.")
+        sys.exit(1)
+
+    # Do some smart checks before casting?
+    if precast != None:
+        precast(auth, hbt, user)
+
+    # Report casting.
+    msg = "Casting %s" % (spell)
+    if target == 'party':
+        msg += " on the party"
+    elif target == 'task':
+        msg += " on task %s" % (task)
+    msg += "."
+    print(msg)
+
+    before_user = user
+    charclass = getattr(hbt.user, 'class')
+    if task != '':
+        cast = charclass(_method='post', _one='cast', _two=spell,
+                         targetId=task)
+    else:
+        cast = charclass(_method='post', _one='cast', _two=spell)
+    if isinstance(cast, dict):
+        state.apply(cast.get('user'))
+    user = state.snapshot()
+    show_delta(hbt, before_user, user)
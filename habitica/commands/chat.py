@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica chat` command.
+"""
+
+
+import sys
+
+from ..core import (SECTION_CACHE_GUILDNAMES, chatID, load_guild_names,
+                    printChatMessages)
+
+
+def run(ctx):
+    args = ctx['args']
+    hbt = ctx['hbt']
+    state = ctx['state']
+    fields = ctx['fields']
+    cache = ctx['cache']
+
+    # Interface to party and guild chats
+    user = state.fetch(fields)
+    guilds = user.get('guilds')
+    groups = hbt.groups.party()
+
+    # List available chat IDs to use with show and send args
+    # party is always 0
+    if args['<args>'][0] == 'list':
+        alert = '(!)' if groups['id'] in user['newMessages'].keys() else ''
+        print('0 %s %s' % (groups['name'], alert))
+
+        # names come from the cache; only unknown ones are looked up
+        # before listing, all at once, while ones older than
+        # GUILDNAME_TTL are shown as they are and refreshed afterwards
+        names, stale = {}, []
+        for gid in guilds:
+            name = cache.get(SECTION_CACHE_GUILDNAMES, gid, stale=True)
+            if name is None:
+                continue
+            names[gid] = name
+            if cache.expired(SECTION_CACHE_GUILDNAMES, gid):
+                stale.append(gid)
+        missing = [gid for gid in guilds if gid not in names]
+        if missing:
+            names.update(load_guild_names(hbt, cache, missing))
+
+        for i in range(len(guilds)):
+            alert = '(!)' if guilds[i] in user['newMessages'].keys() else ''
+            print('%d %s %s' % (i + 1, names.get(guilds[i], guilds[i]),
+                                alert))
+
+        if stale:
+            # after the list is out, but before the command is done: in
+            # the daemon, a refresh left running would be counted and
+            # traced as the next command's
+            sys.stdout.flush()
+            load_guild_names(hbt, cache, stale)
+
+    # Print chat messages
+    elif args['<args>'][0] == 'show':
+        messageNum = 5
+        # Trying to catch all possible issues with user input
+        if len(args['<args>']) > 3 or len(args['<args>']) < 0: 
+            print('Invalid number of arguments! Must be group number '
+                  '+ (optional) number of messages to show.')
+            sys.exit(1)
+        # no arguments supplied: assuming party chat
+        elif len(args['<args>']) == 1:
+            party = user.get('party')['_id']
+        # use and validate number as chatID
+        elif len(args['<args>']) == 2:
+            party = chatID(args['<args>'][1], user, guilds)
+        # two numbers: validate both
+        else:
+            try:
+                messageNum = int(args['<args>'][2])
+            except ValueError:
+                print('Number of messages must be a number!')
+                sys.exit(1)
+            party = chatID(args['<args>'][1], user, guilds)
+
+        # get messages and print them nicely, mark chat as seen
+        chat = getattr(hbt.groups, party)
+        messages = chat(_one='chat')
+        chat(_method='post', _one='chat', _two='seen')
+        printChatMessages(messages, messageNum)
+
+    # sending messages to chats defined by chatID
+    elif args['<args>'][0] == 'send':
+        # we need at least the command, chatID and a message
+        if len(args['<args>']) < 3:
+            print('Not enough arguments!')
+            sys.exit(1)
+        # chatID validates input on its own
+        party = chatID(args['<args>'][1], user, guilds)
+        chat = getattr(hbt.groups, party)
+        # use everything else as message
+        send = chat(message=args['<args>'][2:], _method='post', _one='chat')
+
+        # get and print messages after sending
+        messages = chat(_one='chat')
+        printChatMessages(messages, 5)
+        # mark chat as seen
+        chat(_method='post', _one='chat', _two='seen')
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica collection` command.
+"""
+
+
+from ..collection import Collection
+from ..core import nice_name
+
+# cell marks: (pet, mount) -> character
+MARKS = {(False, False): '.',
+         (True, False): 'p',
+         (False, True): 'm',
+         (True, True): '#'}
+
+
+# Show which pets and mounts are collected, and what is left to do
+def run(ctx):
+    settings = ctx['settings']
+    content = ctx['content']
+    state = ctx['state']
+    fields = ctx['fields']
+
+    user = state.fetch(fields)
+    owned = Collection(user['items'], content.keys('eggs'),
+                       content.keys('dropHatchingPotions'))
+    unhatched = owned.unhatched()
+    unmounted = owned.unmounted()
+    size = len(unhatched)
+    pets = size - sum(unhatched)
+    mounts = size - sum(unmounted)
+    print("Pets: %d/%d, Mounts: %d/%d" % (pets, size, mounts, size))
+
+    # one row per egg, one column per potion
+    print("Potions: %s" % ", ".join(nice_name(potion)
+                                    for potion in owned.potions))
+    width = max(len(nice_name(egg)) for egg in owned.eggs) \
+        if owned.eggs else 0
+    for egg in owned.eggs:
+        print("%-*s %s" % (width, nice_name(egg),
+                           "".join(MARKS[(not unhatched[cell],
+                                          not unmounted[cell])]
+                                   for cell in owned.row(egg))))
+    print("(%s pet, %s mount, %s both, %s neither)"
+          % (MARKS[(True, False)], MARKS[(False, True)],
+             MARKS[(True, True)], MARKS[(False, False)]))
+
+    extra = settings['eggs-extra']
+    for what, surplus in (("eggs", owned.surplus_eggs(extra)),
+                          ("potions", owned.surplus_potions())):
+        if surplus:
+            print("Surplus %s: %s" % (what, ", ".join(
+                "%d %s" % (count, nice_name(key))
+                for key, count in surplus.items())))
+
+    servings = owned.servings()
+    if servings:
+        print("Servings until a mount: %s" % ", ".join(
+            "%s %d" % (nice_name(pet), count)
+            for pet, count in servings.items()))
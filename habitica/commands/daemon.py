@@ -0,0 +1,21 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica daemon` command.
+"""
+
+
+from .. import daemon
+
+
+# run commands from a warm background process
+def run(ctx):
+    args = ctx['args']
+    warm = ctx['warm']
+
+    if 'stop' in args['<args>']:
+        if not daemon.stop():
+            print('habitica daemon is not running')
+    else:
+        daemon.serve(warm)
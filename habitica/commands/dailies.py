@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica dailies` command.
+"""
+
+
+import textwrap
+
+from ..core import (get_task_refs, load_tasks, print_task_list, score_tasks,
+                    show_delta)
+
+
+# GET/PUT tasks:daily (v3 ok)
+def run(ctx):
+    args = ctx['args']
+    settings = ctx['settings']
+    hbt = ctx['hbt']
+    state = ctx['state']
+    index = ctx['index']
+    fields = ctx['fields']
+
+    direction = None
+    if 'done' in args['<args>']:
+        report = 'completed'
+        direction = 'up'
+    elif 'undo' in args['<args>']:
+        report = 'incomplete'
+        direction = 'down'
+
+    if direction != None:
+        before_user = state.fetch(fields)
+        dailies = load_tasks(hbt, index, 'dailies', before_user)
+        refs = get_task_refs(args['<args>'][1:])
+        for tid, item in score_tasks(hbt, state, dailies, refs,
+                                     direction, fields):
+            if item is None:
+                print('marked daily \'%s\' %s'
+                      % (dailies[tid]['text'], report)) #.encode('utf8'))) - for the first string
+                if direction == 'up':
+                    dailies[tid]['completed'] = True
+                else:
+                    dailies[tid]['completed'] = False
+            else:
+                print('toggled checklist item \'%s\' of daily \'%s\''
+                      % (dailies[tid]['checklist'][item]['text'],
+                         dailies[tid]['text']))
+                dailies[tid]['checklist'][item]['completed'] = \
+                    not dailies[tid]['checklist'][item]['completed']
+        user = state.doc
+        show_delta(hbt, before_user, user)
+        index.save('dailies', dailies)
+    else:
+        user = state.fetch(('_v', 'needsCron', 'tasksOrder.dailys'))
+        dailies = load_tasks(hbt, index, 'dailies', user,
+                             settings['tasks-ttl'])
+
+    if user['needsCron']:
+        yesterdayMessage = ('You left these Dailies unchecked yesterday! '
+                            'Do you want to check off any of them now? When you\'re done, start a new '
+                            'day using \'habitica newday\'!')
+        print('-' * min(len(yesterdayMessage), 80))
+        print(textwrap.fill(yesterdayMessage, width=80))
+        print('-' * min(len(yesterdayMessage), 80))
+    print_task_list(dailies, needsCron=user['needsCron'])
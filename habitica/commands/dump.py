@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica dump` command.
+"""
+
+
+import json
+
+
+# dump raw json for user (v3 ok)
+def run(ctx):
+    args = ctx['args']
+    hbt = ctx['hbt']
+    content = ctx['content']
+    state = ctx['state']
+    fields = ctx['fields']
+
+    user = None
+    party = None
+    items = None
+    report = {}
+    wanted = args['<args>']
+    if len(wanted) == 0:
+        wanted = ['user', 'party', 'members']
+
+    # Fetch stuff we need for multiple targets.
+    if 'user' in wanted or 'food' in wanted or 'pets' in wanted or 'mounts' in wanted:
+        user = state.fetch(fields)
+    if 'food' in wanted or 'pets' in wanted or 'mounts' in wanted:
+        items = user.get('items', [])
+    if 'party' in wanted or 'members' in wanted:
+        party = hbt.groups.party()
+
+    # Add report details.
+    if 'user' in wanted:
+        report['user'] = user
+    if 'party' in wanted:
+        report['party'] = party
+    if 'members' in wanted:
+        group = getattr(hbt.groups, party['id'])
+        report['members'] = group(_one='members')
+    if 'food' in wanted:
+        report['food'] = items['food']
+    if 'pets' in wanted:
+        report['pets'] = items['pets']
+    if 'mounts' in wanted:
+        report['mounts'] = items['mounts']
+    if 'content' in wanted:
+        report['content'] = content.catalog()
+
+    # Dump the report.
+    print(json.dumps(report, indent=4, sort_keys=True))
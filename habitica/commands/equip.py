@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica equip` command.
+"""
+
+
+from ..core import show_delta
+
+
+# equip a set of equipment (v3 ok)
+def run(ctx):
+    args = ctx['args']
+    hbt = ctx['hbt']
+    state = ctx['state']
+    fields = ctx['fields']
+
+    equipping = args['<args>']
+    user = state.fetch(fields)
+    before_user = user
+    items = user.get('items', [])
+    equipped = items['gear']['equipped']
+
+    equiper = batch = hbt.user.equip
+    for equipment in equipping:
+        equipped = equiper(_method='post', _one='equipped',
+                           _two=equipment)
+        if isinstance(equipped, dict):
+            state.apply({'items': equipped})
+    user = state.snapshot()
+    show_delta(hbt, before_user, user)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica feed` command.
+"""
+
+
+from ..core import nice_name, print_progress, show_delta
+from ..plans import plan_feeding
+
+
+# Feed all possible animals (v3 ok)
+def run(ctx):
+    hbt = ctx['hbt']
+    content = ctx['content']
+    state = ctx['state']
+    fields = ctx['fields']
+
+    user = state.fetch(fields)
+
+    # food: matching potion (e.g. 'Honey': 'Golden'), or 'ignore' for
+    # things pets don't eat, like saddles
+    feeding = dict((food, info.get('target') or 'ignore')
+                   for food, info in content.items('food').items())
+    magic = content.keys('premiumHatchingPotions')
+
+    steps, planned, uneaten, unknown = plan_feeding(user['items'], feeding,
+                                                    magic)
+    for food in unknown:
+        print("Unknown food: %s" % (food))
+    for step in steps:
+        moar = ""
+        if step.more:
+            moar = " (needs %d more serving%s)" % (step.more,
+                    "" if step.more == 1 else "s")
+        print("Feeding %d %s to %s%s" % (step.bites, nice_name(step.food),
+                                         nice_name(step.pet), moar))
+
+    # send the plan in order: every feeding changes the same user
+    # document, so concurrent ones could overwrite each other
+    before_user = state.snapshot()
+    feeder = hbt.user.feed
+    for done, step in enumerate(steps):
+        feeder(_method='post', _one=step.pet, _two=step.food,
+               _params={'amount': step.bites})
+        if len(steps) > 1:
+            print_progress(done + 1, len(steps))
+
+    if steps:
+        # one refresh to see what actually happened
+        user = state.fetch(fields)
+        show_delta(hbt, before_user, user)
+        for pet in set(step.pet for step in steps):
+            if user['items']['pets'].get(pet) != planned[pet]:
+                print("Feeding %s did not go as planned" % (nice_name(pet)))
+
+    for food in uneaten:
+        print("Nobody wants to eat %i %s" % (user['items']['food'][food],
+                                             nice_name(food)))
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica gems` command.
+"""
+
+
+from ..core import GEM_GOLD_COST, show_delta
+
+
+# buy as many gems as possible (v3 ok)
+def run(ctx):
+    hbt = ctx['hbt']
+    state = ctx['state']
+    fields = ctx['fields']
+
+    user = state.fetch(fields)
+    before_user = user
+    # base of 25 + (5 * (months subscribed / 3)) which seems to be
+    # gemCapExtra
+    # c.f. http://habitica.wikia.com/wiki/Gems
+    gem_buy_limit = 25 + int(user['purchased']['plan']['consecutive']['gemCapExtra'])
+    gems = gem_buy_limit - int(user['purchased']['plan']['gemsBought'])
+    # and no more than our gold pays for
+    gems = min(gems, int(user['stats']['gp'] // GEM_GOLD_COST))
+
+    purchaser = hbt.user.purchase
+    if gems > 0:
+        bought = purchaser(_method='post', _one='gems', _two='gem',
+                           quantity=gems)
+        if bought is None:
+            print('Could not buy %d gems' % gems)
+        else:
+            state.apply_purchase(bought, gold=GEM_GOLD_COST * gems,
+                                 gems=gems)
+    user = state.snapshot()
+    show_delta(hbt, before_user, user)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica habits` command.
+"""
+
+
+from ..core import (TASK_VALUE_BASE, get_task_ids, load_tasks,
+                    qualitative_task_score_from_value, score_tasks, show_delta)
+
+
+# GET/POST habits (v3 ok)
+def run(ctx):
+    args = ctx['args']
+    settings = ctx['settings']
+    hbt = ctx['hbt']
+    state = ctx['state']
+    index = ctx['index']
+    fields = ctx['fields']
+
+    direction = None
+    if 'up' in args['<args>']:
+        report = 'incremented'
+        direction = 'up'
+    elif 'down' in args['<args>']:
+        report = 'decremented'
+        direction = 'down'
+
+    if direction != None:
+        before_user = state.fetch(fields)
+        habits = load_tasks(hbt, index, 'habits', before_user)
+        refs = [(tid, None) for tid in get_task_ids(args['<args>'][1:])]
+        for tid, item in score_tasks(hbt, state, habits, refs, direction,
+                                     fields):
+            tval = habits[tid]['value']
+            print('%s habit \'%s\''
+                  % (report, habits[tid]['text'])) #.encode('utf8')))
+            if direction == 'up':
+                habits[tid]['value'] = tval + (TASK_VALUE_BASE ** tval)
+            else:
+                habits[tid]['value'] = tval - (TASK_VALUE_BASE ** tval)
+        show_delta(hbt, before_user, state.doc)
+        index.save('habits', habits)
+    else:
+        user = state.fetch(('_v', 'tasksOrder.habits'))
+        habits = load_tasks(hbt, index, 'habits', user,
+                            settings['tasks-ttl'])
+
+    for i, task in enumerate(habits):
+        score = qualitative_task_score_from_value(task['value'])
+        print('[%s] %s %s' % (score, i + 1, task['text'])) #.encode('utf8')))
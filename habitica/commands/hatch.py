@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica hatch` command.
+"""
+
+
+from ..core import nice_name, print_progress, show_delta
+from ..plans import plan_hatching
+
+
+# Hatch all possible eggs (v3 ok)
+def run(ctx):
+    settings = ctx['settings']
+    hbt = ctx['hbt']
+    content = ctx['content']
+    state = ctx['state']
+    fields = ctx['fields']
+
+    # first, so the catalog is checked against the server's version
+    user = state.fetch(fields)
+
+    # kinds of pets/potions (disregarding Magic Potion ones)
+    kinds = content.keys('dropHatchingPotions')
+    extra = settings['eggs-extra']
+    hatches, missing, needs, sales = plan_hatching(user['items'], kinds,
+                                                   extra)
+
+    for egg, potion in missing:
+        print("Want to hatch a %s %s, but missing potion" % (potion, egg))
+    for egg, potion in hatches:
+        print("Hatching a %s %s" % (nice_name(potion), nice_name(egg)))
+
+    # How many eggs do we need for the future?
+    for egg, need_pets, need_mounts in needs:
+        report = ""
+        if len(need_pets):
+            report += "%d Pet%s (%s)" % (len(need_pets),
+                      "" if len(need_pets) == 1 else "s",
+                      ", ".join(need_pets))
+        if len(need_mounts):
+            if len(report):
+                report += ", "
+            report += "%d Mount%s (%s)" % (len(need_mounts),
+                      "" if len(need_mounts) == 1 else "s",
+                      ", ".join(nice_name(kind) for kind in need_mounts))
+        if extra:
+            if len(report):
+                report += ", "
+            report += "%d extra" % (extra)
+
+        need = len(need_pets) + len(need_mounts) + extra
+        if need and need != extra:
+            print("%s egg: Need %d for %s" % (nice_name(egg), need, report))
+
+        # Sell unneeded eggs.
+        if egg in sales:
+            sell = sales[egg]
+            print("Selling %d %s egg%s" % (sell, nice_name(egg),
+                                           "" if sell == 1 else "s"))
+
+    if not hatches and not sales:
+        return
+
+    # hatch, then sell what is left, in plan order: every call changes
+    # the same user document, so concurrent ones could overwrite each
+    # other (and lose gold)
+    before_user = state.snapshot()
+    for done, (egg, potion) in enumerate(hatches):
+        hbt.user.hatch(_method='post', _one=egg, _two=potion)
+        if len(hatches) > 1:
+            print_progress(done + 1, len(hatches))
+    for egg, amount in sales.items():
+        hbt.user.sell(_method='post', _one='eggs', _two=egg,
+                      _params={'amount': amount})
+
+    # one refresh to see what actually happened
+    user = state.fetch(fields)
+    show_delta(hbt, before_user, user)
+    for egg, potion in hatches:
+        if user['items']['pets'].get('%s-%s' % (egg, potion), 0) <= 0:
+            print("Hatching a %s %s did not go as planned"
+                  % (nice_name(potion), nice_name(egg)))
@@ -0,0 +1,20 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica home` command.
+"""
+
+
+from webbrowser import open_new_tab
+
+from ..core import HABITICA_TASKS_PAGE
+
+
+# open HABITICA_TASKS_PAGE (v3 ok)
+def run(ctx):
+    auth = ctx['auth']
+
+    home_url = '%s%s' % (auth['url'], HABITICA_TASKS_PAGE)
+    print('Opening %s' % home_url)
+    open_new_tab(home_url)
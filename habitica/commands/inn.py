@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica sleep` and `habitica arise` commands.
+"""
+
+
+import sys
+
+
+# sleep/wake up (v3 ok)
+def run(ctx):
+    args = ctx['args']
+    hbt = ctx['hbt']
+    state = ctx['state']
+    fields = ctx['fields']
+
+    user = state.fetch(fields)
+    intent = args['<command>']
+    sleeping = user['preferences']['sleep']
+    if intent == 'sleep' and sleeping:
+        print("You are already resting.")
+        sys.exit(1)
+    if not sleeping and intent == 'arise':
+        print("You are already checked out.")
+        sys.exit(1)
+
+    sleeper = hbt.user.sleep
+    sleeper(_method='post')
@@ -0,0 +1,19 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica item` command.
+"""
+
+
+from ..core import do_item_enumerate
+
+
+# GET item lists (v3 ok)
+def run(ctx):
+    args = ctx['args']
+    state = ctx['state']
+    fields = ctx['fields']
+
+    user = state.fetch(fields)
+    do_item_enumerate(user, args['<args>'])
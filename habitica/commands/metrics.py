@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica metrics` command.
+"""
+
+
+import os.path
+import sys
+
+from .. import core, metrics
+
+
+# show or serve the totals in the metrics-file
+def run(ctx):
+    args = ctx['args']
+    settings = ctx.get('settings') or core.load_settings(core.SETTINGS_CONF)
+
+    path = os.path.expanduser(settings['metrics-file'])
+    if not path:
+        print("No metrics-file set in '%s'" % core.SETTINGS_CONF)
+        sys.exit(1)
+
+    if 'serve' in args['<args>']:
+        rest = [arg for arg in args['<args>'] if arg != 'serve']
+        port = int(rest[0]) if rest else metrics.METRICS_PORT
+        metrics.serve(path, port)
+    elif os.path.exists(path):
+        with open(path) as f:
+            sys.stdout.write(f.read())
+    else:
+        print('No metrics recorded in %s yet' % path)
@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica newday` command.
+"""
+
+
+from ..core import show_delta
+
+
+# moving to the next day
+# needed to fully implement 'recording yesterday's activity'
+def run(ctx):
+    hbt = ctx['hbt']
+    state = ctx['state']
+    fields = ctx['fields']
+
+    user = state.fetch(fields)
+    if user['needsCron']:
+        print('Moving to the current day ...')
+        newday = hbt.cron(data="none", _method="post")
+        show_delta(hbt, user, state.fetch(fields))
+    else:
+        print('We\'re already working the current day. Doing nothing!')
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica quest` command.
+"""
+
+
+from ..core import (SECTION_CACHE_QUEST, get_quest_info, group_user_status,
+                    print_gus)
+
+
+#Quest manipulations
+def run(ctx):
+    args = ctx['args']
+    auth = ctx['auth']
+    hbt = ctx['hbt']
+    content = ctx['content']
+    state = ctx['state']
+    fields = ctx['fields']
+    cache = ctx['cache']
+
+    # if on a quest with the party, grab quest info
+    user = state.fetch(fields)
+    party = hbt.groups.party()
+    quest_data = party['quest']
+    if quest_data:
+        quest_key = quest_data['key']
+
+        if cache.get(SECTION_CACHE_QUEST, 'quest_key') != quest_key:
+            cache = get_quest_info(content, cache, quest_key)
+
+        # now we use /party and quest_type to figure out our progress!
+        quest_type = cache.get(SECTION_CACHE_QUEST, 'quest_type')
+        if quest_type == 'collect' and quest_data['active']:
+            qp_tmp = quest_data['progress']['collect']
+            if type(qp_tmp) is not dict:
+                quest_progress = qp_tmp.values()[0]
+            else:
+                quest_progress = list(qp_tmp.values())[0]
+        elif quest_data['active']:
+            quest_progress = quest_data['progress']['hp']
+        else:
+            quest_progress = cache.get(SECTION_CACHE_QUEST, 'quest_max')
+
+        if quest_data['active']:
+            quest = '"%s" - %s/%s (-%s)' % (
+                    cache.get(SECTION_CACHE_QUEST, 'quest_title'),
+                    str(int(quest_progress)),
+                    cache.get(SECTION_CACHE_QUEST, 'quest_max'),
+                    str(int(user['party']['quest']['progress']['up'])))
+
+        else:
+            quest = '%s "%s"' % (
+                        'Preparing',
+                        cache.get(SECTION_CACHE_QUEST, 'quest_title'))
+
+        groupUserStatus = group_user_status(quest_data, auth, hbt, party)
+
+        len_ljust = 6
+        print('%s %s' % ('Quest:'.rjust(len_ljust, ' '), quest))
+        print_gus(groupUserStatus, len_ljust)
+
+        if 'forcestart' in args['<args>']:
+            if quest_data['active']:
+                print('Can\'t force-start: Quest is already active.')
+            else:
+                response = input('\nDo you really want to start the quest now?'
+                       '\nOnly members who accepted the invitation will take part! (y/N)\n')
+                if response.capitalize() != 'Y':
+                    print('Aborting force start.')
+                else:
+                    party = hbt.groups.party
+                    quest_data = party(_method='post', _one='quests', _two='force-start')
+                    if quest_data == None:
+                        print('Could not force-start the quest!')
+
+        if 'accept' in args['<args>']:
+            if quest_data['active']:
+                print('Can\'t accept: Quest is already active.')
+            else:
+                party = hbt.groups.party
+                quest_data = party(_method='post', _one='quests', _two='accept')
+                if quest_data == None:
+                    print('Error accepting the quest! (already accepted?)')
+                else:
+                    print('Accepted quest invitation!')
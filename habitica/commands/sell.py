@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica sell` command.
+"""
+
+
+from collections import OrderedDict
+import sys
+
+from ..core import do_item_enumerate, nice_name, show_delta
+
+
+# Sell all unneeded hatching potions (v3 ok)
+def run(ctx):
+    args = ctx['args']
+    settings = ctx['settings']
+    hbt = ctx['hbt']
+    content = ctx['content']
+    state = ctx['state']
+    fields = ctx['fields']
+
+    sell_reserved = settings['sell-reserved']
+    sell_max = settings['sell-max']
+    if "max" in args['<args>']:
+        arg = args['<args>'].index("max")
+        name = args['<args>'].pop(arg)
+        sell_max = int(args['<args>'].pop(arg))
+
+    user = state.fetch(fields)
+
+    selling = args['<args>']
+    if len(selling) == 0:
+        do_item_enumerate(user, ['hatchingPotions'], ordered=True)
+        sys.exit(0)
+
+    kinds = content.keys('dropHatchingPotions')
+    if selling == ['all']:
+        selling = kinds
+
+    tosell = OrderedDict()
+    items = user.get('items', [])
+    stats = user.get('stats', [])
+    potions = items['hatchingPotions']
+    for sell in selling:
+        if sell not in kinds:
+            print("\"%s\" isn't a valid kind of potion." % (sell))
+            sys.exit(1)
+        if sell not in potions:
+            print("You don't have any \"%s\"." % (sell))
+            continue
+
+        # Only sell potions above "sell-reserved" setting.
+        if sell_reserved != -1:
+            if potions[sell] < sell_reserved:
+                continue
+            potions[sell] -= sell_reserved
+        # Don't sell more than "sell-max" setting.
+        if sell_max != -1 and potions[sell] > sell_max:
+            potions[sell] = sell_max
+
+        # Sell potions!
+        if potions[sell] > 0:
+            print("Selling %d %s potion%s" % (potions[sell],
+                    nice_name(sell),
+                    "" if potions[sell] == 1 else "s"))
+            tosell[sell] = potions[sell]
+    if len(tosell):
+        before_user = user
+        seller = hbt.user.sell
+        for potion, amount in tosell.items():
+            state.apply(seller(_method='post', _one='hatchingPotions',
+                               _two=potion, _params={'amount': amount}))
+        user = state.snapshot()
+        show_delta(hbt, before_user, user)
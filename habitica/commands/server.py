@@ -0,0 +1,17 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica server` command.
+"""
+
+
+# GET server status (v3 ok)
+def run(ctx):
+    hbt = ctx['hbt']
+
+    server = hbt.status()
+    if server['status'] == 'up':
+        print('Habitica server is up')
+    else:
+        print('Habitica server down... or your computer cannot connect')
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica ride` and `habitica walk` commands.
+"""
+
+
+import random
+import sys
+
+from ..core import do_item_enumerate, nice_name
+
+
+# Select a pet or mount (v3 ok)
+def run(ctx):
+    args = ctx['args']
+    hbt = ctx['hbt']
+    state = ctx['state']
+    fields = ctx['fields']
+
+    if args['<command>'] == 'ride':
+        item_type = 'mounts'
+        current = 'currentMount'
+        name = 'mount'
+        verb = 'riding'
+    else:
+        item_type = 'pets'
+        current = 'currentPet'
+        name = 'pet'
+        verb = 'walking with'
+
+    user = state.fetch(fields)
+    items = user.get('items', [])
+    animals = items[item_type]
+
+    if len(args['<args>']) == 0:
+        do_item_enumerate(user, [item_type], ordered=True, pretty=False)
+        return
+
+    desired = "".join(args['<args>'])
+
+    if desired.startswith('rand'):
+        active = items.get(current, '')
+        if active and len(animals) > 1:
+            animals.pop(active)
+
+        choice = random.randrange(0, len(animals)-1)
+        chosen = animals.keys()[choice]
+    else:
+        if desired not in animals:
+            print("You don't have a '%s' %s!" % (desired, name))
+            sys.exit(1)
+        chosen = desired
+
+    equiper = batch = hbt.user.equip
+    equiper(_method='post', _one=name, _two=chosen)
+    print("You are now %s a %s" % (verb, nice_name(chosen)))
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica status` command.
+"""
+
+
+from collections import OrderedDict
+import datetime
+import dateutil.parser
+import humanize
+import pytz
+import textwrap
+
+from .. import api
+from ..core import (DEFAULT_MOUNT, DEFAULT_PARTY, DEFAULT_PET,
+                    SECTION_CACHE_QUEST,
+                    get_currency, get_members, get_quest_info, nice_name)
+
+
+# GET user status (v3 ok)
+def run(ctx):
+    hbt = ctx['hbt']
+    content = ctx['content']
+    state = ctx['state']
+    fields = ctx['fields']
+    cache = ctx['cache']
+
+
+    # gather status info (independent reads, fetched concurrently)
+    ahbt = hbt.aio()
+    user, party = api.gather(ahbt.user(**state.query(fields)),
+                             ahbt.groups.party())
+    state.update(user, fields)
+    guilds = user.get('guilds')
+    stats = user.get('stats', '')
+    items = user.get('items', '')
+    sleeping = user['preferences']['sleep']
+    food_count = sum(items['food'].values())
+    newMessages = user.get('newMessages', '')
+    yesterdayMessage = 'Beware! You are currently recording yesterday\'s activity! Please use the dailies command!'
+    # gather quest progress information (yes, janky. the API
+    # doesn't make this stat particularly easy to grab...).
+    # because hitting /content downloads a crapload of stuff, we
+    # cache info about the current quest in cache.
+    quest = 'Not currently on a quest'
+    if (party is not None and
+            party.get('quest', '')): 
+
+        quest_key = party['quest']['key']
+
+        if cache.get(SECTION_CACHE_QUEST, 'quest_key') != quest_key:
+            cache = get_quest_info(content, cache, quest_key)
+
+        # now we use /party and quest_type to figure out our progress!
+        quest_type = cache.get(SECTION_CACHE_QUEST, 'quest_type')
+        if quest_type == 'collect' and party['quest']['active']:
+            qp_tmp = party['quest']['progress']['collect']
+            if type(qp_tmp) is not dict:
+                quest_progress = qp_tmp.values()[0]
+            else:
+                quest_progress = list(qp_tmp.values())[0]
+        elif party['quest']['active']:
+            quest_progress = party['quest']['progress']['hp']
+        else:
+            quest_progress = cache.get(SECTION_CACHE_QUEST, 'quest_max')
+
+        if party['quest']['active']:
+            quest = '"%s" - %s/%s (-%s)' % (
+                        cache.get(SECTION_CACHE_QUEST, 'quest_title'),
+                        str(int(quest_progress)),
+                        cache.get(SECTION_CACHE_QUEST, 'quest_max'),
+                        str(int(user['party']['quest']['progress']['up'])))
+
+        else:
+            quest = '%s "%s"' % (
+                        'Preparing',
+                        cache.get(SECTION_CACHE_QUEST, 'quest_title'))
+
+
+    egg_count = sum(items['eggs'].values())
+    potion_count = sum(items['hatchingPotions'].values())
+
+    # prepare and print status strings
+    title = user['profile']['name']
+    title += ' - Level %d %s' % (stats['lvl'], stats['class'].capitalize())
+    if sleeping:
+        title += ' (zZZz)'
+    health = '%d/%d' % (stats['hp'], stats['maxHealth'])
+    xp = '%d/%d' % (int(stats['exp']), stats['toNextLevel'])
+    mana = '%d/%d' % (int(stats['mp']), stats['maxMP'])
+    currency = get_currency(stats.get('gp', 0), user.get('balance', "0"))
+    currentPet = items.get('currentPet', '')
+    if not currentPet:
+        currentPet = DEFAULT_PET
+    pet = '%s (%d food items)' % (currentPet, food_count)
+    pet = '%s' % (currentPet)
+    perishables = '%d serving%s, %d egg%s, %d potion%s' % \
+                  (food_count, "" if food_count == 1 else "s",
+                   egg_count, "" if egg_count == 1 else "s",
+                   potion_count,  "" if potion_count == 1 else "s")
+    mount = items.get('currentMount', '')
+    if not mount:
+        mount = DEFAULT_MOUNT
+
+    members = get_members(hbt, party)
+    summary_items = ('health', 'xp', 'mana', 'currency', 'perishables',
+                     'quest', 'pet', 'mount', 'group')
+    len_ljust = max(map(len, summary_items)) + 1
+
+    groupUserStatus = {}
+    groupUserStatus['users'] = {}
+    for member in members:
+        name = member['profile']['name']
+        groupUserStatus['users'][name] = {}
+        groupUserStatus.setdefault('longestname', 1)
+        if len(member['profile']['name']) > groupUserStatus['longestname']:
+                groupUserStatus['longestname'] = len(member['profile']['name'])
+        groupUserStatus['users'][name]['name'] = member['profile']['name']
+        if member['preferences']['sleep']:
+                groupUserStatus['users'][name]['sleep'] = 'sleeping'
+        else:
+                groupUserStatus['users'][name]['sleep'] = 'active'
+        groupUserStatus['users'][name]['lastactive'] = member['auth']['timestamps']['loggedin']
+        stats = ['hp', 'maxHealth', 'mp', 'maxMP', 'class']
+        for stat in stats:
+            groupUserStatus['users'][name][stat] = member['stats'][stat]
+
+    groupUserStatus['users'] = OrderedDict(sorted(groupUserStatus['users'].items(), key=lambda t: t[1]['lastactive']))
+
+    messages = 'No new messages.'
+    if newMessages:
+        messages = 'New messages in '
+        for gid, message in newMessages.items():
+            if gid != party['id']:
+                messages = messages + message['name'] + '(' + str(guilds.index(gid)+1) + '), '
+            else:
+                messages = messages + message['name'] + '(0), '
+        messages = messages[:-2] + '!'
+
+    print('=' * len(title))
+    print(title)
+    print('=' * len(title))
+    print(textwrap.fill(messages, width=80))
+    print('-' * min(max(len(messages), len(title)), 80))
+    if user['needsCron']:
+        print(yesterdayMessage)
+        print('-' * max(len(yesterdayMessage), len(messages)))
+    print('%s %s' % ('Health:'.rjust(len_ljust, ' '), health))
+    print('%s %s' % ('XP:'.rjust(len_ljust, ' '), xp))
+    print('%s %s' % ('Mana:'.rjust(len_ljust, ' '), mana))
+    print('%s %s' % ('Currency:'.rjust(len_ljust, ' '), currency))
+    print('%s %s' % ('Perishables:'.rjust(len_ljust, ' '), perishables))
+    print('%s %s' % ('Pet:'.rjust(len_ljust, ' '), nice_name(pet)))
+    print('%s %s' % ('Mount:'.rjust(len_ljust, ' '), nice_name(mount)))
+    print('%s %s' % ('Quest:'.rjust(len_ljust, ' '), quest))
+    print('%s %s' % ('Group:'.rjust(len_ljust, ' '),
+                     party['name'] if party else DEFAULT_PARTY))
+
+    len_ljust += 1
+    headLine = ''.rjust(len_ljust, ' ')
+    headLine += 'Name'.ljust(groupUserStatus['longestname'] + 1)
+    headLine += 'Class'.ljust(9, ' ')
+    headLine += 'Status'.ljust(10, ' ')
+    headLine += 'Last login'.ljust(15, ' ')
+    headLine += 'Health'.ljust(8, ' ')
+    headLine += 'Mana'.ljust(8, ' ')
+    print(headLine)
+
+    print(' '.rjust(len_ljust, ' ') + '-' * (len(headLine) - len_ljust))
+
+    for user in groupUserStatus['users'].values():
+        userLine = ' '.rjust(len_ljust, ' ')
+        userLine += user['name'].ljust(groupUserStatus['longestname'] + 1)
+        userLine += user['class'].capitalize().ljust(9, ' ') 
+        userLine += user['sleep'].ljust(10, ' ')
+        userLine += humanize.naturaltime(datetime.datetime.now(pytz.utc) - dateutil.parser.parse(user['lastactive'])).ljust(15, ' ')
+        userLine += (str(int(user['hp'])) + '/' + str(user['maxHealth'])).ljust(8, ' ')
+        userLine += (str(int(user['mp'])) + '/' + str(user['maxMP'])).ljust(8, ' ')
+        print(userLine)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The `habitica todos` command.
+"""
+
+
+import json
+import sys
+
+from .. import api
+from ..core import (PRIORITY, get_task_ids, get_task_refs, load_tasks,
+                    print_progress, print_task_list, score_tasks, show_delta,
+                    updated_task_list)
+
+
+# handle todo items (v3 ok)
+def run(ctx):
+    args = ctx['args']
+    settings = ctx['settings']
+    hbt = ctx['hbt']
+    state = ctx['state']
+    index = ctx['index']
+    fields = ctx['fields']
+    failed = []
+
+    if 'done' in args['<args>']:
+        before_user = state.fetch(fields)
+        todos = load_tasks(hbt, index, 'todos', before_user)
+        refs = get_task_refs(args['<args>'][1:])
+        done = []
+        for tid, item in score_tasks(hbt, state, todos, refs, 'up',
+                                     fields):
+            if item is None:
+                print('marked todo \'%s\' complete'
+                      % todos[tid]['text']) #.encode('utf8'))
+                done.append(tid)
+            else:
+                print('toggled checklist item \'%s\' of todo \'%s\''
+                      % (todos[tid]['checklist'][item]['text'],
+                         todos[tid]['text']))
+                todos[tid]['checklist'][item]['completed'] = \
+                    not todos[tid]['checklist'][item]['completed']
+        todos = updated_task_list(todos, done)
+        show_delta(hbt, before_user, state.doc)
+        index.save('todos', todos)
+    else:
+        user = state.fetch(('_v', 'tasksOrder.todos'))
+        todos = load_tasks(hbt, index, 'todos', user,
+                           settings['tasks-ttl'])
+    if 'get' in args['<args>']:
+        tids = get_task_ids(args['<args>'][1:])
+        for tid in tids:
+            todo = getattr(hbt.tasks, todos[tid]['id'])
+            obj = todo(_method='get')
+            print(json.dumps({'todo':obj}, indent=4, sort_keys=True))
+    elif 'add' in args['<args>']:
+        ttext = ' '.join(args['<args>'][1:])
+        todo = hbt.tasks.user(type='todo',
+                              text=ttext,
+                              priority=PRIORITY[args['--difficulty']],
+                              _method='post')
+        if not isinstance(todo, dict):
+            todo = {'completed': False, 'text': ttext, 'type': 'todo'}
+        todos.insert(0, todo)
+        index.save('todos', todos)
+        print('added new todo \'%s\'' % ttext)
+    elif 'delete' in args['<args>']:
+        tids = get_task_ids(args['<args>'][1:])
+        ahbt = hbt.aio()
+        results = api.bulk([getattr(ahbt.tasks, todos[tid]['id'])(
+                                _method='delete')
+                            for tid in tids], progress=print_progress)
+        deleted = []
+        for tid, result in zip(tids, results):
+            if result is None:
+                failed.append(tid)
+                sys.stderr.write('could not delete todo \'%s\'\n'
+                                 % todos[tid]['text'])
+            else:
+                print('deleted todo \'%s\''
+                      % todos[tid]['text'])
+                deleted.append(tid)
+        todos = updated_task_list(todos, deleted)
+        index.save('todos', todos)
+    print_task_list(todos)
+    if failed:
+        sys.exit(1)
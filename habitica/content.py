@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Local, indexed copy of Habitica's /content game catalog.
+
+The catalog is several megabytes and only changes when Habitica deploys,
+so it is kept in an SQLite file keyed by (index, key) and downloaded again
+only when the server's appVersion differs from the stored one.
+"""
+
+
+from collections import Counter, OrderedDict
+import json
+import logging
+import sqlite3
+
+# catalog sections we index, and where they live in /content
+INDEXES = {'quests': ('quests',),
+           'eggs': ('eggs',),
+           'hatchingPotions': ('hatchingPotions',),
+           'dropHatchingPotions': ('dropHatchingPotions',),
+           'premiumHatchingPotions': ('premiumHatchingPotions',),
+           'food': ('food',),
+           'gear': ('gear', 'flat')}
+
+
+class ContentStore(object):
+    """
+    Versioned on-disk store for the /content catalog.
+
+    Lookups are answered from disk; the catalog is fetched through `hbt`
+    at most once per process, and only when missing or out of date.
+    """
+
+    def __init__(self, hbt, path):
+        self.hbt = hbt
+        self.path = path
+        self.checked = False
+        # ('content', 'hit', 'miss' or 'unknown') -> checks against the
+        # server; 'unknown' when it would not tell us its version
+        self.stats = Counter()
+        self.db = sqlite3.connect(path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS items '
+                        '(kind TEXT, key TEXT, value TEXT, '
+                        'PRIMARY KEY (kind, key))')
+        self.db.execute('CREATE TABLE IF NOT EXISTS meta '
+                        '(key TEXT PRIMARY KEY, value TEXT)')
+
+    def _meta(self, key):
+        row = self.db.execute('SELECT value FROM meta WHERE key = ?',
+                              (key,)).fetchone()
+        return row[0] if row else None
+
+    def version(self):
+        """appVersion of the stored catalog, or None if there is none."""
+        return self._meta('version')
+
+    def refresh(self, force=False):
+        """Download the catalog again if it is missing or out of date."""
+        stored = self.version()
+        server = self.hbt.meta.get('appVersion')
+        if not force and stored is not None and server is None:
+            # no response has told us the server's version yet; /status
+            # is the cheapest one that does
+            try:
+                self.hbt.status()
+            except (IOError, ValueError) as e:
+                logging.info('Could not check the content catalog: %s' % e)
+            server = self.hbt.meta.get('appVersion')
+            if server is None:
+                # serve what we have, unchecked, for the rest of the run
+                self.checked = True
+                self.stats['content', 'unknown'] += 1
+                return False
+        if not force and stored is not None and server == stored:
+            self.checked = True
+            self.stats['content', 'hit'] += 1
+            return False
+        self.stats['content', 'miss'] += 1
+
+        logging.info('Refreshing content catalog (%s -> %s)...'
+                     % (stored, server))
+        catalog = self.hbt.content()
+        version = self.hbt.meta.get('appVersion') or ''
+        rows = []
+        for kind, path in INDEXES.items():
+            section = catalog
+            for step in path:
+                section = section.get(step, {})
+            for key, value in section.items():
+                rows.append((kind, key, json.dumps(value)))
+        with self.db:
+            self.db.execute('DELETE FROM items')
+            self.db.executemany('INSERT INTO items VALUES (?, ?, ?)', rows)
+            self.db.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                                [('version', version),
+                                 ('catalog', json.dumps(catalog))])
+        self.checked = True
+        return True
+
+    def _fresh(self):
+        if not self.checked:
+            self.refresh()
+
+    def get(self, kind, key, default=None):
+        """One catalog entry, e.g. get('quests', 'dilatory')."""
+        self._fresh()
+        row = self.db.execute('SELECT value FROM items '
+                              'WHERE kind = ? AND key = ?',
+                              (kind, key)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def keys(self, kind):
+        """Keys of an index, in catalog order."""
+        self._fresh()
+        return [row[0] for row in
+                self.db.execute('SELECT key FROM items WHERE kind = ? '
+                                'ORDER BY rowid', (kind,))]
+
+    def items(self, kind):
+        """A whole index as an ordered {key: entry} dict."""
+        self._fresh()
+        return OrderedDict((row[0], json.loads(row[1])) for row in
+                           self.db.execute('SELECT key, value FROM items '
+                                           'WHERE kind = ? ORDER BY rowid',
+                                           (kind,)))
+
+    def catalog(self):
+        """The full catalog as last downloaded."""
+        self._fresh()
+        return json.loads(self._meta('catalog'))
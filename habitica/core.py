@@ -13,28 +13,25 @@ TODO:philadams get logger named, like requests!
 
 
 from bisect import bisect
-import json
 import logging
 import os.path
-import random
 import sys
 from operator import itemgetter
 import re
-from time import sleep, time
-from webbrowser import open_new_tab
 
 from collections import OrderedDict
 import datetime
-import humanize
-import dateutil.parser
-import pytz
 import textwrap
 
 from docopt import docopt
 
 from . import api
-
-from pprint import pprint
+from . import commands
+from .cache import Cache
+from .content import ContentStore
+from .state import UserState, project
+from .tasks import TaskIndex, TASK_TYPES, TASKS_TTL
+from . import trace
 
 try:
     import ConfigParser as configparser
@@ -44,19 +41,23 @@ except:
 
 VERSION = 'habitica version 0.0.16'
 TASK_VALUE_BASE = 0.9747  # http://habitica.wikia.com/wiki/Task_Value
-HABITICA_REQUEST_WAIT_TIME = 0.5  # time to pause between concurrent requests
 HABITICA_TASKS_PAGE = '/#/tasks'
 # https://trello.com/c/4C8w1z5h/17-task-difficulty-settings-v2-priority-multiplier
 PRIORITY = {'easy': 1,
             'medium': 1.5,
             'hard': 2}
+GEM_GOLD_COST = 20  # http://habitica.wikia.com/wiki/Gems
+ARMOIRE_GOLD_COST = 100
 AUTH_CONF = os.path.expanduser('~') + '/.config/habitica/auth.cfg'
-CACHE_CONF = os.path.expanduser('~') + '/.config/habitica/cache.cfg'
+CACHE_DB = os.path.expanduser('~') + '/.config/habitica/cache.db'
 SETTINGS_CONF = os.path.expanduser('~') + '/.config/habitica/settings.cfg'
+CONTENT_DB = os.path.expanduser('~') + '/.config/habitica/content.db'
+TASKS_DB = os.path.expanduser('~') + '/.config/habitica/tasks.db'
 
 SECTION_HABITICA = 'Habitica'
 SECTION_CACHE_QUEST = 'Quest'
 SECTION_CACHE_GUILDNAMES = 'Guildnames'
+GUILDNAME_TTL = 604800  # a week
 checklists_on = False
 
 DEFAULT_PARTY = 'Not currently in a party'
@@ -64,6 +65,40 @@ DEFAULT_QUEST = 'Not currently on a quest'
 DEFAULT_PET = 'No pet currently'
 DEFAULT_MOUNT = 'Not currently mounted'
 
+# user document fields each command reads, fetched via the server's
+# `userFields` projection instead of the whole (large) user; commands not
+# listed here get everything
+DELTA_FIELDS = ('stats', 'balance', 'items.pets', 'items.food',
+                'items.mounts', 'items.gear.equipped')  # for show_delta
+USER_FIELDS = {'item': ('items',),
+               'feed': DELTA_FIELDS,
+               'hatch': DELTA_FIELDS + ('items.eggs',
+                                        'items.hatchingPotions'),
+               'sell': DELTA_FIELDS + ('items.hatchingPotions',),
+               'collection': ('items.pets', 'items.mounts', 'items.eggs',
+                              'items.hatchingPotions'),
+               'cast': DELTA_FIELDS + ('profile.name',),
+               'gems': DELTA_FIELDS + ('purchased.plan',),
+               'armoire': DELTA_FIELDS,
+               'quest': ('party.quest',),
+               'ride': ('items.mounts', 'items.currentMount'),
+               'walk': ('items.pets', 'items.currentPet'),
+               'equip': DELTA_FIELDS,
+               'sleep': ('preferences.sleep',),
+               'arise': ('preferences.sleep',),
+               'status': ('profile.name', 'stats', 'balance', 'guilds',
+                          'preferences.sleep', 'newMessages', 'needsCron',
+                          'party.quest', 'items.food', 'items.eggs',
+                          'items.hatchingPotions', 'items.currentPet',
+                          'items.currentMount'),
+               'habits': DELTA_FIELDS + ('_v', 'tasksOrder.habits'),
+               'dailies': DELTA_FIELDS + ('_v', 'needsCron',
+                                          'tasksOrder.dailys'),
+               'todos': DELTA_FIELDS + ('_v', 'tasksOrder.todos'),
+               'chat': ('guilds', 'party._id', 'newMessages'),
+               'newday': DELTA_FIELDS + ('needsCron',),
+              }
+
 def load_typo_check(config, defaults, section, configfile):
     for item in config.options(section):
         if item not in defaults:
@@ -78,8 +113,17 @@ def load_settings(configfile):
     integers = {'sell-max': "-1",
                 'sell-reserved': "-1",
                 'eggs-extra': "0",
+                'pool-size': str(api.API_POOL_SIZE),
+                'keep-alive': "1",
+                'gzip': "1",
+                'concurrency': str(api.API_CONCURRENCY),
+                'tasks-ttl': str(TASKS_TTL),
+                'memo-window': str(api.API_MEMO_WINDOW),
+                'timeout': str(api.API_TIMEOUT),
                }
-    strings = { }
+    strings = {'trace-file': "",
+               'metrics-file': "",
+              }
     defaults = integers.copy()
     defaults.update(strings)
 
@@ -150,55 +194,6 @@ def load_auth(configfile):
     return rv
 
 
-def load_cache(configfile):
-    logging.debug('Loading cached config data (%s)...' % configfile)
-
-    defaults = {'quest_key': '',
-                'quest_s': 'Not currently on a quest'}
-
-    cache = configparser.ConfigParser(defaults)
-    cache.read(configfile)
-
-    if not cache.has_section(SECTION_CACHE_QUEST):
-        cache.add_section(SECTION_CACHE_QUEST)
-
-    if not cache.has_section(SECTION_CACHE_GUILDNAMES):
-        cache.add_section(SECTION_CACHE_GUILDNAMES)
-
-    return cache
-
-
-def update_quest_cache(configfile, **kwargs):
-    logging.debug('Updating (and caching) config data (%s)...' % configfile)
-
-    cache = load_cache(configfile)
-
-    for key, val in kwargs.items():
-        cache.set(SECTION_CACHE_QUEST, key, val)
-
-    with open(configfile, 'w') as f:
-        cache.write(f)
-
-    cache.read(configfile)
-
-    return cache
-
-def update_guildnames_cache(configfile, number, name):
-    logging.debug('Updating (and caching) config data (%s)...' % configfile)
-
-    cache = load_cache(configfile)
-
-    cache.set(SECTION_CACHE_GUILDNAMES, number, name)
-
-    with open(configfile, 'w') as f:
-        cache.write(f)
-
-    cache.read(configfile)
-
-    return cache
-
-
-
 def get_task_ids(tids):
     """
     handle task-id formats such as:
@@ -220,6 +215,33 @@ def get_task_ids(tids):
     return [e - 1 for e in set(task_ids)]
 
 
+def get_task_refs(tids):
+    """
+    like get_task_ids, but also takes checklist items such as `4a`:
+        habitica dailies done 1,3,6-9 4a 4b
+    returns (task, item) pairs in the order given, item None for a whole
+    task and None in place of a pair for an argument that cannot be parsed
+    """
+    refs = []
+    for raw_arg in tids:
+        for bit in raw_arg.split(','):
+            if re.search(r'^[0-9]+-[0-9]+$', bit) != None:
+                start, stop = [int(e) for e in bit.split('-')]
+                found = [(e - 1, None) for e in range(start, stop + 1)]
+            else:
+                checklistItem = isChecklistItem(bit)
+                if checklistItem == False:
+                    found = [(int(bit) - 1, None)]
+                elif checklistItem == None:
+                    print('Could not parse argument \'%s\' - ignoring it!'
+                          % bit)
+                    continue
+                else:
+                    found = [checklistItem]
+            refs.extend(e for e in found if e not in refs)
+    return refs
+
+
 def nice_name(thing):
     if '_' in thing:
         thing = thing.replace('_', '-')
@@ -231,44 +253,110 @@ def nice_name(thing):
     return prettier
 
 
-def find_pet_to_feed(pets, items, suffix, finicky):
-    basic = [ 'BearCub', 'Cactus', 'Dragon', 'FlyingPig',
-              'Fox', 'LionCub', 'PandaCub', 'TigerCub', 'Wolf' ]
-    rare = [ 'Wolf-Veteran', 'Wolf-Cerberus', 'Dragon-Hydra',
-             'Turkey-Base', 'BearCub-Polar', 'MantisShrimp-Base',
-             'JackOLantern-Base', 'Mammoth-Base', 'Tiger-Veteran',
-             'Phoenix-Base', 'Turkey-Gilded' ]
-
-    mouth = None
-    best = 0
-    for pet in pets:
-        fed = items['pets'][pet]
+def print_progress(done, total):
+    """Show how far a bulk operation has got, when on a terminal."""
+    if not sys.stderr.isatty():
+        return
+    sys.stderr.write('\r%d/%d' % (done, total))
+    if done == total:
+        sys.stderr.write('\n')
+    sys.stderr.flush()
 
-        # Unhatched pet.
-        if fed <= 0:
-            #print("Unhatched: %s" % (pet))
-            continue
-        # Unfeedable pet.
-        if pet in rare:
-            continue
-        if items['mounts'].get(pet, 0) == 1 and fed == 5:
-            #print("Has mount: %s" % (pet))
-            continue
-        # Not best food match.
-        if finicky and not pet.endswith('-%s' % (suffix)):
-            #print("Not a match for %s: %s" % (food, pet))
+def score_tasks(hbt, state, tasks, refs, direction, fields=None):
+    """
+    Score the tasks and checklist items `refs` (see get_task_refs) of
+    `tasks` in one batch-update request, folding what it returns into
+    `state`. A single ref, or a batch the server refuses outright (a 4xx),
+    goes through the per-task routes instead, one after another. Returns
+    the refs that were scored.
+    """
+    import requests
+
+    ops = []
+    for task, item in refs:
+        if item is None:
+            ops.append({'op': 'score',
+                        'params': {'id': tasks[task]['id'],
+                                   'direction': direction}})
+        else:
+            ops.append({'op': 'scoreChecklistItem',
+                        'params': {'id': tasks[task]['id'],
+                                   'itemId': tasks[task]['checklist'][item]['id']}})
+    if len(ops) > 1:
+        try:
+            results = getattr(hbt.user, 'batch-update')(
+                _method='post', _raise=True, ops=ops)
+        except requests.HTTPError as e:
+            if not 400 <= e.response.status_code < 500:
+                return _unsure(e)
+            # refused before scoring anything: fine to score one by one
+            logging.debug('batch-update refused: %s' % e)
+        except (IOError, ValueError) as e:
+            # a timeout, a reset or a garbled reply: some ops may have
+            # been scored, and scoring them again would count them twice
+            return _unsure(e)
+        else:
+            if isinstance(results, dict):
+                # just the user, with every op applied
+                state.update(results, fields)
+                return list(refs)
+            return _scored(state, refs, ops, results or [])
+
+    results = []
+    for done, op in enumerate(ops):
+        task = getattr(hbt.tasks, op['params']['id'])
+        if op['op'] == 'score':
+            results.append(task(_method='post', _one='score',
+                                _two=direction))
+        else:
+            results.append(task(_method='post', _one='checklist',
+                                _two=op['params']['itemId'] + '/score'))
+        if len(ops) > 1:
+            print_progress(done + 1, len(ops))
+    return _scored(state, refs, ops, results)
+
+
+def _scored(state, refs, ops, results):
+    # the refs whose op has a result, folding in what scoring them did
+    scored = []
+    for ref, op, result in zip(refs, ops, results):
+        if result is None:
             continue
+        if op['op'] == 'score':
+            state.apply_score(result)
+        scored.append(ref)
+    return scored
+
+
+def _unsure(error):
+    print('Could not tell which tasks were scored (%s); '
+          'check before trying again.' % error)
+    return []
+
+
+def load_tasks(hbt, index, kind, user, ttl=None):
+    """
+    The `kind` task list as numbered on screen, given the `user` fetched
+    with its _v and tasksOrder.
+
+    To score by number, the saved list only has to have the same tasks in
+    the same order. To list, with a `ttl`, it also has to have been
+    synced at the user's current _v within `ttl` seconds. Otherwise the
+    list is downloaded, and saved as synced.
+    """
+    order = project(user, 'tasksOrder.%s' % TASK_TYPES[kind])
+    if ttl is None:
+        tasks = index.load(kind, order)
+    else:
+        tasks = index.current(kind, user.get('_v'), order, ttl)
+    if tasks is not None:
+        return tasks
+    tasks = hbt.tasks.user(type=TASK_TYPES[kind])
+    if kind == 'todos':
+        tasks = [e for e in tasks if not e['completed']]
+    index.save(kind, tasks, version=user.get('_v'))
+    return tasks
 
-        # Feed the pet that is closest to becoming a mount.
-        if fed > best:
-            best = fed
-            mouth = pet
-        elif fed == best:
-            # In the case of a tie, prefer feeding basic pets
-            # to get Pet achievement.
-            if pet in basic:
-                mouth = pet
-    return mouth
 
 def updated_task_list(tasks, tids):
     for tid in sorted(tids, reverse=True):
@@ -321,6 +409,11 @@ def print_task_list(tasks, needsCron = False):
                                        str(cl_item_count(task)))
         # todos can have a due date - display it human readable
         if task['type'] == "todo" and 'date' in task.keys() and task['date'] != "":
+            # slow to import, so only loaded for lists that show dates
+            import dateutil.parser
+            import dateutil.tz
+            import humanize
+            import pytz
             task_line = task_line.ljust(longesttext + 9)
             task_line += 'due %s (%s)' \
                          % (humanize.naturaltime(datetime.datetime.now(pytz.utc) - \
@@ -390,7 +483,7 @@ def fix_max(hbt, item, bstats, astats, refresh=True):
             astats[max_report[item]['max']] = bstats[max_report[item]['max']]
         elif refresh and item != 'hp':
             # Perform full refresh and update all report items.
-            refresh = hbt.user()
+            refresh = hbt.user(userFields='stats')
             rstats = refresh.get('stats', [])
             for fixup in max_report:
                 astats[max_report[fixup]['max']] = rstats[max_report[fixup]['max']]
@@ -537,14 +630,39 @@ def do_item_enumerate(user, requested, ordered=False, pretty=True):
             for item in results:
                 print('%s' % (item))
 
-def get_members(auth, party):
-    result = []
-    group = api.Habitica(auth=auth, resource="groups", aspect=party['id'])
-    members = group(_one='members')
-    for i in members:
-        member = api.Habitica(auth=auth, resource="members", aspect=i['id'])()
-        result.append(member)
-    return result
+def load_members(hbt, ids):
+    """
+    Fetch member profiles concurrently, returned in the order of `ids`.
+    How many are in flight at once is bounded by the rate limiter.
+    """
+    ahbt = hbt.aio()
+    return api.gather(*[getattr(ahbt.members, mid)() for mid in ids])
+
+def load_guild_names(hbt, cache, ids):
+    """
+    Look up the names of guilds `ids` concurrently, as {id: name}, and
+    cache them for GUILDNAME_TTL. Guilds that cannot be read (e.g. ones
+    since left) are missing from the result.
+    """
+    ahbt = hbt.aio()
+    groups = api.gather(*[getattr(ahbt.groups, gid)() for gid in ids])
+    names = dict((gid, group['name']) for gid, group in zip(ids, groups)
+                 if isinstance(group, dict) and 'name' in group)
+    if names:
+        cache.update(SECTION_CACHE_GUILDNAMES, names, ttl=GUILDNAME_TTL)
+    return names
+
+
+def get_members(hbt, party):
+    """
+    Profiles of everyone in `party`, in one request where the server
+    lists members with all their public fields, else one per member.
+    """
+    group = getattr(hbt.groups, party['id'])
+    members = group(_one='members', includeAllPublicFields='true')
+    if all('stats' in member for member in members):
+        return members
+    return load_members(hbt, [i['id'] for i in members])
 
 def stat_down(hbt, user, stat, amount):
     stats = user.get('stats', [])
@@ -563,7 +681,7 @@ def party_hp_down_ten(auth, hbt, user, party=None, myself=False):
     if party == None:
         party = hbt.groups.party()
     if not myself:
-        members = get_members(auth, party)
+        members = get_members(hbt, party)
     else:
         members = [user]
     for member in members:
@@ -578,7 +696,7 @@ def party_hp_down_ten(auth, hbt, user, party=None, myself=False):
 
 def hp_down_ten(auth, hbt, user):
     # Do a party check, but just a party of myself.
-    party_hp_down_ten(hbt, user, myself=True)
+    party_hp_down_ten(auth, hbt, user, myself=True)
 
 
 def set_checklists_status(auth, args):
@@ -611,13 +729,19 @@ def isChecklistItem(tid):
         logging.debug('None')
         return None
 
-def group_user_status(quest_data, auth, hbt):
+def group_user_status(quest_data, auth, hbt, party=None):
     groupUserStatus = {}
     groupUserStatus['users'] = {}
     groupUserStatus['queststatus'] = quest_data['active']
-    for user in quest_data['members'].keys():
+    users = list(quest_data['members'].keys())
+    # quest members are party members, all listed in one go
+    known = dict((member['id'], member) for member in
+                 (get_members(hbt, party) if party else []))
+    missing = [user for user in users if user not in known]
+    known.update(zip(missing, load_members(hbt, missing)))
+    members = [known[user] for user in users]
+    for user, member in zip(users, members):
         groupUserStatus['users'][user] = {}
-        member = getattr(hbt.members, user)()
         groupUserStatus.setdefault('longestname', 1)
         if len(member['profile']['name']) > groupUserStatus['longestname']:
                 groupUserStatus['longestname'] = len(member['profile']['name'])
@@ -642,6 +766,10 @@ def group_user_status(quest_data, auth, hbt):
 
 
 def print_gus(groupUserStatus, len_ljust):
+    import dateutil.parser
+    import humanize
+    import pytz
+
     len_ljust += 1
     headLine = ' '.rjust(len_ljust, ' ')
     headLine += 'Name'.ljust(groupUserStatus['longestname'] + 1)
@@ -668,37 +796,35 @@ def print_gus(groupUserStatus, len_ljust):
         userLine += (str(int(user['mp'])) + '/' + str(user['maxMP'])).ljust(8, ' ')
         print(userLine)
 
-def get_quest_info(hbt, quest_key):
+def get_quest_info(content, cache, quest_key):
 # we're on a new quest, update quest key
     logging.info('Updating quest information...')
-    content = hbt.content()
-    quest_type = ''
+    quest = content.get('quests', quest_key, {})
+    qt = ''
     quest_max = '-1'
-    quest_title = content['quests'][quest_key]['text']
+    quest_title = quest.get('text', quest_key)
 
     # if there's a content/quests/<quest_key/collect,
     # then drill into .../collect/<whatever>/count and
     # .../collect/<whatever>/text and get those values
-    if content.get('quests', {}).get(quest_key,
-                             {}).get('collect'):
+    if quest.get('collect'):
        logging.debug("\tOn a collection type of quest")
        qt = 'collect'
-       clct = list(content['quests'][quest_key][qt].values())[0]
+       clct = list(quest[qt].values())[0]
        quest_max = clct['count']
        # else if it's a boss, then hit up
        # content/quests/<quest_key>/boss/hp
-    elif content.get('quests', {}).get(quest_key,
-                                 {}).get('boss'):
+    elif quest.get('boss'):
         logging.debug("\tOn a boss/hp type of quest")
         qt = 'hp'
-        quest_max = content['quests'][quest_key]['boss'][qt]
+        quest_max = quest['boss'][qt]
 
         # store repr of quest info from /content
-    cache = update_quest_cache(CACHE_CONF,
-                               quest_key=str(quest_key),
-                               quest_type=str(qt),
-                               quest_max=str(quest_max),
-                               quest_title=str(quest_title))
+    return cache.update(SECTION_CACHE_QUEST,
+                        {'quest_key': quest_key,
+                         'quest_type': qt,
+                         'quest_max': quest_max,
+                         'quest_title': quest_title})
 
 def chatID(party, user, guilds):
     message = ('Invalid ID - must be 0 for party or > 0.\n'
@@ -725,6 +851,8 @@ def chatID(party, user, guilds):
         sys.exit(1)
 
 def printChatMessages(messages, messageNum):
+    import humanize
+
     messages = sorted(messages, key=lambda k: k['timestamp']) 
     messages = messages[-messageNum:]
     for message in messages:
@@ -736,12 +864,89 @@ def printChatMessages(messages, messageNum):
                                 textwrap.fill(message['text'], width=80)))
 
 
-def cli():
+def connect(auth, settings):
+    """
+    The API client and local stores commands work with, as a dict. Built
+    once per run, or once per `habitica daemon` and kept warm across the
+    commands it serves.
+    """
+    # one connection pool for all requests
+    session = api.new_session(pool_size=settings['pool-size'],
+                              keep_alive=bool(settings['keep-alive']),
+                              gzip=bool(settings['gzip']),
+                              timeout=settings['timeout'])
+    limiter = api.RateLimiter(concurrency=settings['concurrency'])
+    # identical GETs within a command (or `memo-window` seconds) share
+    # one request
+    memo = api.Memo(window=settings['memo-window'])
+    # every request as a debug log line, and in `trace-file` if set
+    tracer = trace.Tracer([trace.LogSink()])
+    if settings.get('trace-file'):
+        tracer.add(trace.FileSink(os.path.expanduser(settings['trace-file'])))
+    hbt = api.Habitica(auth=auth, session=session, limiter=limiter,
+                       memo=memo, tracer=tracer)
+
+    # game catalog, kept on disk and only downloaded when it changes;
+    # the user document, fetched only as far as each command needs it;
+    # task lists as last printed, so tasks can be scored by number;
+    # quest details and guild names
+    return {'auth': auth,
+            'settings': settings,
+            'hbt': hbt,
+            'content': ContentStore(hbt, CONTENT_DB),
+            'state': UserState(hbt),
+            'index': TaskIndex(TASKS_DB),
+            'cache': Cache(CACHE_DB)}
+
+
+def dispatch(args, warm=None):
+    """Run the command parsed into `args`; see cli()."""
+    # find the command, loading only its own module
+    run = commands.handler(args['<command>'])
+    if run is None:
+        print("Unknown command '%s'" % (args['<command>']))
+        sys.exit(1)
+
+    # Set up auth and settings, api service and local stores, unless a
+    # daemon has them ready (or the command does not need the server)
+    if warm is None:
+        if args['<command>'] in commands.OFFLINE:
+            warm = {'auth': load_auth(AUTH_CONF)}
+        else:
+            warm = connect(load_auth(AUTH_CONF),
+                           load_settings(SETTINGS_CONF))
+    auth = warm['auth']
+
+    # Flag checklists as on if true in the config
+    set_checklists_status(auth, args)
+
+    ctx = dict(warm, args=args, warm=warm,
+               fields=USER_FIELDS.get(args['<command>']))
+    # requests, cache lookups and timings, added up in `metrics-file`
+    path = warm.get('settings', {}).get('metrics-file')
+    if path and 'hbt' in warm:
+        from . import metrics
+        run = metrics.recorded(run, warm, args['<command>'],
+                               os.path.expanduser(path))
+    if not args['--trace'] or 'hbt' not in warm:
+        run(ctx)
+        return
+
+    # waterfall of this command's requests, after its own output
+    waterfall = warm['hbt'].tracer.add(trace.Waterfall())
+    try:
+        run(ctx)
+    finally:
+        warm['hbt'].tracer.remove(waterfall)
+        sys.stderr.write(waterfall.render() + '\n')
+
+
+def cli(argv=None, warm=None):
     """Habitica command-line interface.
 
   Usage: habitica [--version] [--help]
                   <command> [<args>...] [--difficulty=<d>]
-                  [--verbose | --debug]
+                  [--verbose | --debug] [--trace] [--profile=<file>]
 
   Options:
     -h --help         Show this screen
@@ -749,6 +954,10 @@ def cli():
     --difficulty=<d>  (easy | medium | hard) [default: easy]
     --verbose         Show some logging information
     --debug           Some all logging information
+    --trace           Show the requests the command sent, as a timeline
+    --profile=<file>  Profile the command into <file> (collapsed stacks
+                      if it ends in .folded, else pstats), and show
+                      where the time went
 
   The habitica commands are:
     status                     Show HP, XP, GP, and more
@@ -772,6 +981,7 @@ def cli():
     sell                       Show list of all potions
     sell all [<max>]           Sell all hatching potions (up to <max> many)
     sell <type> [<max>]        Sell all <type> hatching potions (up to <max>)
+    collection                 Show collected pets and mounts, and what's left
     cast                       Show list of castable spells
     cast <spell> [<id>]        Cast <spell> (on task <id>)
     cast smart <spell> [<id>]  After smart-check, cast <spell> (on task <id>)
@@ -793,14 +1003,20 @@ def cli():
     chat show [<id>] [<num>]   Shows last <num> messages from chat <id>
                                (defaults: ID 0, num 5)
     chat send <id> "<Message>" Sends Message to chat ID 
+    daemon                     Serve commands from a warm background process
+    daemon stop                Stop the background process
+    metrics                    Show the totals in the metrics-file
+    metrics serve [<port>]     Serve them on http://localhost:<port>/metrics
 
   For `habits up|down`, `dailies done|undo`, and `todos done`, you can pass
   one or more <task-id> parameters, using either comma-separated lists or
-  ranges or both. For example, `todos done 1,3,6-9,11`.
+  ranges or both. For example, `todos done 1,3,6-9,11`. For `dailies` and
+  `todos`, a checklist item is its task number and letter, e.g. `4a`.
+  Several tasks are scored in a single request.
   """
 
     # set up args
-    args = docopt(cli.__doc__, version=VERSION)
+    args = docopt(cli.__doc__, argv=argv, version=VERSION)
 
     # set up logging
     if args['--verbose']:
@@ -811,994 +1027,10 @@ def cli():
     logging.debug('Command line args: {%s}' %
                   ', '.join("'%s': '%s'" % (k, v) for k, v in args.items()))
 
-    # list of kinds of pets/potions (disregarding Magic Potion ones)
-    kinds = [ 'Base', 'CottonCandyBlue', 'CottonCandyPink', 'Golden',
-              'White', 'Red', 'Shade', 'Skeleton', 'Desert', 'Zombie' ]
-
-    # Set up auth
-    auth = load_auth(AUTH_CONF)
-
-    # Prepare cache
-    cache = load_cache(CACHE_CONF)
-
-    # Load settings
-    settings = load_settings(SETTINGS_CONF)
-
-    # instantiate api service
-    hbt = api.Habitica(auth=auth)
-
-    # Flag checklists as on if true in the config
-    set_checklists_status(auth, args)
-
-    # GET server status (v3 ok)
-    if args['<command>'] == 'server':
-        server = hbt.status()
-        if server['status'] == 'up':
-            print('Habitica server is up')
-        else:
-            print('Habitica server down... or your computer cannot connect')
-
-    # open HABITICA_TASKS_PAGE (v3 ok)
-    elif args['<command>'] == 'home':
-        home_url = '%s%s' % (auth['url'], HABITICA_TASKS_PAGE)
-        print('Opening %s' % home_url)
-        open_new_tab(home_url)
-
-    # GET item lists (v3 ok)
-    elif args['<command>'] == 'item':
-        user = hbt.user()
-        do_item_enumerate(user, args['<args>'])
-
-    # Feed all possible animals (v3 ok)
-    elif args['<command>'] == 'feed':
-        feeding = {
-                    'Saddle':           'ignore',
-                    'Meat':             'Base',
-                    'CottonCandyBlue':  'CottonCandyBlue',
-                    'CottonCandyPink':  'CottonCandyPink',
-                    'Honey':            'Golden',
-                    'Milk':             'White',
-                    'Strawberry':       'Red',
-                    'Chocolate':        'Shade',
-                    'Fish':             'Skeleton',
-                    'Potatoe':          'Desert',
-                    'RottenMeat':       'Zombie',
-                  }
-
-        user = hbt.user()
-        refreshed = True
-
-        attempted_foods = set()
-        fed_foods = set()
-
-        while refreshed:
-            refreshed = False
-            items = user.get('items', [])
-            foods = items['food']
-            pets = items['pets']
-            mounts = items['mounts']
-
-            magic_pets = []
-            for pet in pets:
-                if pet.split('-')[1] in ['Spooky', 'Peppermint', 'Floral',
-                        'Thunderstorm', 'Ghost']:
-                    magic_pets.append(pet)
-
-            for food in foods:
-                # Handle seasonal foods that encode matching pet in name.
-                if '_' in food:
-                    best = food.split('_',1)[1]
-                    if not food in feeding:
-                        feeding[food] = best
-
-                # Skip foods we don't have any of.
-                if items['food'][food] <= 0:
-                    continue
-
-                # Find best pet to feed to.
-                suffix = feeding.get(food, None)
-                if suffix == None:
-                    print("Unknown food: %s" % (food))
-                    continue
-                if suffix == 'ignore':
-                    continue
-
-                # Track attempted foods
-                attempted_foods.add(food)
-
-                mouth = find_pet_to_feed(pets, items, suffix, True)
-
-                # If we have food but its not ideal for pet, give it to a
-                # magic pet which will eat anything.
-                if not mouth:
-                    mouth = find_pet_to_feed(magic_pets, items, suffix, False)
-
-                if mouth:
-                    before = pets[mouth]
-
-                    # if the less than ideal food is fed to a pet it's satiety
-                    # increases by 1 not 5, so find the multiple of five.
-                    satiety = int(5 * round(pets[mouth]/5))
-                    # 50 is "fully fed and now a mount", 5 is best food growth
-                    need_bites = bites = (50 - satiety) / 5
-                    if items['food'][food] < bites:
-                        bites = items['food'][food]
-
-                    # Report how many more bites are needed before a mount.
-                    moar = ""
-                    if need_bites > bites:
-                        need_bites -= bites
-                        moar = " (needs %d more serving%s)" % (need_bites,
-                                "" if need_bites == 1 else "s")
-
-                    fed_foods.add(food)
-                    print("Feeding %d %s to %s%s" % (bites, nice_name(food),
-                                                   nice_name(mouth), moar))
-                    before_user = user
-                    feeder = api.Habitica(auth=auth, resource="user", aspect="feed")
-                    for i in range(int(bites)):
-                        feeder(_method='post', _one=mouth, _two=food)
-                    user = hbt.user()
-                    show_delta(hbt, before_user, user)
-                    refreshed = True
-                    items = user.get('items', [])
-                    pets = items['pets']
-                    if pets[mouth] == before:
-                        raise ValueError("failed to feed %s" % (mouth))
-                    break
-
-        for food in list(attempted_foods - fed_foods):
-            print("Nobody wants to eat %i %s" % (items['food'][food], nice_name(food)))
-
-    # Hatch all possible eggs (v3 ok)
-    elif args['<command>'] == 'hatch':
-        def hatch_refresh(user):
-            items = user.get('items', [])
-            pets = items['pets']
-            mounts = items['mounts']
-            eggs = items['eggs']
-            potions = items['hatchingPotions']
-            return (items, pets, mounts, eggs, potions)
-
-        user = hbt.user()
-        refreshed = True
-
-        while refreshed:
-            refreshed = False
-            items, pets, mounts, eggs, potions = hatch_refresh(user)
-
-            for egg in eggs:
-                # Skip eggs we don't have.
-                if eggs[egg] == 0:
-                    continue
-
-                creatures = []
-                for kind in kinds:
-                    creatures.append('%s-%s' % (egg, kind))
-
-                for creature in creatures:
-                    # This pet is already hatched.
-                    if pets.get(creature, 0) > 0:
-                        continue
-
-                    # We ran out of eggs.
-                    if eggs[egg] == 0:
-                        continue
-
-                    potion = creature.split('-')[-1]
-                    # Missing the potion needed for this creature.
-                    if potion not in potions or potions[potion] < 1:
-                        print("Want to hatch a %s %s, but missing potion" %
-                              (potion, egg))
-                        continue
-
-                    print("Hatching a %s %s" % (nice_name(potion),
-                                                nice_name(egg)))
-                    before_user = user
-                    hatcher = api.Habitica(auth=auth, resource="user", aspect="hatch")
-                    hatcher(_method='post', _one=egg, _two=potion)
-                    user = hbt.user()
-                    show_delta(hbt, before_user, user)
-                    refreshed = True
-                    items, pets, mounts, eggs, potions = hatch_refresh(user)
-                    if pets.get(creature, 0) != 5:
-                        raise ValueError("failed to hatch %s" % (creature))
-
-        # How many eggs do we need for the future?
-        tosell = []
-        for egg in eggs:
-            need_pets = []
-            need_mounts = []
-
-            # Don't bother reporting about eggs we have none of.
-            if eggs[egg] == 0:
-                continue
-
-            creatures = []
-            for kind in kinds:
-                creatures.append('%s-%s' % (egg, kind))
-
-            for creature in creatures:
-                if mounts.get(creature, 0) == 0:
-                    name = nice_name(creature.split('-',1)[1])
-                    need_mounts.append(name)
-                if pets.get(creature, 0) < 5:
-                    need_pets.append(creature.split('-',1)[1])
-
-            report = ""
-            if len(need_pets):
-                report += "%d Pet%s (%s)" % (len(need_pets),
-                          "" if len(need_pets) == 1 else "s",
-                          ", ".join(need_pets))
-            if len(need_mounts):
-                if len(report):
-                    report += ", "
-                report += "%d Mount%s (%s)" % (len(need_mounts),
-                          "" if len(need_mounts) == 1 else "s",
-                          ", ".join(need_mounts))
-            if settings['eggs-extra']:
-                if len(report):
-                    report += ", "
-                report += "%d extra" % (settings['eggs-extra'])
-
-            need = len(need_pets) + len(need_mounts) + settings['eggs-extra']
-            if need and need != settings['eggs-extra']:
-                print("%s egg: Need %d for %s" % (nice_name(egg), need, report))
-
-            # Sell unneeded eggs.
-            sell = eggs[egg] - need
-            if sell > 0:
-                before = eggs[egg]
-                print("Selling %d %s egg%s" % (sell, nice_name(egg),
-                                               "" if sell == 1 else "s"))
-                for i in range(sell):
-                    tosell.append(egg)
-
-        if len(tosell) > 0:
-            before_user = user
-            seller = api.Habitica(auth=auth, resource="user", aspect="sell")
-            for i in range(len(tosell)):
-                seller(_method='post', _one='eggs', _two=tosell[i])
-            user = hbt.user()
-            show_delta(hbt, before_user, user)
-
-    # Sell all unneeded hatching potions (v3 ok)
-    elif args['<command>'] == 'sell':
-        sell_reserved = settings['sell-reserved']
-        sell_max = settings['sell-max']
-        if "max" in args['<args>']:
-            arg = args['<args>'].index("max")
-            name = args['<args>'].pop(arg)
-            sell_max = int(args['<args>'].pop(arg))
-
-        user = hbt.user()
-
-        selling = args['<args>']
-        if len(selling) == 0:
-            do_item_enumerate(user, ['hatchingPotions'], ordered=True)
-            sys.exit(0)
-
-        if selling == ['all']:
-            selling = kinds
-
-        tosell = []
-        items = user.get('items', [])
-        stats = user.get('stats', [])
-        potions = items['hatchingPotions']
-        for sell in selling:
-            if sell not in kinds:
-                print("\"%s\" isn't a valid kind of potion." % (sell))
-                sys.exit(1)
-            if sell not in potions:
-                print("You don't have any \"%s\"." % (sell))
-                continue
-
-            # Only sell potions above "sell-reserved" setting.
-            if sell_reserved != -1:
-                if potions[sell] < sell_reserved:
-                    continue
-                potions[sell] -= sell_reserved
-            # Don't sell more than "sell-max" setting.
-            if sell_max != -1 and potions[sell] > sell_max:
-                potions[sell] = sell_max
-
-            # Sell potions!
-            if potions[sell] > 0:
-                print("Selling %d %s potion%s" % (potions[sell],
-                        nice_name(sell),
-                        "" if potions[sell] == 1 else "s"))
-                for i in range(potions[sell]):
-                    tosell.append(sell)
-        if len(tosell):
-            before_user = user
-            seller = api.Habitica(auth=auth, resource="user", aspect="sell")
-            for i in range(len(tosell)):
-                seller(_method='post', _one='hatchingPotions', _two=tosell[i])
-            user = hbt.user()
-            show_delta(hbt, before_user, user)
-
-    # dump raw json for user (v3 ok)
-    elif args['<command>'] == 'dump':
-        user = None
-        party = None
-        items = None
-        report = {}
-        wanted = args['<args>']
-        if len(wanted) == 0:
-            wanted = ['user', 'party', 'members']
-
-        # Fetch stuff we need for multiple targets.
-        if 'user' in wanted or 'food' in wanted or 'pets' in wanted or 'mounts' in wanted:
-            user = hbt.user()
-        if 'food' in wanted or 'pets' in wanted or 'mounts' in wanted:
-            items = user.get('items', [])
-        if 'party' in wanted or 'members' in wanted:
-            party = hbt.groups.party()
-
-        # Add report details.
-        if 'user' in wanted:
-            report['user'] = user
-        if 'party' in wanted:
-            report['party'] = party
-        if 'members' in wanted:
-            group = api.Habitica(auth=auth, resource="groups", aspect=party['id'])
-            report['members'] = group(_one='members')
-        if 'food' in wanted:
-            report['food'] = items['food']
-        if 'pets' in wanted:
-            report['pets'] = items['pets']
-        if 'mounts' in wanted:
-            report['mounts'] = items['mounts']
-        if 'content' in wanted:
-            report['content'] = hbt.content()
-
-        # Dump the report.
-        print(json.dumps(report, indent=4, sort_keys=True))
-
-    # cast/skill on task/self/party (v3 ok)
-    elif args['<command>'] == 'cast':
-        user = hbt.user()
-        stats = user.get('stats', '')
-        uclass = stats['class']
-
-        # class: {spell: target}
-        spells = {'warrior': {'valorousPresence': 'party',
-                              'defensiveStance': 'self',
-                              'smash': 'task',
-                              'intimidate': 'party'},
-                  'rogue': {'pickPocket': 'task',
-                            'backStab': 'task',
-                            'toolsOfTrade': 'party',
-                            'stealth': 'self'},
-                  'wizard': {'fireball': 'task',
-                             'mpheal': 'party',
-                             'earth': 'party',
-                             'frost': 'self'
-                            },
-                  'healer': {'heal': 'self',
-                             'healAll': 'party',
-                             'protectAura': 'party',
-                             'brightness': 'self'
-                            }
-                 }
-
-        smart = {'heal': hp_down_ten,
-                 'healAll': party_hp_down_ten,
-                }
-
-        if len(args['<args>']) == 0:
-            for spell in spells[uclass]:
-                print("%s (%s)" % (spell, spells[uclass][spell]))
-            sys.exit(0)
-
-        spell = args['<args>'][0]
-
-        precast = None
-        if spell == "smart":
-            spell = args['<args>'].pop(1)
-            if spell not in smart:
-                print("There's no smart way to cast that.")
-                sys.exit(1)
-            precast = smart[spell]
-
-        if len(args['<args>']) == 2:
-            task = args['<args>'][1]
-        else:
-            task = ''
-
-        if spell not in spells[uclass]:
-            print("That isn't a spell you know.")
-            sys.exit(1)
-        target = spells[uclass][spell]
-        if target == 'task' and not task:
-            print("You need to provide a task id to target.")
-            sys.exit(1)
-
-        # Do some smart checks before casting?
-        if precast != None:
-            precast(auth, hbt, user)
-
-        # Report casting.
-        msg = "Casting %s" % (spell)
-        if target == 'party':
-            msg += " on the party"
-        elif target == 'task':
-            msg += " on task %s" % (task)
-        msg += "."
-        print(msg)
-
-        before_user = user
-        charclass = api.Habitica(auth=auth, resource="user", aspect="class")
-        if task != '':
-            charclass(_method='post', _one='cast', _two=spell, targetId=task)
-        else:
-            charclass(_method='post', _one='cast', _two=spell)
-        user = hbt.user()
-        show_delta(hbt, before_user, user)
-
-    # buy as many gems as possible (v3 ok)
-    elif args['<command>'] == 'gems':
-        user = hbt.user()
-        before_user = user
-        # base of 25 + (5 * (months subscribed / 3)) which seems to be
-        # gemCapExtra
-        # c.f. http://habitica.wikia.com/wiki/Gems
-        gem_buy_limit = 25 + int(user['purchased']['plan']['consecutive']['gemCapExtra'])
-        gems = gem_buy_limit - int(user['purchased']['plan']['gemsBought'])
-
-        purchaser = api.Habitica(auth=auth, resource="user", aspect="purchase")
-        for i in range(gems):
-            purchaser(_method='post', _one='gems', _two='gem')
-        user = hbt.user()
-        show_delta(hbt, before_user, user)
-
-    elif args['<command>'] == 'armoire':
-        user = hbt.user()
-        before_user = user
-        purchase = api.Habitica(auth=auth, resource="user",
-                                aspect="buy-armoire")
-        received = purchase(_method='post')
-        if 'dropText' in received['armoire']:
-            print('Got ' + received['armoire']['dropText'] + '!')
-        show_delta(hbt, before_user, user)
-
-    #Quest manipulations
-    elif args['<command>'] == 'quest':
-        # if on a quest with the party, grab quest info
-        user = hbt.user()
-        group = hbt.groups(type='party')
-        party_id = group[0]['id']
-        quest_data = getattr(hbt.groups, party_id)()['quest']
-        if quest_data:
-            quest_key = quest_data['key']
-
-            if cache.get(SECTION_CACHE_QUEST, 'quest_key') != quest_key:
-                get_quest_info(hbt, quest_key)
-
-            # now we use /party and quest_type to figure out our progress!
-            quest_type = cache.get(SECTION_CACHE_QUEST, 'quest_type')
-            if quest_type == 'collect' and quest_data['active']:
-                qp_tmp = quest_data['progress']['collect']
-                if type(qp_tmp) is not dict:
-                    quest_progress = qp_tmp.values()[0]
-                else:
-                    quest_progress = list(qp_tmp.values())[0]
-            elif quest_data['active']:
-                quest_progress = quest_data['progress']['hp']
-            else:
-                quest_progress = cache.get(SECTION_CACHE_QUEST, 'quest_max')
-
-            if quest_data['active']:
-                quest = '"%s" - %s/%s (-%s)' % (
-                        cache.get(SECTION_CACHE_QUEST, 'quest_title'),
-                        str(int(quest_progress)),
-                        cache.get(SECTION_CACHE_QUEST, 'quest_max'),
-                        str(int(user['party']['quest']['progress']['up'])))
-                            
-            else:
-                quest = '%s "%s"' % (
-                            'Preparing',
-                            cache.get(SECTION_CACHE_QUEST, 'quest_title'))
-
-            groupUserStatus = group_user_status(quest_data, auth, hbt)
-
-            len_ljust = 6
-            print('%s %s' % ('Quest:'.rjust(len_ljust, ' '), quest))
-            print_gus(groupUserStatus, len_ljust)
-
-            if 'forcestart' in args['<args>']:
-                if quest_data['active']:
-                    print('Can\'t force-start: Quest is already active.')
-                else:
-                    response = input('\nDo you really want to start the quest now?'
-                           '\nOnly members who accepted the invitation will take part! (y/N)\n')
-                    if response.capitalize() != 'Y':
-                        print('Aborting force start.')
-                    else:
-                        party = api.Habitica(auth=auth, resource='groups', aspect='party')
-                        quest_data = party(_method='post', _one='quests', _two='force-start')
-                        if quest_data == None:
-                            print('Could not force-start the quest!')
-
-            if 'accept' in args['<args>']:
-                if quest_data['active']:
-                    print('Can\'t accept: Quest is already active.')
-                else:
-                    party = api.Habitica(auth=auth, resource='groups', aspect='party')
-                    quest_data = party(_method='post', _one='quests', _two='accept')
-                    if quest_data == None:
-                        print('Error accepting the quest! (already accepted?)')
-                    else:
-                        print('Accepted quest invitation!')
-
-    # Select a pet or mount (v3 ok)
-    elif args['<command>'] == 'ride' or args['<command>'] == 'walk':
-        if args['<command>'] == 'ride':
-            item_type = 'mounts'
-            current = 'currentMount'
-            name = 'mount'
-            verb = 'riding'
-        else:
-            item_type = 'pets'
-            current = 'currentPet'
-            name = 'pet'
-            verb = 'walking with'
-
-        user = hbt.user()
-        items = user.get('items', [])
-        animals = items[item_type]
-
-        if len(args['<args>']) == 0:
-            do_item_enumerate(user, [item_type], ordered=True, pretty=False)
-            return
-
-        desired = "".join(args['<args>'])
-
-        if desired.startswith('rand'):
-            active = items.get(current, '')
-            if active and len(animals) > 1:
-                animals.pop(active)
-
-            choice = random.randrange(0, len(animals)-1)
-            chosen = animals.keys()[choice]
-        else:
-            if desired not in animals:
-                print("You don't have a '%s' %s!" % (desired, name))
-                sys.exit(1)
-            chosen = desired
-
-        equiper = batch = api.Habitica(auth=auth, resource="user", aspect="equip")
-        equiper(_method='post', _one=name, _two=chosen)
-        print("You are now %s a %s" % (verb, nice_name(chosen)))
-
-    # equip a set of equipment (v3 ok)
-    elif args['<command>'] == 'equip':
-        equipping = args['<args>']
-        user = hbt.user()
-        before_user = user
-        items = user.get('items', [])
-        equipped = items['gear']['equipped']
-
-        equiper = batch = api.Habitica(auth=auth, resource="user", aspect="equip")
-        for equipment in equipping:
-            equiper(_method='post', _one='equipped', _two=equipment)
-        user = hbt.user()
-        show_delta(hbt, before_user, user)
-
-    # sleep/wake up (v3 ok)
-    elif args['<command>'] == 'sleep' or args['<command>'] == 'arise':
-        user = hbt.user()
-        intent = args['<command>']
-        sleeping = user['preferences']['sleep']
-        if intent == 'sleep' and sleeping:
-            print("You are already resting.")
-            sys.exit(1)
-        if not sleeping and intent == 'arise':
-            print("You are already checked out.")
-            sys.exit(1)
-
-        sleeper = api.Habitica(auth=auth, resource="user", aspect="sleep")
-        sleeper(_method='post')
-
-    # GET user status (v3 ok)
-    elif args['<command>'] == 'status':
-
-        # gather status info
-        user = hbt.user()
-        guilds = user.get('guilds')
-        party = hbt.groups.party()
-        stats = user.get('stats', '')
-        group = hbt.groups(type='party')
-        items = user.get('items', '')
-        sleeping = user['preferences']['sleep']
-        food_count = sum(items['food'].values())
-        newMessages = user.get('newMessages', '')
-        yesterdayMessage = 'Beware! You are currently recording yesterday\'s activity! Please use the dailies command!'
-        # gather quest progress information (yes, janky. the API
-        # doesn't make this stat particularly easy to grab...).
-        # because hitting /content downloads a crapload of stuff, we
-        # cache info about the current quest in cache.
-        quest = 'Not currently on a quest'
-        if (party is not None and
-                party.get('quest', '')): 
-
-            quest_key = party['quest']['key']
-
-            if cache.get(SECTION_CACHE_QUEST, 'quest_key') != quest_key:
-                get_quest_info(hbt, quest_key)
- 
-            # now we use /party and quest_type to figure out our progress!
-            quest_type = cache.get(SECTION_CACHE_QUEST, 'quest_type')
-            if quest_type == 'collect' and party['quest']['active']:
-                qp_tmp = party['quest']['progress']['collect']
-                if type(qp_tmp) is not dict:
-                    quest_progress = qp_tmp.values()[0]
-                else:
-                    quest_progress = list(qp_tmp.values())[0]
-            elif party['quest']['active']:
-                quest_progress = party['quest']['progress']['hp']
-            else:
-                quest_progress = cache.get(SECTION_CACHE_QUEST, 'quest_max')
-
-            if party['quest']['active']:
-                quest = '"%s" - %s/%s (-%s)' % (
-                            cache.get(SECTION_CACHE_QUEST, 'quest_title'),
-                            str(int(quest_progress)),
-                            cache.get(SECTION_CACHE_QUEST, 'quest_max'),
-                            str(int(user['party']['quest']['progress']['up'])))
-                            
-            else:
-                quest = '%s "%s"' % (
-                            'Preparing',
-                            cache.get(SECTION_CACHE_QUEST, 'quest_title'))
-
-
-        egg_count = sum(items['eggs'].values())
-        potion_count = sum(items['hatchingPotions'].values())
-
-        # prepare and print status strings
-        title = user['profile']['name']
-        title += ' - Level %d %s' % (stats['lvl'], stats['class'].capitalize())
-        if sleeping:
-            title += ' (zZZz)'
-        health = '%d/%d' % (stats['hp'], stats['maxHealth'])
-        xp = '%d/%d' % (int(stats['exp']), stats['toNextLevel'])
-        mana = '%d/%d' % (int(stats['mp']), stats['maxMP'])
-        currency = get_currency(stats.get('gp', 0), user.get('balance', "0"))
-        currentPet = items.get('currentPet', '')
-        if not currentPet:
-            currentPet = DEFAULT_PET
-        pet = '%s (%d food items)' % (currentPet, food_count)
-        pet = '%s' % (currentPet)
-        perishables = '%d serving%s, %d egg%s, %d potion%s' % \
-                      (food_count, "" if food_count == 1 else "s",
-                       egg_count, "" if egg_count == 1 else "s",
-                       potion_count,  "" if potion_count == 1 else "s")
-        mount = items.get('currentMount', '')
-        if not mount:
-            mount = DEFAULT_MOUNT
-
-        members = get_members(auth, party)
-        summary_items = ('health', 'xp', 'mana', 'currency', 'perishables',
-                         'quest', 'pet', 'mount', 'group')
-        len_ljust = max(map(len, summary_items)) + 1
-
-        groupUserStatus = {}
-        groupUserStatus['users'] = {}
-        for member in members:
-            name = member['profile']['name']
-            groupUserStatus['users'][name] = {}
-            groupUserStatus.setdefault('longestname', 1)
-            if len(member['profile']['name']) > groupUserStatus['longestname']:
-                    groupUserStatus['longestname'] = len(member['profile']['name'])
-            groupUserStatus['users'][name]['name'] = member['profile']['name']
-            if member['preferences']['sleep']:
-                    groupUserStatus['users'][name]['sleep'] = 'sleeping'
-            else:
-                    groupUserStatus['users'][name]['sleep'] = 'active'
-            groupUserStatus['users'][name]['lastactive'] = member['auth']['timestamps']['loggedin']
-            stats = ['hp', 'maxHealth', 'mp', 'maxMP', 'class']
-            for stat in stats:
-                groupUserStatus['users'][name][stat] = member['stats'][stat]
-            
-        groupUserStatus['users'] = OrderedDict(sorted(groupUserStatus['users'].items(), key=lambda t: t[1]['lastactive']))
-
-        messages = 'No new messages.'
-        if newMessages:
-            messages = 'New messages in '
-            for gid, message in newMessages.items():
-                if gid != party['id']:
-                    messages = messages + message['name'] + '(' + str(guilds.index(gid)+1) + '), '
-                else:
-                    messages = messages + message['name'] + '(0), '
-            messages = messages[:-2] + '!'
-
-        print('=' * len(title))
-        print(title)
-        print('=' * len(title))
-        print(textwrap.fill(messages, width=80))
-        print('-' * min(max(len(messages), len(title)), 80))
-        if user['needsCron']:
-            print(yesterdayMessage)
-            print('-' * max(len(yesterdayMessage), len(messages)))
-        print('%s %s' % ('Health:'.rjust(len_ljust, ' '), health))
-        print('%s %s' % ('XP:'.rjust(len_ljust, ' '), xp))
-        print('%s %s' % ('Mana:'.rjust(len_ljust, ' '), mana))
-        print('%s %s' % ('Currency:'.rjust(len_ljust, ' '), currency))
-        print('%s %s' % ('Perishables:'.rjust(len_ljust, ' '), perishables))
-        print('%s %s' % ('Pet:'.rjust(len_ljust, ' '), nice_name(pet)))
-        print('%s %s' % ('Mount:'.rjust(len_ljust, ' '), nice_name(mount)))
-        print('%s %s' % ('Quest:'.rjust(len_ljust, ' '), quest))
-        print('%s %s' % ('Group:'.rjust(len_ljust, ' '), group[0]['name']))
-
-        len_ljust += 1
-        headLine = ''.rjust(len_ljust, ' ')
-        headLine += 'Name'.ljust(groupUserStatus['longestname'] + 1)
-        headLine += 'Class'.ljust(9, ' ')
-        headLine += 'Status'.ljust(10, ' ')
-        headLine += 'Last login'.ljust(15, ' ')
-        headLine += 'Health'.ljust(8, ' ')
-        headLine += 'Mana'.ljust(8, ' ')
-        print(headLine)
-
-        print(' '.rjust(len_ljust, ' ') + '-' * (len(headLine) - len_ljust))
-
-        for user in groupUserStatus['users'].values():
-            userLine = ' '.rjust(len_ljust, ' ')
-            userLine += user['name'].ljust(groupUserStatus['longestname'] + 1)
-            userLine += user['class'].capitalize().ljust(9, ' ') 
-            userLine += user['sleep'].ljust(10, ' ')
-            userLine += humanize.naturaltime(datetime.datetime.now(pytz.utc) - dateutil.parser.parse(user['lastactive'])).ljust(15, ' ')
-            userLine += (str(int(user['hp'])) + '/' + str(user['maxHealth'])).ljust(8, ' ')
-            userLine += (str(int(user['mp'])) + '/' + str(user['maxMP'])).ljust(8, ' ')
-            print(userLine)
-
-
-
-    # GET/POST habits (v3 ok)
-    elif args['<command>'] == 'habits':
-        habits = hbt.tasks.user(type='habits')
-        direction = None
-        if 'up' in args['<args>']:
-            report = 'incremented'
-            direction = 'up'
-        elif 'down' in args['<args>']:
-            report = 'decremented'
-            direction = 'down'
-
-        if direction != None:
-            before_user = hbt.user()
-            tids = get_task_ids(args['<args>'][1:])
-            for tid in tids:
-                tval = habits[tid]['value']
-                habit = api.Habitica(auth=auth, resource="tasks", aspect=habits[tid]['id'])
-                habit(_method='post', _one='score', _two=direction)
-                print('%s habit \'%s\''
-                      % (report, habits[tid]['text'])) #.encode('utf8')))
-                if direction == 'up':
-                    habits[tid]['value'] = tval + (TASK_VALUE_BASE ** tval)
-                else:
-                    habits[tid]['value'] = tval - (TASK_VALUE_BASE ** tval)
-                #sleep(HABITICA_REQUEST_WAIT_TIME)
-            show_delta(hbt, before_user, hbt.user())
-
-        for i, task in enumerate(habits):
-            score = qualitative_task_score_from_value(task['value'])
-            print('[%s] %s %s' % (score, i + 1, task['text'])) #.encode('utf8')))
-
-    # GET/PUT tasks:daily (v3 ok)
-    elif args['<command>'] == 'dailies':
-        dailies = hbt.tasks.user(type='dailys')
-        direction = None
-        if 'done' in args['<args>']:
-            report = 'completed'
-            direction = 'up'
-        elif 'undo' in args['<args>']:
-            report = 'incomplete'
-            direction = 'down'
-
-        if direction != None:
-            before_user = hbt.user()
-#            tids = get_task_ids(args['<args>'][1:])
-            tids = args['<args>'][1:]  
-            for tid in tids:
-                checklistItem = isChecklistItem(tid)
-                if checklistItem == False:
-                    tid = int(tid) - 1
-                    daily = api.Habitica(auth=auth, resource="tasks", aspect=dailies[tid]['id'])
-                    daily(_method='post', _one='score', _two=direction)
-                    print('marked daily \'%s\' %s'
-                          % (dailies[tid]['text'], report)) #.encode('utf8'))) - for the first string
-                    if direction == 'up':
-                        dailies[tid]['completed'] = True
-                    else:
-                        dailies[tid]['completed'] = False
-                    #sleep(HABITICA_REQUEST_WAIT_TIME)
-                elif checklistItem == None:
-                    print('Could not parse argument \'%s\' - ignoring it!' % tid)
-                else:
-                    checklist = api.Habitica(auth=auth, resource="tasks", 
-                                             aspect=dailies[checklistItem[0]]['id'])
-                    print('toggled checklist item \'%s\' of daily \'%s\''
-                          % (dailies[checklistItem[0]]['checklist'][checklistItem[1]]['text'],
-                             dailies[checklistItem[0]]['text']))
-                    checklist(_method='post', _one='checklist',
-                        _two=dailies[checklistItem[0]]['checklist'][checklistItem[1]]['id'] + '/score')
-                    dailies[checklistItem[0]]['checklist'][checklistItem[1]]['completed'] = \
-                        not dailies[checklistItem[0]]['checklist'][checklistItem[1]]['completed']
-            user = hbt.user()
-            show_delta(hbt, before_user, user)
-
-        # avoid additional API call if possible
-        try:
-            user
-        except NameError:
-            user = hbt.user()
-
-        if user['needsCron']:
-            yesterdayMessage = ('You left these Dailies unchecked yesterday! '
-                                'Do you want to check off any of them now? When you\'re done, start a new '
-                                'day using \'habitica newday\'!')
-            print('-' * min(len(yesterdayMessage), 80))
-            print(textwrap.fill(yesterdayMessage, width=80))
-            print('-' * min(len(yesterdayMessage), 80))
-        print_task_list(dailies, needsCron=user['needsCron'])
-
-    # handle todo items (v3 ok)
-    elif args['<command>'] == 'todos':
-        todos = [e for e in hbt.tasks.user(type='todos')
-                 if not e['completed']]
-        if 'done' in args['<args>']:
-            before_user = hbt.user()
-#            tids = get_task_ids(args['<args>'][1:])
-            tids = args['<args>'][1:]
-            for tid in tids:
-                checklistItem = isChecklistItem(tid)
-                if checklistItem == False:
-                    todo = api.Habitica(auth=auth, resource="tasks", aspect=todos[tid]['id'])
-                    todo(_method='post', _one='score', _two='up')
-                    print('marked todo \'%s\' complete'
-                          % todos[tid]['text']) #.encode('utf8'))
-                    #sleep(HABITICA_REQUEST_WAIT_TIME)
-                    todos = updated_task_list(todos, tids)
-                elif checklistItem == None:
-                    print('Could not parse argument \'%s\' - ignoring it!' % tid)
-                else:
-                    checklist = api.Habitica(auth=auth, resource="tasks",
-                                             aspect=todos[checklistItem[0]]['id'])
-                    print('toggled checklist item \'%s\' of daily \'%s\''
-                          % (todos[checklistItem[0]]['checklist'][checklistItem[1]]['text'],
-                             todos[checklistItem[0]]['text']))
-                    checklist(_method='post', _one='checklist',
-                        _two=todos[checklistItem[0]]['checklist'][checklistItem[1]]['id'] + '/score')
-                    todos[checklistItem[0]]['checklist'][checklistItem[1]]['completed'] = \
-                        not todos[checklistItem[0]]['checklist'][checklistItem[1]]['completed']
-            show_delta(hbt, before_user, hbt.user())
-        elif 'get' in args['<args>']:
-            tids = get_task_ids(args['<args>'][1:])
-            for tid in tids:
-                todo = api.Habitica(auth=auth, resource="tasks", aspect=todos[tid]['id'])
-                obj = todo(_method='get')
-                print(json.dumps({'todo':obj}, indent=4, sort_keys=True))
-        elif 'add' in args['<args>']:
-            ttext = ' '.join(args['<args>'][1:])
-            hbt.tasks.user(type='todo',
-                           text=ttext,
-                           priority=PRIORITY[args['--difficulty']],
-                           _method='post')
-            todos.insert(0, {'completed': False, 'text': ttext, 'type': 'todo'})
-            print('added new todo \'%s\'' % ttext)
-        elif 'delete' in args['<args>']:
-            tids = get_task_ids(args['<args>'][1:])
-            for tid in tids:
-                todo = api.Habitica(auth=auth, resource="tasks", aspect=todos[tid]['id'])
-                todo(_method='delete')
-                print('deleted todo \'%s\''
-                      % todos[tid]['text'])
-                sleep(HABITICA_REQUEST_WAIT_TIME)
-            todos = updated_task_list(todos, tids)
-        print_task_list(todos)
-
-    elif args['<command>'] == 'chat':           
-        # Interface to party and guild chats
-        user = hbt.user()
-        guilds = user.get('guilds')
-        groups = hbt.groups.party()
-
-        # List available chat IDs to use with show and send args
-        # party is always 0
-        if args['<args>'][0] == 'list':
-            alert = '(!)' if groups['id'] in user['newMessages'].keys() else ''
-            print('0 %s %s' % (groups['name'], alert))
-
-            # use cache if possible and younger than 1 week
-            if 'timestamp' in cache['Guildnames'].keys() and \
-             time() - float(cache['Guildnames']['timestamp']) < 604800:
-                for i in range(len(guilds)):
-                    alert = '(!)' if guilds[i] in user['newMessages'].keys() else ''
-                    try:
-                        name = cache.get(SECTION_CACHE_GUILDNAMES, guilds[i])
-                    except configparser.NoOptionError:
-                        # name not yet cached
-                        name = getattr(hbt.groups, guilds[i])()['name']
-                        cache = update_guildnames_cache(CACHE_CONF,
-                                               number=guilds[i],
-                                               name=name)
-                    print('%d %s %s' % (i + 1, name, alert))
-
-            else:
-                cache = update_guildnames_cache(CACHE_CONF,
-                                          number='timestamp',
-                                          name=str(time()))
-                for i in range(len(guilds)):
-                    name = getattr(hbt.groups, guilds[i])()['name']
-                    cache = update_guildnames_cache(CACHE_CONF,
-                                               number=guilds[i],
-                                               name=name)
-                    print('%d %s %s' % (i + 1, name, alert))
-
-        # Print chat messages
-        elif args['<args>'][0] == 'show':
-            messageNum = 5
-            # Trying to catch all possible issues with user input
-            if len(args['<args>']) > 3 or len(args['<args>']) < 0: 
-                print('Invalid number of arguments! Must be group number '
-                      '+ (optional) number of messages to show.')
-                sys.exit(1)
-            # no arguments supplied: assuming party chat
-            elif len(args['<args>']) == 1:
-                party = user.get('party')['_id']
-            # use and validate number as chatID
-            elif len(args['<args>']) == 2:
-                party = chatID(args['<args>'][1], user, guilds)
-            # two numbers: validate both
-            else:
-                try:
-                    messageNum = int(args['<args>'][2])
-                except ValueError:
-                    print('Number of messages must be a number!')
-                    sys.exit(1)
-                party = chatID(args['<args>'][1], user, guilds)
-
-            # get messages and print them nicely, mark chat as seen
-            chat = api.Habitica(auth=auth, resource="groups", aspect=party)
-            messages = chat(_one='chat')
-            chat(_method='post', _one='chat', _two='seen')
-            printChatMessages(messages, messageNum)
-
-        # sending messages to chats defined by chatID
-        elif args['<args>'][0] == 'send':
-            # we need at least the command, chatID and a message
-            if len(args['<args>']) < 3:
-                print('Not enough arguments!')
-                sys.exit(1)
-            # chatID validates input on its own
-            party = chatID(args['<args>'][1], user, guilds)
-            chat = api.Habitica(auth=auth, resource="groups", aspect=party)
-            # use everything else as message
-            send = chat(message=args['<args>'][2:], _method='post', _one='chat')
-
-            # get and print messages after sending
-            messages = chat(_one='chat')
-            printChatMessages(messages, 5)
-            # mark chat as seen
-            chat(_method='post', _one='chat', _two='seen')
-
-    # moving to the next day
-    # needed to fully implement 'recording yesterday's activity'
-    elif args['<command>'] == 'newday':
-        user = hbt.user()
-        if user['needsCron']:
-            print('Moving to the current day ...')
-            newday = hbt.cron(data="none", _method="post")
-            show_delta(hbt, user, hbt.user())
-        else:
-            print('We\'re already working the current day. Doing nothing!')
-
-
-    else:
-        print("Unknown command '%s'" % (args['<command>']))
-        sys.exit(1)
+    if args['--profile']:
+        from . import profiling
+        return profiling.run(lambda: dispatch(args, warm), args['--profile'])
+    return dispatch(args, warm)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Optional background process that runs habitica commands for the CLI.
+
+`habitica daemon` builds the API session, the user state, the task index
+and the content store once and then serves commands over a Unix socket,
+so each `habitica ...` only pays for a connect and a round trip instead
+of a cold start. `bin/habitica` forwards to it when it is running and
+runs the command itself otherwise.
+
+The client half (`forward`) only needs a few standard library modules,
+so it is quick to import.
+"""
+
+
+import contextlib
+import io
+import json
+import os
+import socket
+import sys
+
+DAEMON_SOCKET = os.path.expanduser('~') + '/.config/habitica/daemon.sock'
+# commands that have to run where the user is, not in the daemon
+LOCAL_COMMANDS = ('daemon', 'home', 'metrics')
+# and those that ask the user something: command -> arguments that do
+INTERACTIVE = {'quest': ('forcestart',)}
+# options given their value as the next argument rather than after a '='
+VALUE_OPTIONS = ('--difficulty', '--profile')
+DAEMON_TIMEOUT = 5  # seconds to wait for the daemon to take a command
+
+
+def _send(sock, message):
+    sock.sendall(json.dumps(message).encode('utf8') + b'\n')
+
+
+def _receive(sock):
+    with sock.makefile('rb') as stream:
+        return _read(stream)
+
+
+def _read(stream):
+    line = stream.readline()
+    return json.loads(line.decode('utf8')) if line else None
+
+
+def _connect(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except (IOError, OSError):
+        sock.close()
+        return None
+    return sock
+
+
+def _local(argv):
+    words = _words(argv)
+    if not words:
+        return True
+    return words[0] in LOCAL_COMMANDS or \
+        any(arg in INTERACTIVE.get(words[0], ()) for arg in words[1:])
+
+
+def _words(argv):
+    """`argv` without its options (and the values of those that take one)."""
+    words = []
+    args = iter(argv)
+    for arg in args:
+        if arg == '--':
+            words.extend(args)
+        elif arg.startswith('-') and len(arg) > 1:
+            if arg in VALUE_OPTIONS:
+                next(args, None)
+        else:
+            words.append(arg)
+    return words
+
+
+def forward(argv, path=DAEMON_SOCKET, stdout=None, stderr=None,
+            timeout=DAEMON_TIMEOUT):
+    """
+    Run `argv` (the arguments after `habitica`) in the daemon, copying
+    its output to ours. Returns the exit code, or None when no daemon is
+    listening, the command has to run locally, or the daemon does not
+    take it within `timeout` seconds (e.g. it is stuck on another one).
+    """
+    if not argv or _local(argv) or not os.path.exists(path):
+        return None
+    sock = _connect(path)
+    if sock is None:
+        return None
+    try:
+        sock.settimeout(timeout)
+        with sock.makefile('rb') as stream:
+            # relative paths in the arguments are relative to us
+            _send(sock, {'argv': argv, 'cwd': os.getcwd()})
+            try:
+                reply = _read(stream)
+            except socket.timeout:
+                # not started, so it is safe to run it ourselves
+                return None
+            taken = reply is not None and 'code' not in reply
+            if taken:
+                # from here on running it again could do it twice, and
+                # the API's own timeouts bound how long it takes
+                sock.settimeout(None)
+                reply = _read(stream)
+    finally:
+        sock.close()
+    if reply is None and taken:
+        (stderr or sys.stderr).write('habitica daemon stopped while '
+                                     'running the command\n')
+        return 1
+    if reply is None:
+        return None
+    (stdout or sys.stdout).write(reply['out'])
+    (stderr or sys.stderr).write(reply['err'])
+    return reply['code']
+
+
+def stop(path=DAEMON_SOCKET):
+    """Ask a running daemon to exit; False if none was running."""
+    sock = _connect(path)
+    if sock is None:
+        return False
+    try:
+        _send(sock, {'stop': True})
+        _receive(sock)
+    finally:
+        sock.close()
+    return True
+
+
+def run(argv, warm, cwd=None):
+    """
+    Run one command against the `warm` objects, capturing its output, in
+    the client's working directory `cwd` and with logging as set up by
+    its own options.
+    """
+    import logging
+    from . import core
+
+    out, err = io.StringIO(), io.StringIO()
+    code = 0
+    here = os.getcwd()
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    root.handlers = []
+    root.setLevel(logging.WARNING)
+    stdin = sys.stdin
+    # nobody to answer a prompt
+    sys.stdin = io.StringIO()
+    # the catalog may have changed since the last command
+    warm['content'].checked = False
+    # and so may anything read from the server before the memo window
+    warm['hbt'].memo.start()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        try:
+            if cwd is not None:
+                os.chdir(cwd)
+            core.cli(argv, warm)
+        except SystemExit as e:
+            if isinstance(e.code, int):
+                code = e.code
+            elif e.code is not None:
+                # docopt's usage message
+                sys.stderr.write('%s\n' % e.code)
+                code = 1
+        except Exception:
+            import traceback
+            # as it would have looked without the daemon
+            traceback.print_exc()
+            code = 1
+        finally:
+            os.chdir(here)
+            root.handlers = handlers
+            root.setLevel(level)
+            sys.stdin = stdin
+    return {'out': out.getvalue(), 'err': err.getvalue(), 'code': code}
+
+
+def serve(warm, path=DAEMON_SOCKET):
+    """Serve commands on `path` until stopped, one at a time."""
+    import logging
+
+    running = _connect(path)
+    if running is not None:
+        running.close()
+        print('habitica daemon already running on %s' % path)
+        return
+    if os.path.exists(path):
+        # left behind by a daemon that did not exit cleanly
+        os.unlink(path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o077)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(umask)
+    server.listen(5)
+    logging.info('habitica daemon listening on %s' % path)
+    try:
+        while True:
+            conn, _ = server.accept()
+            try:
+                with conn:
+                    request = _receive(conn)
+                    if request is None:
+                        continue
+                    if request.get('stop'):
+                        _send(conn, {'stopped': True})
+                        break
+                    _send(conn, {'taken': True})
+                    _send(conn, run(request['argv'], warm,
+                                    request.get('cwd')))
+            except (IOError, OSError, ValueError) as e:
+                # the client went away (e.g. Ctrl-C) or sent garbage
+                logging.info('habitica daemon client failed: %s' % e)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.unlink(path)
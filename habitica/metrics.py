@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Request, cache and command metrics that add up across runs.
+
+With `metrics-file = <path>` in settings.cfg, every command counts its
+requests (through the tracer, like `--trace`), its lookups in the local
+caches and its own duration, and adds them to the totals in <path>,
+written in the Prometheus text format. Point node_exporter's textfile
+collector at it, or serve it on a local /metrics with `habitica metrics
+serve`. The file is locked while it is read and replaced, so runs from
+cron for several accounts (told apart by a `user` label) can share it.
+"""
+
+
+from collections import Counter, OrderedDict
+import fcntl
+import logging
+import os
+import re
+import threading
+import time
+
+METRICS_PORT = 9791  # `habitica metrics serve`, on localhost
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+REQUEST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # seconds
+COMMAND_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)  # seconds
+
+# metric -> (type, help, histogram buckets)
+FAMILIES = OrderedDict([
+    ('habitica_requests_total',
+     ('counter', 'API requests by endpoint and status.', None)),
+    ('habitica_request_duration_seconds',
+     ('histogram', 'API request latency, rate-limit waits included.',
+      REQUEST_BUCKETS)),
+    ('habitica_response_bytes_total',
+     ('counter', 'API response bytes by endpoint.', None)),
+    ('habitica_rate_limit_wait_seconds_total',
+     ('counter', 'Time requests waited for the rate limit.', None)),
+    ('habitica_rate_limited_total',
+     ('counter', 'Responses that were 429 Too Many Requests.', None)),
+    ('habitica_rate_limit_remaining',
+     ('gauge', 'Requests left in the rate-limit window, as of the last.',
+      None)),
+    ('habitica_cache_lookups_total',
+     ('counter', 'Lookups in the local caches, by cache and result.', None)),
+    ('habitica_commands_total',
+     ('counter', 'Commands run, by outcome.', None)),
+    ('habitica_command_duration_seconds',
+     ('histogram', 'Command run time.', COMMAND_BUCKETS)),
+])
+SUFFIXES = ('_bucket', '_sum', '_count')  # of a histogram's samples
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def family_of(sample):
+    """The metric a sample belongs to, e.g. 'x_bucket' -> 'x'."""
+    for suffix in SUFFIXES:
+        base = sample[:-len(suffix)]
+        if sample.endswith(suffix) and \
+                FAMILIES.get(base, ('',))[0] == 'histogram':
+            return base
+    return sample
+
+
+def _bound(value):
+    return '+Inf' if value == float('inf') else '%g' % value
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def _unescape(value):
+    return re.sub(r'\\(.)', lambda m: '\n' if m.group(1) == 'n'
+                  else m.group(1), value)
+
+
+def _number(value):
+    return '%d' % value if value == int(value) else repr(value)
+
+
+def _order(key):
+    # series by their labels, then a histogram's buckets by bound, its
+    # sum and its count
+    name, labels = key
+    family = family_of(name)
+    le = dict(labels).get('le')
+    return (tuple(label for label in labels if label[0] != 'le'),
+            SUFFIXES.index(name[len(family):]) if name != family else 0,
+            float(le) if le is not None else 0)
+
+
+class Registry(object):
+    """
+    Samples, as {(sample name, labels): value}, with `labels` added to
+    every one. Safe to update from several threads.
+    """
+
+    def __init__(self, labels=None):
+        self.labels = dict(labels or {})
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def _key(self, name, labels):
+        labels = dict(self.labels, **labels)
+        return name, tuple(sorted(labels.items(),
+                                  key=lambda label: (label[0] == 'le',
+                                                     label[0])))
+
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.samples[key] = value
+
+    def observe(self, name, value, **labels):
+        """Count `value` into the buckets, sum and count of a histogram."""
+        for bound in FAMILIES[name][2] + (float('inf'),):
+            if value <= bound:
+                self.inc(name + '_bucket', le=_bound(bound), **labels)
+            else:
+                # still there, so every series has all its buckets
+                self.inc(name + '_bucket', 0, le=_bound(bound), **labels)
+        self.inc(name + '_sum', value, **labels)
+        self.inc(name + '_count', **labels)
+
+    def merge(self, other):
+        """Add `other`'s samples to ours; gauges take its value."""
+        with self.lock:
+            for key, value in other.samples.items():
+                if FAMILIES.get(family_of(key[0]), ('',))[0] == 'gauge':
+                    self.samples[key] = value
+                else:
+                    self.samples[key] = self.samples.get(key, 0) + value
+        return self
+
+    def render(self):
+        """The samples in the Prometheus text format."""
+        families = OrderedDict((name, []) for name in FAMILIES)
+        with self.lock:
+            for key in sorted(self.samples, key=_order):
+                families.setdefault(family_of(key[0]), []).append(key)
+            lines = []
+            for family, keys in families.items():
+                if not keys:
+                    continue
+                if family in FAMILIES:
+                    kind, text, _ = FAMILIES[family]
+                    lines.append('# HELP %s %s' % (family, text))
+                    lines.append('# TYPE %s %s' % (family, kind))
+                for name, labels in keys:
+                    lines.append('%s%s %s' % (
+                        name,
+                        '{%s}' % ','.join('%s="%s"' % (label, _escape(value))
+                                          for label, value in labels)
+                        if labels else '',
+                        _number(self.samples[name, labels])))
+        return '\n'.join(lines) + '\n'
+
+
+def parse(text):
+    """A Registry of the samples in `text` (as written by render())."""
+    registry = Registry()
+    for line in text.splitlines():
+        match = SAMPLE.match(line)
+        if line.startswith('#') or match is None:
+            continue
+        name, labels, value = match.groups()
+        labels = dict((label, _unescape(text))
+                      for label, text in LABEL.findall(labels or ''))
+        registry.samples[registry._key(name, labels)] = float(value)
+    return registry
+
+
+def add_to(path, registry):
+    """Add `registry` to the totals in `path`, replacing it atomically."""
+    with open(path + '.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(path) as f:
+                totals = parse(f.read())
+        except IOError:
+            totals = Registry()
+        totals.merge(registry)
+        # the textfile collector only reads *.prom, and never half a file
+        temp = '%s.%d.tmp' % (path, os.getpid())
+        with open(temp, 'w') as f:
+            f.write(totals.render())
+        os.replace(temp, path)
+
+
+class MetricsSink(object):
+    """Tracer sink counting each request into `registry`."""
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def emit(self, span):
+        registry = self.registry
+        endpoint = {'method': span.method.upper(), 'endpoint': span.template}
+        registry.inc('habitica_requests_total', status=str(span.status),
+                     **endpoint)
+        registry.observe('habitica_request_duration_seconds', span.seconds,
+                         **endpoint)
+        registry.inc('habitica_response_bytes_total', span.bytes, **endpoint)
+        registry.inc('habitica_rate_limit_wait_seconds_total', span.waited)
+        # every retry was for a 429, and so is a last attempt that failed
+        registry.inc('habitica_rate_limited_total',
+                     span.retries + (span.status == 429))
+        if span.headroom is not None:
+            registry.set('habitica_rate_limit_remaining', span.headroom)
+        if span.method == 'get' and span.status is not None and \
+                (span.status == 304 or 200 <= span.status < 300):
+            # a 304 is the body we kept for the ETag, anything else had
+            # to be downloaded
+            registry.inc('habitica_cache_lookups_total', cache='etag',
+                         result='hit' if span.status == 304 else 'miss')
+
+
+def recorded(run, warm, command, path):
+    """
+    A command's `run(ctx)`, counting its requests, cache lookups and
+    duration into the totals in `path` once it is done.
+    """
+    hbt = warm['hbt']
+    # anything keeping {(cache, 'hit', 'miss'...): lookups} in `stats`
+    stores = [store for store in (hbt.memo, warm.get('content'),
+                                  warm.get('index'), warm.get('cache'))
+              if store is not None]
+
+    def recording(ctx):
+        registry = Registry({'user': warm['auth']['x-api-user']})
+        sink = hbt.tracer.add(MetricsSink(registry))
+        seen = [Counter(store.stats) for store in stores]
+        start = time.time()
+        outcome = 'error'
+        try:
+            run(ctx)
+            outcome = 'ok'
+        except SystemExit as e:
+            # some commands exit 1 just for having nothing to do
+            outcome = 'ok' if not e.code else 'exit'
+            raise
+        finally:
+            hbt.tracer.remove(sink)
+            registry.inc('habitica_commands_total', command=command,
+                         outcome=outcome)
+            registry.observe('habitica_command_duration_seconds',
+                             time.time() - start, command=command)
+            for store, before in zip(stores, seen):
+                for (cache, result), count in \
+                        (Counter(store.stats) - before).items():
+                    registry.inc('habitica_cache_lookups_total', count,
+                                 cache=cache, result=result)
+            try:
+                add_to(path, registry)
+            except (IOError, OSError) as e:
+                logging.warning('Could not write metrics to %s: %s'
+                                % (path, e))
+    return recording
+
+
+def server(path, port=METRICS_PORT, host='127.0.0.1'):
+    """An HTTP server for the totals in `path`, on <host>:<port>/metrics."""
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            try:
+                with open(path, 'rb') as f:
+                    body = f.read()
+            except IOError:
+                # nothing recorded yet
+                body = b''
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.debug(format % args)
+
+    return HTTPServer((host, port), Handler)
+
+
+def serve(path, port=METRICS_PORT, host='127.0.0.1'):
+    """Serve the totals in `path` until interrupted."""
+    httpd = server(path, port, host)
+    print('Serving %s on http://%s:%d/metrics' % (path, host, port))
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
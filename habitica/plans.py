@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Plans for the inventory commands.
+
+Each planner works out everything a command is going to do from one
+snapshot of the user's items, simulating the effect of every step on
+that snapshot instead of asking the server after each one. The command
+then only has to send the steps and check the outcome once.
+"""
+
+
+from collections import OrderedDict
+
+from .collection import BITE, Collection, to_mount
+
+BASIC_PETS = ('BearCub', 'Cactus', 'Dragon', 'FlyingPig', 'Fox', 'LionCub',
+              'PandaCub', 'TigerCub', 'Wolf')
+# pets that cannot be fed
+RARE_PETS = ('Wolf-Veteran', 'Wolf-Cerberus', 'Dragon-Hydra', 'Turkey-Base',
+             'BearCub-Polar', 'MantisShrimp-Base', 'JackOLantern-Base',
+             'Mammoth-Base', 'Tiger-Veteran', 'Phoenix-Base', 'Turkey-Gilded')
+
+
+class FeedStep(object):
+    """Feed `bites` servings of `food` to `pet`, `more` short of a mount."""
+
+    def __init__(self, pet, food, bites, more):
+        self.pet = pet
+        self.food = food
+        self.bites = bites
+        self.more = more
+
+
+def _feedable(owned, cell):
+    # unhatched, already a mount, or never eats
+    if owned.pets[cell] <= 0 or owned.name(cell) in RARE_PETS:
+        return False
+    # hatched again after becoming a mount
+    return not (owned.mounts[cell] and owned.pets[cell] == BITE)
+
+
+def _hungriest(owned, cells):
+    """The pet closest to a mount; basic pets win ties (Pet achievement)."""
+    mouth = None
+    for cell in cells:
+        if not _feedable(owned, cell):
+            continue
+        if mouth is None or owned.pets[cell] > owned.pets[mouth] or \
+                (owned.pets[cell] == owned.pets[mouth] and
+                 owned.pair(mouth)[0] not in BASIC_PETS and
+                 owned.pair(cell)[0] in BASIC_PETS):
+            mouth = cell
+    return mouth
+
+
+def plan_feeding(items, feeding, magic):
+    """
+    Every feeding for the inventory in `items`, in order.
+
+    `feeding` maps foods to the potion whose pets like them ('ignore' for
+    things no pet eats), `magic` lists the potions whose pets eat
+    anything; those are fed only what no pet prefers. Each food goes to
+    the pet closest to becoming a mount, as many servings as that takes.
+    Returns (steps, pets, uneaten, unknown): the FeedSteps, the satiety
+    every pet should end up with, foods nobody wants and foods we know
+    nothing about.
+    """
+    # every pet we have, on axes of just their eggs and potions
+    names = list(items['pets'])
+    owned = Collection(items,
+                       OrderedDict.fromkeys(pet.partition('-')[0]
+                                            for pet in names),
+                       OrderedDict.fromkeys(pet.partition('-')[2]
+                                            for pet in names))
+    foods = dict(items['food'])
+
+    # feedable pets by the potion they were hatched with, in the order
+    # the user has them (which pet wins a tie)
+    by_potion = {}
+    eat_anything = []
+    for pet in names:
+        cell = owned.cell(pet)
+        if not _feedable(owned, cell):
+            continue
+        potion = owned.pair(cell)[1]
+        by_potion.setdefault(potion, []).append(cell)
+        if potion in magic:
+            eat_anything.append(cell)
+
+    steps, uneaten, unknown = [], [], []
+    for food in items['food']:
+        # seasonal foods encode their potion in the name
+        potion = feeding.get(food)
+        if potion is None and '_' in food:
+            potion = food.split('_', 1)[1]
+        if foods[food] <= 0:
+            continue
+        if potion is None:
+            unknown.append(food)
+            continue
+        if potion == 'ignore':
+            continue
+
+        fed = False
+        while foods[food] > 0:
+            mouth = _hungriest(owned, by_potion.get(potion, ()))
+            if mouth is None:
+                mouth = _hungriest(owned, eat_anything)
+            if mouth is None:
+                break
+            need = to_mount(owned.pets[mouth])
+            bites = min(need, foods[food])
+            steps.append(FeedStep(owned.name(mouth), food, bites,
+                                  need - bites))
+            foods[food] -= bites
+            owned.feed(mouth, bites)
+            fed = True
+        if not fed:
+            uneaten.append(food)
+    pets = dict((pet, owned.pets[owned.cell(pet)]) for pet in names)
+    return steps, pets, uneaten, unknown
+
+
+def plan_hatching(items, kinds, extra=0):
+    """
+    Every hatching for the inventory in `items`, and the eggs left over.
+
+    Each egg is hatched with every potion in `kinds` whose pet we lack,
+    while eggs and potions last. Of the eggs that remain, we keep enough
+    for the pets and mounts still missing, plus `extra`, and sell the
+    rest. Returns (hatches, missing, needs, sales): the (egg, potion)
+    pairs to hatch, the (egg, potion) pairs short of a potion, for each
+    egg left (egg, pets needed, mounts needed) as lists of potions, and
+    an ordered {egg: number to sell}.
+    """
+    owned = Collection(items, items['eggs'], kinds)
+
+    hatches, missing = [], []
+    unhatched = owned.unhatched()
+    for egg, eggs in zip(owned.eggs, owned.egg_count):
+        for cell in owned.row(egg):
+            if eggs <= 0:
+                break
+            if not unhatched[cell]:
+                continue
+            potion = owned.pair(cell)[1]
+            if owned.potion_count[cell % owned.width] < 1:
+                missing.append((egg, potion))
+                continue
+            hatches.append((egg, potion))
+            owned.hatch(egg, potion)
+            eggs -= 1
+
+    needs = []
+    unhatched = owned.unhatched()
+    unmounted = owned.unmounted()
+    for egg, eggs in zip(owned.eggs, owned.egg_count):
+        if eggs <= 0:
+            continue
+        needs.append((egg,
+                      [owned.pair(cell)[1] for cell in owned.row(egg)
+                       if unhatched[cell]],
+                      [owned.pair(cell)[1] for cell in owned.row(egg)
+                       if unmounted[cell]]))
+    return hatches, missing, needs, owned.surplus_eggs(extra)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Profiling for `habitica --profile=<file>`.
+
+The command runs under cProfile, and the stats are written to <file> for
+pstats, snakeviz and the like; or, if <file> ends in .folded, only under
+a sampling profiler, whose collapsed stacks (one 'frame;frame;... N' line
+per stack, N in milliseconds) are written for flamegraph.pl or
+speedscope. Either way the samples split the time into where it went
+(importing, loading config and local stores, waiting on the network,
+decoding JSON, rendering output), printed after the command's output.
+"""
+
+
+from collections import Counter
+import os
+import sys
+import threading
+import time
+
+PHASES = ('import', 'config', 'network', 'json', 'rendering', 'other')
+SAMPLE_INTERVAL = 0.001  # seconds between samples (at best)
+
+# (phase, substrings of a frame's file, substrings of its function name),
+# first match wins; a frame matches on either. The sampler only sees
+# Python frames: time in a C function (a socket read, print, a regex
+# match, json's scanner) counts against the Python frame that called it,
+# so the rules name Python modules and functions, never C ones
+RULES = [
+    ('import', ('<frozen importlib', '<frozen zipimport', '/importlib/'),
+     ()),
+    ('json', ('/json/',), ('json',)),
+    # a rate-limit wait sleeps in habitica/api.py
+    ('network', ('/requests/', '/urllib3/', '/http/client', '/socket.py',
+                 '/ssl.py', '/selectors.py', '/asyncio/', '/concurrent/',
+                 '/threading.py', '/queue.py', 'habitica/api.py'),
+     ()),
+    ('config', ('/configparser.py', '/sqlite3/', 'habitica/cache.py',
+                'habitica/content.py', 'habitica/tasks.py'),
+     ('load_settings', 'load_auth', 'load_typo_check', 'connect')),
+    ('rendering', ('habitica/commands/', 'habitica/core.py', '/humanize/',
+                   '/dateutil/', '/pytz/', '/re/', '/re.py', '/sre_',
+                   '/textwrap.py', '/pprint.py', '/codecs.py',
+                   '/encodings/'),
+     ()),
+]
+
+
+def phase_of(filename, function):
+    """Which of PHASES time spent in `function` of `filename` counts as."""
+    for phase, files, functions in RULES:
+        if any(part in filename for part in files) or \
+                any(part in function for part in functions):
+            return phase
+    return None
+
+
+def frame_label(filename, function):
+    """Short name for a stack frame: 'package/module.py:function'."""
+    return '%s:%s' % ('/'.join(filename.split(os.sep)[-2:]), function)
+
+
+class Sampler(object):
+    """
+    Samples the stack of the thread that created it, from a thread of its
+    own, every SAMPLE_INTERVAL or so (as often as the GIL lets it). Each
+    sample is weighted by the time since the one before, so the stacks
+    add up to the wall time.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.target = threading.get_ident()
+        self.stacks = Counter()  # ((filename, function), ...) -> seconds
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._sample)
+        self.thread.daemon = True
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.done.set()
+        self.thread.join()
+
+    def _sample(self):
+        last = time.time()
+        while not self.done.wait(self.interval):
+            try:
+                stack = self._stack()
+            except Exception:
+                # the thread ran on while we walked its frames; its time
+                # goes to the next sample
+                continue
+            now = time.time()
+            if stack is None:
+                continue
+            self.stacks[stack] += now - last
+            last = now
+
+    def _stack(self):
+        """The target's stack, outermost frame first; None if it's gone."""
+        frame = sys._current_frames().get(self.target)
+        if frame is None:
+            return None
+        stack = []
+        while frame is not None:
+            stack.append((frame.f_code.co_filename, frame.f_code.co_name))
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    def collapsed(self):
+        """The stacks as 'frame;frame;... milliseconds' lines."""
+        return ['%s %d' % (';'.join(frame_label(*frame) for frame in stack),
+                           max(int(round(seconds * 1000)), 1))
+                for stack, seconds in sorted(self.stacks.items())]
+
+    def phases(self):
+        """
+        {phase: seconds}. Everything under an import is importing;
+        otherwise the innermost frame that matches a rule decides.
+        """
+        spent = dict((phase, 0.0) for phase in PHASES)
+        for stack, seconds in self.stacks.items():
+            if any(filename.startswith('<frozen importlib')
+                   for filename, function in stack):
+                spent['import'] += seconds
+                continue
+            for filename, function in reversed(stack):
+                phase = phase_of(filename, function)
+                if phase is not None:
+                    spent[phase] += seconds
+                    break
+            else:
+                spent['other'] += seconds
+        return spent
+
+
+def run(call, path):
+    """
+    Call `call()` under the profiler `path` asks for, write the profile
+    there, and print where the time went to stderr. The split into
+    phases always comes from sampling: cProfile only has each function's
+    own time, not what it was called under (an import, a request...).
+    """
+    sampler = Sampler()
+    profiler = None
+    if not path.endswith('.folded'):
+        import cProfile
+        profiler = cProfile.Profile()
+    start = time.time()
+    sampler.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        return call()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        sampler.stop()
+        elapsed = time.time() - start
+        if profiler is not None:
+            profiler.dump_stats(path)
+        else:
+            with open(path, 'w') as f:
+                f.write('\n'.join(sampler.collapsed()) + '\n')
+        report(sampler.phases(), elapsed, path)
+
+
+def report(spent, elapsed, path):
+    """The time of each of PHASES, to stderr."""
+    sys.stderr.write('Profile written to %s (%.0fms):\n' % (path,
+                                                            elapsed * 1000))
+    total = sum(spent.values()) or 1.0
+    for phase in PHASES:
+        sys.stderr.write('%12s %7.1fms %3.0f%%\n' % (phase,
+                                                    spent[phase] * 1000,
+                                                    100 * spent[phase] /
+                                                    total))
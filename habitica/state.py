@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Local picture of the Habitica user document.
+
+Commands only fetch the parts of the user they read (the server's
+`userFields` projection); those partial documents, and the changes that
+mutation responses report, are folded into one cached document here.
+"""
+
+
+import copy
+
+
+def project(doc, path):
+    """Value at a dotted `path` in `doc`, or None."""
+    for step in path.split('.'):
+        if not isinstance(doc, dict) or step not in doc:
+            return None
+        doc = doc[step]
+    return doc
+
+
+def merge(doc, partial, fields=None):
+    """
+    Fold a (projected) user document into `doc`, in place.
+
+    With `fields`, each listed subtree in `doc` is replaced by the one in
+    `partial`; everything else in `doc` is left alone. Without, `partial`
+    is a full document and replaces `doc` outright.
+    """
+    if fields is None:
+        doc.clear()
+        doc.update(copy.deepcopy(partial))
+        return doc
+    for path in fields:
+        value = project(partial, path)
+        if value is None:
+            continue
+        steps = path.split('.')
+        node = doc
+        for step in steps[:-1]:
+            if not isinstance(node.get(step), dict):
+                node[step] = {}
+            node = node[step]
+        node[steps[-1]] = copy.deepcopy(value)
+    return doc
+
+
+# top-level user subtrees mutation responses may carry
+USER_SUBTREES = ('stats', 'items', 'balance', 'purchased', 'flags',
+                 'preferences', 'party', 'achievements')
+# stats returned alongside a task score
+SCORE_STATS = ('hp', 'mp', 'exp', 'gp', 'lvl', 'class', 'points', 'str',
+               'con', 'int', 'per', 'buffs', 'training')
+# drop types from scoring, and the items they land in
+DROP_ITEMS = {'Food': 'food', 'Egg': 'eggs', 'HatchingPotion':
+              'hatchingPotions'}
+
+
+class UserState(object):
+    """
+    The user document as far as we know it.
+
+    `fetch` asks the server for just the fields a command needs and merges
+    them into `doc`, which keeps whatever else was learned earlier. The
+    `apply*` methods fold in what mutations return, so a command can show
+    before/after deltas without fetching the user again.
+    """
+
+    def __init__(self, hbt):
+        self.hbt = hbt
+        self.doc = {}
+
+    @staticmethod
+    def query(fields=None):
+        """Query arguments for GET /user projected to `fields`."""
+        if fields is None:
+            return {}
+        return {'userFields': ','.join(fields)}
+
+    def update(self, user, fields=None):
+        """Merge a user document fetched with `query(fields)`."""
+        merge(self.doc, user, fields)
+        return user
+
+    def fetch(self, fields=None):
+        """GET /user, projected to `fields` (None: everything)."""
+        return self.update(self.hbt.user(**self.query(fields)), fields)
+
+    def snapshot(self):
+        """A copy of `doc` to compare against after mutating."""
+        return copy.deepcopy(self.doc)
+
+    def apply(self, partial):
+        """
+        Fold user subtrees returned by a mutation (e.g. {'items': ...} from
+        hatch, {'stats': ..., 'items': ...} from sell) into `doc`.
+        Stats are updated key by key, since responses often leave out the
+        computed maximums; other subtrees are replaced.
+        """
+        if not isinstance(partial, dict):
+            return
+        for key in USER_SUBTREES:
+            if key not in partial:
+                continue
+            if key == 'stats' and isinstance(self.doc.get('stats'), dict):
+                self.doc['stats'].update(copy.deepcopy(partial['stats']))
+            else:
+                self.doc[key] = copy.deepcopy(partial[key])
+
+    def apply_score(self, result):
+        """Fold the result of scoring a task: new stats, and any drop."""
+        if not isinstance(result, dict):
+            return
+        stats = dict((k, v) for k, v in result.items() if k in SCORE_STATS)
+        self.apply({'stats': stats})
+        drop = result.get('_tmp', {}).get('drop', {})
+        if drop.get('type') in DROP_ITEMS and drop.get('key'):
+            kind = self.doc.setdefault('items', {}) \
+                .setdefault(DROP_ITEMS[drop['type']], {})
+            kind[drop['key']] = kind.get(drop['key'], 0) + 1
+
+    def apply_purchase(self, result, gold=0, gems=0):
+        """
+        Fold a purchase that cost `gold` and brought `gems`. Purchase
+        responses don't always include the stats or balance they changed,
+        so those are worked out locally when missing.
+        """
+        result = result if isinstance(result, dict) else {}
+        if gold and 'stats' not in result:
+            stats = self.doc.setdefault('stats', {})
+            stats['gp'] = stats.get('gp', 0) - gold
+        if gems and 'balance' not in result:
+            self.doc['balance'] = self.doc.get('balance', 0) + gems / 4.0
+        self.apply(result)
+
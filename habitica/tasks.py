@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Local index of the task lists as last shown.
+
+`habits up 3` means the third habit as printed last time, so every list
+that is printed is saved here, in display order. Scoring by number then
+only needs the task ids, which are checked against the user's
+`tasksOrder` (fetched with the user anyway) instead of downloading the
+whole list again.
+
+Listing commands read the saved lists too. They ask the server only for
+the user's version (`_v`, bumped whenever tasks are scored, added,
+removed or reordered) and tasksOrder, and download a list again only
+when those moved on, or when the saved copy is older than a TTL, to
+catch edits made elsewhere that leave the user alone. The server has no
+"tasks changed since" query, so a download is always of the whole list,
+and replaces the saved one whole.
+"""
+
+
+from collections import Counter
+import json
+import sqlite3
+import time
+
+# task list types as the server names them in tasksOrder and tasks/user
+TASK_TYPES = {'habits': 'habits', 'dailies': 'dailys', 'todos': 'todos'}
+TASKS_TTL = 3600  # seconds a synced list is trusted without a download
+
+
+class TaskIndex(object):
+    """
+    Ordinal -> task map for each task list, kept in an SQLite file.
+
+    A saved list is only handed back while the ids in it, in order, are
+    the ones the server lists; anything else means the list changed
+    somewhere else and has to be fetched again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # ('tasks', 'hit' or 'miss') -> lists asked for
+        self.stats = Counter()
+        self.db = sqlite3.connect(path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS tasks '
+                        '(type TEXT, ordinal INTEGER, id TEXT, value TEXT, '
+                        'PRIMARY KEY (type, ordinal))')
+        self.db.execute('CREATE TABLE IF NOT EXISTS synced '
+                        '(type TEXT PRIMARY KEY, version INTEGER, '
+                        'at REAL)')
+
+    def save(self, kind, tasks, version=None):
+        """
+        Remember `tasks` (a list of task dicts) as the `kind` list. With
+        the user `version` it was downloaded at, the list also counts as
+        synced; without (e.g. after changing tasks locally), the next
+        listing downloads it again.
+        """
+        rows = [(kind, i, task.get('id'), json.dumps(task))
+                for i, task in enumerate(tasks)]
+        with self.db:
+            self.db.execute('DELETE FROM tasks WHERE type = ?', (kind,))
+            self.db.executemany('INSERT INTO tasks VALUES (?, ?, ?, ?)',
+                                rows)
+            if version is None:
+                self.db.execute('DELETE FROM synced WHERE type = ?', (kind,))
+            else:
+                self.db.execute('INSERT OR REPLACE INTO synced '
+                                'VALUES (?, ?, ?)',
+                                (kind, version, time.time()))
+
+    def current(self, kind, version, order, ttl=TASKS_TTL):
+        """
+        The saved `kind` list if it was synced at user `version`, within
+        `ttl` seconds, and still lists `order`; None otherwise.
+        """
+        row = self.db.execute('SELECT version, at FROM synced '
+                              'WHERE type = ?', (kind,)).fetchone()
+        if row is None or version is None or row[0] != version or \
+                time.time() - row[1] > ttl or \
+                self.ids(kind) != list(order or []):
+            self.stats['tasks', 'miss'] += 1
+            return None
+        self.stats['tasks', 'hit'] += 1
+        return self._rows(kind)
+
+    def ids(self, kind):
+        """Task ids of the saved `kind` list, in display order."""
+        return [row[0] for row in
+                self.db.execute('SELECT id FROM tasks WHERE type = ? '
+                                'ORDER BY ordinal', (kind,))]
+
+    def load(self, kind, order):
+        """
+        The saved `kind` list, if its ids are exactly `order` (the user's
+        tasksOrder for that type); None if it is missing or stale.
+        """
+        if not order or self.ids(kind) != list(order):
+            self.stats['tasks', 'miss'] += 1
+            return None
+        self.stats['tasks', 'hit'] += 1
+        return self._rows(kind)
+
+    def _rows(self, kind):
+        return [json.loads(row[0]) for row in
+                self.db.execute('SELECT value FROM tasks WHERE type = ? '
+                                'ORDER BY ordinal', (kind,))]
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Request tracing for api.Habitica.
+
+Every request the API class sends is described by a Span (what was asked,
+how long it waited for the rate limiter, how long the server took, what
+came back) and handed to the sinks of the Tracer shared by all Habitica
+objects of a connection. Sinks are anything with an `emit(span)`: a log
+line, a JSON-lines file, an in-memory list, or the waterfall `--trace`
+prints after a command.
+"""
+
+
+import json
+import logging
+import threading
+import time
+
+
+class Span(object):
+    """
+    One request: `method`, `url`, and `template`, the URL path with the
+    ids and arguments it was called with left out (e.g. 'tasks/{id}'),
+    for grouping. `start` is when it was made (epoch seconds), `waited`
+    how long it queued for the rate limiter and `seconds` its whole
+    duration, both over all `retries`. `status` and `bytes` describe the
+    final response, `headroom` is the rate-limit budget left after it.
+    """
+
+    FIELDS = ('method', 'url', 'template', 'start', 'waited', 'seconds',
+              'status', 'bytes', 'retries', 'headroom')
+
+    def __init__(self, method, url, template):
+        self.method = method
+        self.url = url
+        self.template = template
+        self.start = time.time()
+        self.waited = 0.0
+        self.seconds = 0.0
+        self.status = None
+        self.bytes = 0
+        self.retries = 0
+        self.headroom = None
+
+    def as_dict(self):
+        return dict((field, getattr(self, field)) for field in self.FIELDS)
+
+    def __str__(self):
+        return '%s %s %s %.0fms (waited %.0fms) %dB retries=%d headroom=%s' \
+            % (self.method.upper(), self.template, self.status,
+               self.seconds * 1000, self.waited * 1000, self.bytes,
+               self.retries, self.headroom)
+
+
+class Tracer(object):
+    """The sinks spans go to. With none, tracing costs next to nothing."""
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+
+    def __bool__(self):
+        return bool(self.sinks)
+
+    def add(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def remove(self, sink):
+        if sink in self.sinks:
+            self.sinks.remove(sink)
+
+    def emit(self, span):
+        for sink in list(self.sinks):
+            sink.emit(span)
+
+
+class LogSink(object):
+    """A debug log line per request."""
+
+    def emit(self, span):
+        logging.debug('Request: %s', span)
+
+
+class FileSink(object):
+    """Appends each span to `path`, one JSON object per line."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def emit(self, span):
+        line = json.dumps(span.as_dict()) + '\n'
+        with self.lock, open(self.path, 'a') as f:
+            f.write(line)
+
+
+class Collector(object):
+    """Keeps the spans in `spans`, e.g. for tests."""
+
+    def __init__(self):
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def emit(self, span):
+        with self.lock:
+            self.spans.append(span)
+
+
+class Waterfall(Collector):
+    """Collects one command's spans, to show them against its timeline."""
+
+    def __init__(self, width=40):
+        Collector.__init__(self)
+        self.width = width
+        self.start = time.time()
+
+    def render(self):
+        """The waterfall as text: a line per request, in start order."""
+        end = max([time.time()] + [span.start + span.seconds
+                                   for span in self.spans])
+        total = max(end - self.start, 1e-6)
+        scale = self.width / total
+        lines = []
+        for span in sorted(self.spans, key=lambda span: span.start):
+            offset = span.start - self.start
+            queued = int(round(span.waited * scale))
+            busy = max(int(round((span.seconds - span.waited) * scale)), 1)
+            bar = ' ' * int(offset * scale) + '.' * queued + '#' * busy
+            lines.append('%6.0fms %-*s %5.0fms %s %s %s' % (
+                offset * 1000, self.width, bar[:self.width],
+                span.seconds * 1000, span.status, span.method.upper(),
+                span.template))
+        spent = sum(span.bytes for span in self.spans)
+        lines.append('%d requests, %d bytes, %.0fms' % (len(self.spans),
+                                                         spent,
+                                                         total * 1000))
+        return '\n'.join(lines)
@@ -18,7 +18,7 @@ _habitica()
     #
     #  The basic options we'll complete.
     #
-    opts="status habits dailies todos server home --help --version --verbose --debug"
+    opts="status habits dailies todos server home --help --version --verbose --debug --trace --profile"
 
 
     #
@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+pytest fixtures: a fake Habitica, and the CLI pointed at it.
+"""
+
+
+import pytest
+
+import fakehabitica
+
+
+@pytest.fixture
+def fake():
+    server = fakehabitica.FakeHabitica()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def habitica(fake, tmp_path, monkeypatch):
+    """Run a command against `fake`: habitica('todos', 'done', '1')."""
+    from habitica import core
+
+    for name, path in fakehabitica.configure(fake, str(tmp_path)).items():
+        monkeypatch.setattr(core, name, path)
+
+    def run(*argv):
+        return fakehabitica.run(fake, argv)
+    return run
@@ -0,0 +1,460 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+In-process stand-in for the parts of the Habitica v3 API the CLI uses.
+
+FakeHabitica serves the user, tasks, groups, members and content from the
+JSON fixtures in tests/fixtures (one account, its party and guilds), and
+plays out scoring, feeding, hatching, selling, casting and chat on its
+own copy of them. It can add latency to every response, enforce a rate
+limit with Habitica's X-RateLimit-* headers and 429s, and answers GETs
+with ETags. Every request is logged with its response size, so tests and
+benchmarks can count what a command cost.
+
+`configure()` points habitica.core at a fake, and `run()` runs one CLI
+command against it.
+"""
+
+
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import copy
+import io
+import json
+import os
+import threading
+import time
+import uuid
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'fixtures')
+USER_ID = 'user-0000'
+API_PREFIX = '/api/v3/'
+APP_VERSION = '5.0.0'
+# what a member listing includes with includeAllPublicFields=true
+PUBLIC_FIELDS = ('profile', 'stats', 'preferences', 'auth', 'party')
+
+
+def load_fixtures(path=FIXTURES):
+    """The server's starting state, from the JSON files in `path`."""
+    def fixture(name):
+        with open(os.path.join(path, name + '.json')) as f:
+            return json.load(f)
+
+    user = fixture('user')
+    members = dict((m['id'], m) for m in fixture('members'))
+    members[user['id']] = user
+    return {'user': user,
+            'tasks': dict((t['id'], t) for t in fixture('tasks')),
+            'groups': dict((g['id'], g) for g in fixture('groups')),
+            'members': members,
+            'content': fixture('content')}
+
+
+def project(doc, fields):
+    """`doc` cut down to the comma-separated dotted `fields`."""
+    out = {'id': doc['id'], '_id': doc['_id']}
+    for field in fields.split(','):
+        steps = field.strip().split('.')
+        src, dst = doc, out
+        for step in steps[:-1]:
+            if step not in src:
+                break
+            src = src[step]
+            dst = dst.setdefault(step, {})
+        else:
+            if steps[-1] in src:
+                dst[steps[-1]] = copy.deepcopy(src[steps[-1]])
+    return out
+
+
+class Request(object):
+    """One logged request: what was asked, and what it cost."""
+
+    def __init__(self, method, path, query, etag=None):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.etag = etag  # the If-None-Match it came with
+        self.status = None
+        self.size = 0
+
+    def __repr__(self):
+        return '%s:%s' % (self.method, self.path)
+
+
+class FakeHabitica(object):
+    """
+    A fake Habitica on a local port, serving from its own thread.
+
+    `latency` is added to every response, in seconds. With `rate_limit`,
+    only that many requests are allowed per `window` seconds. `etags`
+    turns conditional GETs on.
+    """
+
+    def __init__(self, fixtures=FIXTURES, latency=0.0, rate_limit=None,
+                 window=60.0, etags=True):
+        self.state = load_fixtures(fixtures)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.window = window
+        self.etags = etags
+        self.window_start = time.time()
+        self.used = 0
+        self.log = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = 'http://127.0.0.1:%d' % self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       kwargs={'poll_interval': 0.05})
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def requests(self, since=0):
+        """Requests logged since the `since`th one."""
+        with self.lock:
+            return self.log[since:]
+
+    def _limit(self, headers):
+        """Count a request against the rate limit; False if over it."""
+        now = time.time()
+        if now - self.window_start > self.window:
+            self.window_start = now
+            self.used = 0
+        self.used += 1
+        if not self.rate_limit:
+            return True
+        remaining = self.rate_limit - self.used
+        headers['X-RateLimit-Limit'] = str(self.rate_limit)
+        headers['X-RateLimit-Remaining'] = str(max(remaining, 0))
+        headers['X-RateLimit-Reset'] = time.strftime(
+            '%a %b %d %Y %H:%M:%S GMT+0000 (Coordinated Universal Time)',
+            time.gmtime(self.window_start + self.window))
+        if remaining < 0:
+            headers['Retry-After'] = str(int(self.window_start +
+                                             self.window - now) + 1)
+            return False
+        return True
+
+    def _handler(fake):
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _serve(self, method):
+                url = urlparse(self.path)
+                query = dict((k, v[0]) for k, v in
+                             parse_qs(url.query).items())
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    body = json.loads(self.rfile.read(length)) \
+                        if length else {}
+                except ValueError:
+                    body = {}
+                request = Request(method, url.path[len(API_PREFIX):], query,
+                                  self.headers.get('If-None-Match'))
+                headers = {}
+                with fake.lock:
+                    fake.log.append(request)
+                    if not fake._limit(headers):
+                        status, data = 429, None
+                    else:
+                        try:
+                            status, data = route(fake.state, method,
+                                                 request.path, query, body)
+                        except (KeyError, IndexError):
+                            status, data = 404, None
+                    # encoded while no other request can change `data`
+                    raw = json.dumps({'success': status < 400,
+                                      'data': data,
+                                      'appVersion': APP_VERSION})
+                if fake.latency:
+                    time.sleep(fake.latency)
+                self._reply(request, status, raw.encode('utf8'), headers)
+
+            def _reply(self, request, status, raw, headers):
+                etag = 'W/"%x"' % (hash(raw) & 0xffffffff)
+                if fake.etags and status == 200 and \
+                        self.headers.get('If-None-Match') == etag:
+                    status, raw = 304, b''
+                with fake.lock:
+                    request.status = status
+                    request.size = len(raw)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(raw)))
+                if fake.etags:
+                    self.send_header('ETag', etag)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                self._serve('get')
+
+            def do_POST(self):
+                self._serve('post')
+
+            def do_PUT(self):
+                self._serve('put')
+
+            def do_DELETE(self):
+                self._serve('delete')
+        return Handler
+
+
+class Run(object):
+    """What one CLI command printed, and what it asked of the server."""
+
+    def __init__(self, code, out, requests, seconds):
+        self.code = code
+        self.out = out
+        self.requests = requests
+        self.seconds = seconds
+
+    @property
+    def bytes(self):
+        """Response bytes received."""
+        return sum(request.size for request in self.requests)
+
+    def __repr__(self):
+        return '<Run %s, %d requests: %s>' % (self.code, len(self.requests),
+                                              ' '.join(map(repr,
+                                                           self.requests)))
+
+
+def configure(fake, home):
+    """
+    Config for talking to `fake`, with the auth file and local stores
+    under `home`, as {habitica.core name: path} to set before running.
+    """
+    os.makedirs(home, exist_ok=True)
+    auth = os.path.join(home, 'auth.cfg')
+    with open(auth, 'w') as f:
+        f.write('[Habitica]\nurl = %s\nlogin = %s\npassword = key\n'
+                'checklists = false\n' % (fake.url, USER_ID))
+    return {'AUTH_CONF': auth,
+            'SETTINGS_CONF': os.path.join(home, 'settings.cfg'),
+            'CONTENT_DB': os.path.join(home, 'content.db'),
+            'TASKS_DB': os.path.join(home, 'tasks.db'),
+            'CACHE_DB': os.path.join(home, 'cache.db')}
+
+
+def run(fake, argv, warm=None):
+    """Run `habitica <argv>` against `fake`, configured beforehand."""
+    from habitica import core
+
+    since = len(fake.requests())
+    out = io.StringIO()
+    code = 0
+    start = time.time()
+    with redirect_stdout(out):
+        try:
+            core.cli(list(argv), warm)
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else \
+                (0 if e.code is None else 1)
+    return Run(code, out.getvalue(), fake.requests(since),
+               time.time() - start)
+
+
+def route(state, method, path, query, body):
+    """(status, data) for one request, updating `state` as Habitica would."""
+    user = state['user']
+    parts = path.split('/')
+    if path == 'status':
+        return 200, {'status': 'up'}
+    if path == 'content':
+        return 200, state['content']
+    if path == 'cron':
+        user['needsCron'] = False
+        return 200, {}
+    if path == 'user' and method == 'get':
+        if 'userFields' in query:
+            return 200, project(user, query['userFields'])
+        return 200, user
+    if parts[0] == 'user' and method == 'post':
+        return user_action(state, parts[1:], query, body)
+    if parts[0] == 'groups':
+        return group_action(state, method, parts[1:], query, body)
+    if parts[0] == 'members':
+        return 200, state['members'][parts[1]]
+    if parts[0] == 'tasks':
+        return task_action(state, method, parts[1:], query, body)
+    raise KeyError(path)
+
+
+def user_action(state, parts, query, body):
+    user = state['user']
+    items = user['items']
+    stats = user['stats']
+    action = parts[0]
+    if action == 'feed':
+        pet, food = parts[1], parts[2]
+        potion = pet.split('-')[1]
+        favourite = state['content']['food'].get(food, {}).get('target')
+        magic = potion in state['content']['premiumHatchingPotions']
+        for serving in range(int(query.get('amount', 1))):
+            items['food'][food] -= 1
+            items['pets'][pet] += 5 if favourite == potion or magic else 2
+            if items['pets'][pet] >= 50:
+                items['pets'][pet] = -1
+                items['mounts'][pet] = True
+                break
+        return 200, items['pets'][pet]
+    if action == 'hatch':
+        egg, potion = parts[1], parts[2]
+        items['eggs'][egg] -= 1
+        items['hatchingPotions'][potion] -= 1
+        items['pets']['%s-%s' % (egg, potion)] = 5
+        return 200, items
+    if action == 'sell':
+        kind, key = parts[1], parts[2]
+        amount = int(query.get('amount', 1))
+        items[kind][key] -= amount
+        stats['gp'] += amount
+        return 200, {'stats': stats, 'items': items}
+    if action == 'purchase':
+        quantity = int(body.get('quantity', 1))
+        if stats['gp'] < 20 * quantity:
+            return 401, None
+        user['balance'] += quantity / 4.0
+        stats['gp'] -= 20 * quantity
+        user['purchased']['plan']['gemsBought'] += quantity
+        return 200, {'items': items, 'balance': user['balance']}
+    if action == 'buy-armoire':
+        stats['gp'] -= 100
+        return 200, {'items': items,
+                     'armoire': {'type': 'food', 'dropText': 'Meat'}}
+    if action == 'equip':
+        items['gear']['equipped']['weapon'] = parts[2]
+        return 200, items
+    if action == 'sleep':
+        user['preferences']['sleep'] = not user['preferences']['sleep']
+        return 200, user['preferences']['sleep']
+    if action == 'class':
+        stats['mp'] -= 10
+        return 200, {'user': {'stats': stats}}
+    if action == 'batch-update':
+        # one result per op, None for the ones that failed
+        results = []
+        for op in body if isinstance(body, list) else []:
+            params = op.get('params', {})
+            if params.get('id') not in state['tasks']:
+                results.append(None)
+            elif op.get('op') == 'score':
+                results.append(score(state, params['id'],
+                                     params.get('direction', 'up')))
+            elif op.get('op') == 'scoreChecklistItem':
+                results.append(check(state, params['id'], params['itemId']))
+            else:
+                results.append(None)
+        user['_v'] += 1
+        return 200, results
+    raise KeyError(action)
+
+
+def group_action(state, method, parts, query, body):
+    if not parts:
+        return 200, [state['groups']['party-1']]
+    group = state['groups']['party-1' if parts[0] == 'party' else parts[0]]
+    if len(parts) == 1:
+        return 200, group
+    if parts[1] == 'members':
+        fields = PUBLIC_FIELDS if query.get('includeAllPublicFields') == \
+            'true' else ('profile',)
+        return 200, [dict([('id', mid), ('_id', mid)] +
+                          [(field, member[field]) for field in fields
+                           if field in member])
+                     for mid, member in state['members'].items()]
+    if parts[1] == 'chat':
+        if method == 'get':
+            return 200, group['chat']
+        if len(parts) == 3:
+            # chat/seen
+            return 200, None
+        group['chat'].append({'id': str(uuid.uuid4()),
+                              'text': ' '.join(body['message']),
+                              'user': state['user']['profile']['name'],
+                              'timestamp': int(time.time() * 1000)})
+        return 200, {'message': group['chat'][-1]}
+    if parts[1] == 'quests':
+        return 200, group['quest']
+    raise KeyError(parts[1])
+
+
+def task_action(state, method, parts, query, body):
+    user = state['user']
+    tasks = state['tasks']
+    if parts[0] == 'user':
+        if method == 'post':
+            tid = str(uuid.uuid4())
+            task = {'id': tid, '_id': tid, 'type': body.get('type'),
+                    'text': body.get('text'), 'completed': False,
+                    'checklist': []}
+            tasks[tid] = task
+            user['tasksOrder']['todos'].insert(0, tid)
+            user['_v'] += 1
+            return 200, task
+        kind = query.get('type', 'habits')
+        if kind == 'completedTodos':
+            return 200, [task for task in tasks.values()
+                         if task['type'] == 'todo' and task['completed']]
+        return 200, [tasks[tid] for tid in user['tasksOrder'][kind]]
+    tid = parts[0]
+    if len(parts) == 1:
+        if method == 'delete':
+            del tasks[tid]
+            for order in user['tasksOrder'].values():
+                if tid in order:
+                    order.remove(tid)
+            user['_v'] += 1
+            return 200, {}
+        return 200, tasks[tid]
+    if parts[1] == 'score':
+        return 200, score(state, tid, parts[2])
+    if parts[1] == 'checklist':
+        return 200, check(state, tid, parts[2])
+    raise KeyError(parts[1])
+
+
+def score(state, tid, direction):
+    """Score a task: the stats it changed, and a drop of Meat."""
+    user = state['user']
+    task = state['tasks'][tid]
+    sign = 1 if direction == 'up' else -1
+    task['value'] = task.get('value', 0) + sign
+    if task['type'] in ('daily', 'todo'):
+        task['completed'] = direction == 'up'
+        order = user['tasksOrder']['todos']
+        if task['type'] == 'todo' and task['completed'] and tid in order:
+            order.remove(tid)
+    task['updatedAt'] = time.strftime('%Y-%m-%dT%H:%M:%S.000Z',
+                                      time.gmtime())
+    stats = user['stats']
+    stats['exp'] += 5 * sign
+    stats['gp'] += 1.5 * sign
+    user['_v'] += 1
+    user['items']['food']['Meat'] += 1
+    result = dict((key, stats[key])
+                  for key in ('hp', 'mp', 'exp', 'gp', 'lvl', 'class'))
+    result['delta'] = sign
+    result['_tmp'] = {'drop': {'type': 'Food', 'key': 'Meat'}}
+    return result
+
+
+def check(state, tid, item):
+    """Toggle a checklist item."""
+    task = state['tasks'][tid]
+    for entry in task['checklist']:
+        if entry['id'] == item:
+            entry['completed'] = not entry['completed']
+    return task
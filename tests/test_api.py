@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+The API class's GET memo, conditional GETs and retries, against the fake
+server and on their own.
+"""
+
+
+import threading
+import time
+
+import pytest
+
+from habitica import api, trace
+
+import fakehabitica
+
+
+class Response(object):
+    ok = True
+
+
+def connect(fake, **kwargs):
+    return api.Habitica(auth={'url': fake.url,
+                              'x-api-user': fakehabitica.USER_ID,
+                              'x-api-key': 'key'}, **kwargs)
+
+
+def paths(requests):
+    return [request.path for request in requests]
+
+
+def test_concurrent_gets_share_one_request(fake):
+    fake.latency = 0.2
+    ahbt = connect(fake).aio()
+    users = api.gather(*[ahbt.user() for i in range(5)])
+    assert paths(fake.requests()) == ['user']
+    assert all(user == users[0] for user in users)
+    # each caller decodes its own copy
+    assert len(set(id(user) for user in users)) == 5
+
+
+def test_waiters_retry_when_the_owner_fails():
+    memo = api.Memo()
+    sending = threading.Event()
+    calls = []
+
+    def failing():
+        sending.set()
+        time.sleep(0.1)
+        calls.append('owner')
+        raise IOError('connection reset')
+
+    def working():
+        calls.append('waiter')
+        return Response()
+
+    def owner():
+        with pytest.raises(IOError):
+            memo.fetch('user', 'key', failing)
+    thread = threading.Thread(target=owner)
+    thread.start()
+    sending.wait()
+    assert isinstance(memo.fetch('user', 'key', working), Response)
+    thread.join()
+    assert calls == ['owner', 'waiter']
+    # nothing memoized from the failure
+    assert memo.fetch('user', 'key', working) is not None
+    assert calls == ['owner', 'waiter', 'waiter']
+
+
+def test_waiters_retry_when_the_owner_gets_an_error():
+    memo = api.Memo()
+    sending = threading.Event()
+
+    class Failed(object):
+        ok = False
+        status_code = 500
+
+    def failing():
+        sending.set()
+        time.sleep(0.1)
+        return Failed()
+    thread = threading.Thread(target=memo.fetch,
+                              args=('user', 'key', failing))
+    thread.start()
+    sending.wait()
+    assert isinstance(memo.fetch('user', 'key', Response), Response)
+    thread.join()
+
+
+def test_writes_forget_their_resource_and_the_user(fake):
+    hbt = connect(fake)
+    reads = [hbt.user, hbt.tasks.user, hbt.groups.party]
+    for read in reads:
+        read()
+    tid = fake.state['user']['tasksOrder']['habits'][0]
+    getattr(hbt.tasks, tid)(_method='post', _one='score', _two='up')
+    since = len(fake.requests())
+    for read in reads:
+        read()
+    assert paths(fake.requests(since)) == ['user', 'tasks/user']
+
+
+def test_start_keeps_responses_within_the_window():
+    memo = api.Memo(window=10)
+    calls = []
+
+    def send():
+        calls.append(1)
+        return Response()
+    memo.fetch('user', 'key', send)
+    memo.start()
+    memo.fetch('user', 'key', send)
+    assert len(calls) == 1
+    # older than the window
+    memo.entries['key'][3] -= 11
+    memo.start()
+    memo.fetch('user', 'key', send)
+    assert len(calls) == 2
+
+
+def test_start_forgets_everything_by_default():
+    memo = api.Memo()
+    calls = []
+
+    def send():
+        calls.append(1)
+        return Response()
+    memo.fetch('user', 'key', send)
+    memo.fetch('user', 'key', send)
+    memo.start()
+    memo.fetch('user', 'key', send)
+    assert len(calls) == 2
+
+
+def test_gets_send_the_etag_they_were_answered_with(fake):
+    hbt = connect(fake)
+    hbt.user()
+    hbt.memo.start()
+    hbt.user()
+    first, second = fake.requests()
+    assert first.etag is None
+    assert second.etag is not None
+    assert second.status == 304 and second.size == 0
+
+
+def test_not_modified_serves_a_copy_of_the_body(fake):
+    hbt = connect(fake)
+    user = hbt.user()
+    user['profile']['name'] = 'changed here'
+    hbt.memo.start()
+    again = hbt.user()
+    assert fake.requests()[-1].status == 304
+    assert again['profile']['name'] == \
+        fake.state['user']['profile']['name']
+    again['profile']['name'] = 'changed again'
+    hbt.memo.start()
+    assert hbt.user()['profile']['name'] == \
+        fake.state['user']['profile']['name']
+
+
+def test_not_modified_keeps_the_server_version(fake):
+    hbt = connect(fake)
+    hbt.user()
+    # a later response, from elsewhere, tells us of a deploy
+    hbt.meta['appVersion'] = '5.0.1'
+    hbt.memo.start()
+    hbt.user()
+    assert fake.requests()[-1].status == 304
+    assert hbt.meta['appVersion'] == '5.0.1'
+
+
+def test_not_modified_after_the_body_was_forgotten(fake):
+    class Forgetful(api.Validators):
+        # evicted between sending the ETag and the 304 coming back
+        def body(self, key):
+            return None
+    hbt = connect(fake, validators=Forgetful())
+    hbt.user()
+    hbt.memo.start()
+    user = hbt.user()
+    assert user['id'] == fakehabitica.USER_ID
+    conditional, unconditional = fake.requests()[1:]
+    assert (conditional.etag is not None, conditional.status) == (True, 304)
+    assert (unconditional.etag, unconditional.status) == (None, 200)
+
+
+def test_failed_gets_raise_only_if_strict(fake):
+    import requests
+
+    hbt = connect(fake)
+    assert hbt.groups.nonesuch() is None
+    with pytest.raises(requests.HTTPError):
+        hbt.groups.nonesuch(_raise=True)
+
+
+def test_validators_keep_the_most_recently_used():
+    validators = api.Validators(size=2)
+    validators.store('a', 'etag-a', {'a': 1})
+    validators.store('b', 'etag-b', {'b': 1})
+    assert validators.body('a') == {'a': 1}
+    validators.store('c', 'etag-c', {'c': 1})
+    assert validators.etag('b') is None
+    assert validators.body('b') is None
+    assert validators.etag('a') == 'etag-a'
+    assert validators.etag('c') == 'etag-c'
+
+
+def test_limiter_waits_without_holding_its_lock():
+    limiter = api.RateLimiter(limit=1, window=0.5)
+    limiter.acquire()
+    thread = threading.Thread(target=limiter.acquire)
+    thread.start()
+    time.sleep(0.1)
+    # a response in flight says the window is over sooner
+    start = time.time()
+    limiter.update({'X-RateLimit-Remaining': '0',
+                    'X-RateLimit-Reset': str(time.time() + 0.2)})
+    assert limiter.budget()['remaining'] == 0
+    assert time.time() - start < 0.1
+    thread.join(1)
+    assert not thread.is_alive()
+
+
+def test_too_many_requests_is_retried_after_retry_after(fake):
+    fake.rate_limit = 1
+    fake.window = 0.5
+    # someone else spends the budget our limiter knows nothing about
+    connect(fake).user()
+    collector = trace.Collector()
+    hbt = connect(fake, tracer=trace.Tracer([collector]))
+    assert 'quests' in hbt.content()
+    assert [request.status for request in fake.requests()] == \
+        [200, 429, 200]
+    span, = collector.spans
+    assert (span.status, span.retries) == (200, 1)
+    assert span.waited >= 0.5
+
+
+def test_requests_time_out(fake):
+    import requests
+
+    fake.latency = 0.5
+    hbt = connect(fake, session=api.new_session(timeout=0.1))
+    with pytest.raises(requests.Timeout):
+        hbt.user()
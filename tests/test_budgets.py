@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Request budgets: how many requests each command may send.
+
+Round trips are most of what a command costs, so a change that makes one
+send more than its budget fails here rather than going unnoticed. Each
+command runs with the content catalog and task lists already stored,
+as after ordinary use.
+"""
+
+
+import pytest
+
+# stores a command finds after ordinary use
+PRIME = (['collection'], ['habits'], ['dailies'], ['todos'])
+
+# command -> most requests it may send, against tests/fixtures
+BUDGETS = {
+    'server': 1,
+    'status': 3,  # user, party, members
+    'habits': 1,
+    'habits up 1': 2,
+    'habits up 1-3': 2,  # user, one batch of scores
+    'dailies': 1,
+    'dailies done 1 2a': 2,
+    'todos': 1,
+    'todos done 2': 2,
+    'todos add new thing': 2,
+    'todos delete 1': 2,
+    'item': 1,
+    'item food': 1,
+    'feed': 8,  # user, 6 feedings, user
+    'hatch': 5,  # user, 3 hatchings, user
+    'collection': 1,
+    'sell': 1,
+    'sell all': 4,  # user, 3 sales
+    'cast': 1,
+    'cast heal': 2,
+    'cast smart healAll': 4,  # user, party, members, cast
+    'gems': 2,
+    'armoire': 2,
+    'quest': 3,
+    'walk': 1,
+    'walk Wolf-Base': 2,
+    'equip weapon_warrior_1': 2,
+    'sleep': 2,
+    'chat list': 5,  # user, party, 3 guild names
+    'chat show': 4,
+    'chat send 0 hi': 5,
+    'dump food': 1,
+    'dump content': 1,  # status, to check the stored catalog
+    'newday': 1,
+}
+
+
+@pytest.fixture
+def primed(habitica):
+    for argv in PRIME:
+        habitica(*argv)
+    return habitica
+
+
+@pytest.mark.parametrize('command', sorted(BUDGETS))
+def test_budget(primed, command):
+    run = primed(*command.split())
+    assert run.code == 0, run.out
+    assert len(run.requests) <= BUDGETS[command], run
+
+
+def test_listing_unchanged_tasks_reads_only_the_user(primed):
+    for kind in ('habits', 'dailies', 'todos'):
+        run = primed(kind)
+        assert [repr(request) for request in run.requests] == ['get:user']
+
+
+@pytest.mark.parametrize('command, writes', [('feed', 'user/feed/'),
+                                             ('hatch', 'user/hatch/')])
+def test_reads_do_not_grow_with_inventory(primed, fake, command, writes):
+    # plenty to do: every egg, potion and food by the dozen, and half of
+    # all pets hatched, each hungry
+    items = fake.state['user']['items']
+    content = fake.state['content']
+    for egg in content['dropEggs']:
+        items['eggs'][egg] = 12
+        for potion in list(content['dropHatchingPotions'])[::2]:
+            items['pets'].setdefault('%s-%s' % (egg, potion), 5)
+    for potion in content['dropHatchingPotions']:
+        items['hatchingPotions'][potion] = 12
+    for food in content['food']:
+        items['food'][food] = 12
+    # and a server that lets it all through at once
+    fake.rate_limit = 1000
+    run = primed(command)
+    assert run.code == 0, run.out
+    sent = [request for request in run.requests
+            if request.path.startswith(writes)]
+    assert len(sent) > 10
+    # one user download before, one after
+    assert len(run.requests) - len(sent) <= 2, run
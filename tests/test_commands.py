@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Every command, end to end against the fake server.
+"""
+
+
+import pytest
+
+import fakehabitica
+
+# (argv, something the output must contain)
+COMMANDS = [
+    (['server'], 'Habitica server is up'),
+    (['status'], 'Level 20 Healer'),
+    (['habits'], 'habit 1'),
+    (['habits', 'up', '1'], 'habit 1'),
+    (['habits', 'up', '1-3'], 'habit 3'),
+    (['dailies'], 'daily 1'),
+    (['dailies', 'done', '1', '2a'], 'daily 1'),
+    (['todos'], 'todo 1'),
+    (['todos', 'done', '2'], 'todo 2'),
+    (['todos', 'add', 'new', 'thing'], 'new thing'),
+    (['todos', 'delete', '1'], 'todo 1'),
+    (['item'], 'food'),
+    (['item', 'food'], 'Meat'),
+    (['feed'], 'Wolf'),
+    (['hatch'], 'Hatching a Golden Wolf'),
+    (['collection'], 'Pets: '),
+    (['sell'], 'Red'),
+    (['sell', 'all'], 'Selling'),
+    (['cast'], 'heal'),
+    (['cast', 'heal'], 'heal'),
+    (['cast', 'smart', 'healAll'], 'needs healing'),
+    (['gems'], 'Gems'),
+    (['armoire'], 'Meat'),
+    (['quest'], 'The Dread Drag'),
+    (['walk'], 'Wolf-Base'),
+    (['walk', 'Wolf-Base'], 'Base Wolf'),
+    (['equip', 'weapon_warrior_1'], 'weapon now has weapon_warrior_1'),
+    (['sleep'], ''),
+    (['chat', 'list'], 'Guild 0'),
+    (['chat', 'show'], 'hello'),
+    (['chat', 'send', '0', 'hi'], 'hi'),
+    (['dump', 'food'], 'Meat'),
+    (['newday'], 'already working the current day'),
+]
+
+
+@pytest.mark.parametrize('argv, expected', COMMANDS,
+                         ids=[' '.join(argv) for argv, expected in COMMANDS])
+def test_command(habitica, argv, expected):
+    run = habitica(*argv)
+    assert run.code == 0, run.out
+    assert expected in run.out
+
+
+def test_unknown_command(habitica):
+    run = habitica('frobnicate')
+    assert run.code == 1
+    assert not run.requests
+
+
+def test_sleep_and_arise(habitica, fake):
+    assert habitica('arise').code == 1
+    assert habitica('sleep').code == 0
+    assert fake.state['user']['preferences']['sleep']
+    assert habitica('arise').code == 0
+    assert not fake.state['user']['preferences']['sleep']
+
+
+def test_scoring_updates_task_list(habitica):
+    habitica('todos')
+    habitica('todos', 'done', '1')
+    run = habitica('todos')
+    assert 'todo 1' not in run.out
+    assert 'todo 2' in run.out
+
+
+def test_gems_bought_with_the_gold_there_is(habitica, fake):
+    fake.state['user']['stats']['gp'] = 50
+    run = habitica('gems')
+    assert run.code == 0
+    assert fake.state['user']['purchased']['plan']['gemsBought'] == 22
+    assert fake.state['user']['stats']['gp'] == 10
+
+
+def test_gems_without_gold(habitica, fake):
+    fake.state['user']['stats']['gp'] = 10
+    run = habitica('gems')
+    assert [request.method for request in run.requests] == ['get']
+
+
+def test_gems_refused(habitica, fake, monkeypatch):
+    route = fakehabitica.route
+
+    def spent_elsewhere(state, method, path, query, body):
+        # the gold goes between reading the user and buying
+        if path.startswith('user/purchase'):
+            state['user']['stats']['gp'] = 0
+        return route(state, method, path, query, body)
+    monkeypatch.setattr(fakehabitica, 'route', spent_elsewhere)
+    run = habitica('gems')
+    assert 'Could not buy 5 gems' in run.out
+    assert 'Gem' not in run.out.replace('Could not buy 5 gems', '')
+    assert fake.state['user']['purchased']['plan']['gemsBought'] == 20
+
+
+def test_sell_all_of_a_kind(habitica, fake):
+    run = habitica('sell', 'Red')
+    assert 'Selling 3 Red potions' in run.out
+    assert fake.state['user']['items']['hatchingPotions']['Red'] == 0
+
+
+def test_chat_refreshes_names_before_returning(habitica, monkeypatch):
+    from habitica import core
+
+    monkeypatch.setattr(core, 'GUILDNAME_TTL', -1)
+    habitica('chat', 'list')
+    # all three names are stale now, and refreshed within the command
+    run = habitica('chat', 'list')
+    assert len([request for request in run.requests
+                if request.path.startswith('groups/')
+                and request.path != 'groups/party']) == 3
+
+
+def test_hatch_sees_new_potions(habitica, fake, monkeypatch):
+    habitica('collection')
+    # Habitica deploys a new drop potion, and we find one
+    monkeypatch.setattr(fakehabitica, 'APP_VERSION', 'next')
+    fake.state['content']['dropHatchingPotions']['Aurora'] = \
+        {'key': 'Aurora', 'text': 'Aurora'}
+    fake.state['user']['items']['hatchingPotions']['Aurora'] = 1
+    assert 'Hatching a Aurora' in habitica('hatch').out
+
+
+def test_cold_dump_checks_the_catalog(habitica, fake, monkeypatch):
+    habitica('collection')
+    monkeypatch.setattr(fakehabitica, 'APP_VERSION', 'next')
+    fake.state['content']['dropHatchingPotions']['Aurora'] = \
+        {'key': 'Aurora', 'text': 'Aurora'}
+    # nothing but the catalog is read, so nothing else tells us the version
+    run = habitica('dump', 'content')
+    assert [request.path for request in run.requests] == \
+        ['status', 'content']
+    assert 'Aurora' in run.out
+
+
+def test_refused_deletes_are_kept(habitica, fake, monkeypatch):
+    route = fakehabitica.route
+    habitica('todos')
+    order = list(fake.state['user']['tasksOrder']['todos'])
+
+    def refusing(state, method, path, query, body):
+        if method == 'delete' and path == 'tasks/%s' % order[0]:
+            return 500, None
+        return route(state, method, path, query, body)
+    monkeypatch.setattr(fakehabitica, 'route', refusing)
+    run = habitica('todos', 'delete', '1', '2')
+    assert run.code == 1
+    assert 'deleted todo \'todo 1\'' not in run.out
+    assert 'deleted todo \'todo 2\'' in run.out
+    assert fake.state['user']['tasksOrder']['todos'] == \
+        [order[0]] + order[2:]
+    # still numbered as the server has them
+    assert habitica('todos', 'done', '1').code == 0
+    assert order[0] not in fake.state['user']['tasksOrder']['todos']
+
+
+def refuse_batches(status, monkeypatch):
+    route = fakehabitica.route
+
+    def refusing(state, method, path, query, body):
+        if path == 'user/batch-update':
+            return status, None
+        return route(state, method, path, query, body)
+    monkeypatch.setattr(fakehabitica, 'route', refusing)
+
+
+def test_refused_batch_is_scored_one_by_one(habitica, fake, monkeypatch):
+    fake.latency = 0.02
+    refuse_batches(400, monkeypatch)
+    run = habitica('habits', 'up', '1-3')
+    order = fake.state['user']['tasksOrder']['habits'][:3]
+    sent = [request.path for request in run.requests
+            if request.method == 'post']
+    assert sent == ['user/batch-update'] + \
+        ['tasks/%s/score/up' % tid for tid in order]
+    assert 'habit 3' in run.out
+    assert fake.url not in run.out
+
+
+def test_failed_batch_is_not_scored_again(habitica, fake, monkeypatch):
+    refuse_batches(502, monkeypatch)
+    run = habitica('habits', 'up', '1-3')
+    assert [request.path for request in run.requests
+            if request.method == 'post'] == ['user/batch-update']
+    assert 'Could not tell which tasks were scored' in run.out
+
+
+def test_batch_reports_each_op(habitica, fake):
+    order = fake.state['user']['tasksOrder']['habits']
+    habitica('habits')
+    # deleted elsewhere since the list was saved
+    del fake.state['tasks'][order[1]]
+    run = habitica('habits', 'up', '1-3')
+    assert [request.path for request in run.requests
+            if request.method == 'post'] == ['user/batch-update']
+    assert [line for line in run.out.splitlines()
+            if line.startswith('incremented')] == \
+        ["incremented habit 'habit 1'", "incremented habit 'habit 3'"]
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Commands forwarded to `habitica daemon` over its socket.
+"""
+
+
+import io
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+import pytest
+
+from habitica import core, daemon
+
+
+@pytest.fixture
+def forward(habitica, tmp_path, monkeypatch):
+    """Run a command through a daemon serving the fake: forward(*argv)."""
+    # socket paths have to be short
+    home = tempfile.mkdtemp()
+    path = os.path.join(home, 'daemon.sock')
+    warm = core.connect(core.load_auth(core.AUTH_CONF),
+                        core.load_settings(core.SETTINGS_CONF))
+    thread = threading.Thread(target=daemon.serve, args=(warm, path))
+    thread.daemon = True
+    thread.start()
+    deadline = time.time() + 5
+    while not os.path.exists(path) and time.time() < deadline:
+        time.sleep(0.01)
+    assert os.path.exists(path), 'the daemon never started listening'
+    monkeypatch.chdir(tmp_path)
+
+    def run(*argv):
+        out, err = io.StringIO(), io.StringIO()
+        code = daemon.forward(list(argv), path, out, err)
+        return code, out.getvalue(), err.getvalue()
+    run.path = path
+    yield run
+    daemon.stop(path)
+    thread.join(5)
+    shutil.rmtree(home)
+    assert not thread.is_alive(), 'the daemon did not stop'
+
+
+def test_round_trip(forward):
+    code, out, err = forward('server')
+    assert code == 0
+    assert 'Habitica server is up' in out
+    code, out, err = forward('arise')
+    assert code == 1
+
+
+def test_prompts_run_locally(forward):
+    assert forward('quest', 'forcestart')[0] is None
+    assert forward('home')[0] is None
+
+
+def test_options_come_before_the_command(forward):
+    assert forward('--trace', 'home')[0] is None
+    assert forward('--profile', 'server.folded', 'home')[0] is None
+    assert forward('--debug', 'quest', 'forcestart')[0] is None
+    code, out, err = forward('--debug', 'server')
+    assert code == 0
+    assert 'Habitica server is up' in out
+
+
+def test_paths_are_the_clients(forward, tmp_path):
+    code, out, err = forward('server', '--profile=server.folded')
+    assert code == 0
+    assert (tmp_path / 'server.folded').exists()
+
+
+def test_logging_per_command(forward):
+    assert 'Command line args' in forward('server', '--debug')[2]
+    assert 'Command line args' not in forward('server')[2]
+
+
+def test_client_gone(forward):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(forward.path)
+    daemon._send(sock, {'argv': ['server']})
+    sock.close()
+    assert forward('server')[0] == 0
+
+
+def test_stuck_daemon():
+    # listening, but never taking the command
+    home = tempfile.mkdtemp()
+    path = os.path.join(home, 'daemon.sock')
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    try:
+        assert daemon.forward(['server'], path, timeout=0.1) is None
+    finally:
+        server.close()
+        shutil.rmtree(home)
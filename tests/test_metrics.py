@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Metrics adding up across runs in a `metrics-file`.
+"""
+
+
+import threading
+import urllib.request
+
+import pytest
+
+from habitica import core, metrics
+
+
+@pytest.fixture
+def totals(habitica, tmp_path):
+    """Path of the metrics-file the commands add to."""
+    path = tmp_path / 'habitica.prom'
+    with open(core.SETTINGS_CONF, 'w') as f:
+        f.write('[Habitica]\nmetrics-file = %s\n' % path)
+    return path
+
+
+def sample(text, name, **labels):
+    """Value of the sample `name` whose labels include `labels`."""
+    registry = metrics.parse(text)
+    found = [value for (sample, pairs), value in registry.samples.items()
+             if sample == name and set(labels.items()) <= set(pairs)]
+    return sum(found) if found else None
+
+
+def test_render_parse_round_trip():
+    registry = metrics.Registry({'user': 'a"b'})
+    registry.inc('habitica_requests_total', method='GET', endpoint='user',
+                 status='200')
+    registry.observe('habitica_request_duration_seconds', 0.2,
+                     method='GET', endpoint='user')
+    registry.set('habitica_rate_limit_remaining', 29)
+    text = registry.render()
+    assert '# TYPE habitica_request_duration_seconds histogram' in text
+    assert metrics.parse(text).render() == text
+    assert sample(text, 'habitica_request_duration_seconds_bucket',
+                  le='0.1') == 0
+    assert sample(text, 'habitica_request_duration_seconds_bucket',
+                  le='+Inf') == 1
+
+
+def test_merge_adds_counters_and_replaces_gauges():
+    one = metrics.Registry()
+    one.inc('habitica_requests_total', 2, status='200')
+    one.set('habitica_rate_limit_remaining', 10)
+    two = metrics.Registry()
+    two.inc('habitica_requests_total', 3, status='200')
+    two.set('habitica_rate_limit_remaining', 4)
+    text = one.merge(two).render()
+    assert sample(text, 'habitica_requests_total') == 5
+    assert sample(text, 'habitica_rate_limit_remaining') == 4
+
+
+def test_commands_add_up(habitica, totals):
+    first = habitica('status')
+    second = habitica('feed')
+    text = totals.read_text()
+    requests = len(first.requests) + len(second.requests)
+    assert sample(text, 'habitica_requests_total') == requests
+    assert sample(text, 'habitica_commands_total', outcome='ok') == 2
+    assert sample(text, 'habitica_command_duration_seconds_count',
+                  command='feed') == 1
+    assert sample(text, 'habitica_requests_total', method='GET',
+                  endpoint='user', user='user-0000') >= 2
+    # the catalog is downloaded once, then found on disk
+    assert sample(text, 'habitica_cache_lookups_total', cache='content',
+                  result='miss') == 1
+    assert sample(text, 'habitica_cache_lookups_total', cache='content',
+                  result='hit') == 1
+
+
+def test_task_index_hits(habitica, totals):
+    habitica('todos')
+    habitica('todos')
+    text = totals.read_text()
+    assert sample(text, 'habitica_cache_lookups_total', cache='tasks',
+                  result='hit') == 1
+
+
+def test_metrics_command(habitica, totals):
+    assert 'No metrics recorded' in habitica('metrics').out
+    habitica('server')
+    result = habitica('metrics')
+    assert 'habitica_requests_total{' in result.out
+    assert result.requests == []
+
+
+def test_serve(habitica, totals):
+    habitica('server')
+    httpd = metrics.server(str(totals), 0)
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.start()
+    try:
+        url = 'http://127.0.0.1:%d/metrics' % httpd.server_address[1]
+        with urllib.request.urlopen(url) as res:
+            assert res.headers['Content-Type'] == metrics.CONTENT_TYPE
+            assert res.read().decode('utf8') == totals.read_text()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        thread.join()
+
+
+def test_checklist_items_are_one_endpoint(habitica, totals):
+    habitica('dailies')
+    habitica('dailies', 'done', '2a')
+    habitica('dailies', 'done', '2b')
+    endpoints = set(dict(labels)['endpoint'] for (name, labels)
+                    in metrics.parse(totals.read_text()).samples
+                    if name == 'habitica_requests_total' and
+                    'checklist' in dict(labels)['endpoint'])
+    assert endpoints == set(['tasks/{id}/checklist/{id}/score'])
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Feeding and hatching plans, on their own and as sent.
+"""
+
+
+from habitica.collection import Collection
+from habitica.plans import plan_feeding, plan_hatching
+
+import fakehabitica
+
+
+def test_no_empty_feedings():
+    # 48 rounds to a mount's 50, but the pet is not one yet
+    items = {'pets': {'Wolf-Base': 48}, 'mounts': {}, 'food': {'Meat': 3}}
+    steps, pets, uneaten, unknown = plan_feeding(items, {'Meat': 'Base'},
+                                                 [])
+    assert [(step.pet, step.bites) for step in steps] == [('Wolf-Base', 1)]
+    assert pets['Wolf-Base'] == -1
+
+
+def test_servings_round_to_at_least_one():
+    items = {'pets': {'Wolf-Base': 48, 'Wolf-Red': 49, 'Fox-Base': 43},
+             'mounts': {}}
+    owned = Collection(items, ['Fox', 'Wolf'], ['Base', 'Red'])
+    assert owned.servings() == {'Wolf-Base': 1, 'Wolf-Red': 1,
+                                'Fox-Base': 1}
+
+
+def test_magic_pets_eat_what_no_other_pet_wants():
+    # the Royal pet is closer to its mount, but the Meat is Base's
+    items = {'pets': {'Wolf-Base': 5, 'Wolf-Royal': 40}, 'mounts': {},
+             'food': {'Meat': 2, 'Milk': 2}}
+    steps, pets, uneaten, unknown = plan_feeding(
+        items, {'Meat': 'Base', 'Milk': 'Red'}, ['Royal'])
+    assert [(step.pet, step.food, step.bites, step.more)
+            for step in steps] == [('Wolf-Base', 'Meat', 2, 7),
+                                   ('Wolf-Royal', 'Milk', 2, 0)]
+    assert pets == {'Wolf-Base': 15, 'Wolf-Royal': -1}
+    assert (uneaten, unknown) == ([], [])
+
+
+def test_foods_nobody_eats():
+    items = {'pets': {'Wolf-Veteran': 5, 'Fox-Red': 5}, 'mounts': {},
+             'food': {'Meat': 1, 'Honey': 1, 'Cake_Skeleton': 1,
+                      'Saddle': 1}}
+    steps, pets, uneaten, unknown = plan_feeding(
+        items, {'Meat': 'Veteran', 'Saddle': 'ignore'}, [])
+    # rare pets never eat; seasonal foods name their potion
+    assert steps == []
+    assert uneaten == ['Meat', 'Cake_Skeleton']
+    assert unknown == ['Honey']
+
+
+def test_hatching_sells_the_eggs_no_potion_can_use():
+    items = {'pets': {}, 'mounts': {}, 'eggs': {'Wolf': 6, 'Fox': 1},
+             'hatchingPotions': {'Base': 1}}
+    hatches, missing, needs, sales = plan_hatching(items, ['Base', 'Red'])
+    assert hatches == [('Wolf', 'Base')]
+    assert missing == [('Wolf', 'Red'), ('Fox', 'Base'), ('Fox', 'Red')]
+    assert needs == [('Wolf', ['Red'], ['Base', 'Red']),
+                     ('Fox', ['Base', 'Red'], ['Base', 'Red'])]
+    # 5 Wolf eggs left: one for the Red pet, two for the mounts
+    assert sales == {'Wolf': 2}
+    assert plan_hatching(items, ['Base', 'Red'], extra=1)[3] == \
+        {'Wolf': 1}
+    assert plan_hatching(items, ['Base', 'Red'], extra=2)[3] == {}
+
+
+def test_raised_pets_are_hatched_again():
+    items = {'pets': {'Wolf-Base': -1}, 'mounts': {'Wolf-Base': True},
+             'eggs': {'Wolf': 1}, 'hatchingPotions': {'Base': 1}}
+    hatches, missing, needs, sales = plan_hatching(items, ['Base'])
+    assert hatches == [('Wolf', 'Base')]
+    assert (missing, needs, sales) == ([], [], {})
+
+
+def test_feedings_are_sent_in_order(habitica, fake):
+    fake.latency = 0.02
+    run = habitica('feed')
+    content = fake.state['content']
+    steps = plan_feeding(fakehabitica.load_fixtures()['user']['items'],
+                         dict((food, info.get('target') or 'ignore')
+                              for food, info in content['food'].items()),
+                         list(content['premiumHatchingPotions']))[0]
+    sent = ['/'.join(request.path.split('/')[2:])
+            for request in run.requests if request.method == 'post']
+    assert len(steps) > 1
+    assert sent == ['%s/%s' % (step.pet, step.food) for step in steps]
+
+
+def test_hatchings_and_sales_are_sent_in_order(habitica, fake):
+    fake.latency = 0.02
+    items = fakehabitica.load_fixtures()['user']['items']
+    # enough Wolf eggs that some are sold
+    items['eggs']['Wolf'] = fake.state['user']['items']['eggs']['Wolf'] = 30
+    run = habitica('hatch')
+    hatches, missing, needs, sales = plan_hatching(
+        items, list(fake.state['content']['dropHatchingPotions']))
+    sent = ['/'.join(request.path.split('/')[1:])
+            for request in run.requests if request.method == 'post']
+    assert len(hatches) > 1 and sales
+    assert sent == ['hatch/%s/%s' % hatch for hatch in hatches] + \
+        ['sell/eggs/%s' % egg for egg in sales]
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+`--profile`, and how time is sorted into phases.
+"""
+
+
+import sys
+import threading
+import time
+
+from habitica import profiling
+
+
+def test_phase_of():
+    assert profiling.phase_of('<frozen importlib._bootstrap>',
+                              '_find_and_load') == 'import'
+    assert profiling.phase_of('/usr/lib/python3/json/decoder.py',
+                              'decode') == 'json'
+    assert profiling.phase_of('/site-packages/urllib3/response.py',
+                              'read') == 'network'
+    assert profiling.phase_of('/x/habitica/commands/status.py',
+                              'run') == 'rendering'
+    assert profiling.phase_of('/x/mine.py', 'mine') is None
+
+
+def test_phase_of_python_callers():
+    # a socket read, print() and a rate-limit sleep are C calls, seen as
+    # the Python frame that made them
+    assert profiling.phase_of('/usr/lib/python3/socket.py',
+                              'readinto') == 'network'
+    assert profiling.phase_of('/usr/lib/python3/ssl.py', 'recv_into') == \
+        'network'
+    assert profiling.phase_of('/x/habitica/api.py', 'acquire') == 'network'
+    assert profiling.phase_of('/x/habitica/core.py',
+                              'printChatMessages') == 'rendering'
+    # a script's own module body is not an import
+    assert profiling.phase_of('/usr/bin/habitica', '<module>') is None
+
+
+def test_sampler_survives_a_bad_sample(monkeypatch):
+    done = threading.Event()
+
+    def busy():
+        while not done.is_set():
+            sum(range(1000))
+    thread = threading.Thread(target=busy)
+    thread.daemon = True
+    thread.start()
+    sampler = profiling.Sampler()
+    sampler.target = thread.ident
+    current_frames = sys._current_frames
+    calls = []
+
+    def frames():
+        # the first sample finds a frame torn down under it
+        calls.append(None)
+        if len(calls) == 1:
+            return {thread.ident: object()}
+        return current_frames()
+    monkeypatch.setattr(sys, '_current_frames', frames)
+    sampler.start()
+    deadline = time.time() + 5
+    while len(calls) < 10 and time.time() < deadline:
+        time.sleep(0.01)
+    try:
+        assert sampler.thread.is_alive()
+    finally:
+        sampler.stop()
+        done.set()
+        thread.join(5)
+    assert sampler.stacks
+
+
+def test_folded_profile(habitica, tmp_path):
+    path = tmp_path / 'status.folded'
+    result = habitica('status', '--profile=%s' % path)
+    assert result.code == 0
+    lines = path.read_text().splitlines()
+    assert lines
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+
+def test_pstats_profile(habitica, tmp_path):
+    import pstats
+    path = tmp_path / 'status.pstats'
+    assert habitica('status', '--profile=%s' % path).code == 0
+    assert pstats.Stats(str(path)).total_calls > 0
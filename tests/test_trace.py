@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Request spans, as seen by an in-memory sink.
+"""
+
+
+from habitica import api, trace
+
+import fakehabitica
+
+
+def connect(fake):
+    collector = trace.Collector()
+    hbt = api.Habitica(auth={'url': fake.url,
+                             'x-api-user': fakehabitica.USER_ID,
+                             'x-api-key': 'key'},
+                       tracer=trace.Tracer([collector]))
+    return hbt, collector
+
+
+def test_span_per_request(fake):
+    fake.rate_limit = 100
+    hbt, collector = connect(fake)
+    hbt.user(userFields='stats')
+    tid = fake.state['user']['tasksOrder']['habits'][0]
+    getattr(hbt.tasks, tid)(_method='post', _one='score', _two='up')
+
+    get, post = collector.spans
+    assert (get.method, get.template, get.status) == ('get', 'user', 200)
+    assert get.bytes > 0
+    assert get.headroom is not None and get.headroom < 100
+    assert (post.method, post.template) == ('post', 'tasks/{id}/score/up')
+    assert post.url.endswith('/tasks/%s/score/up' % tid)
+    assert post.retries == 0
+    assert post.start >= get.start and post.seconds >= 0
+
+
+def test_no_span_for_memo_hits(fake):
+    hbt, collector = connect(fake)
+    hbt.user()
+    hbt.user()
+    assert len(collector.spans) == 1
+
+
+def test_waiting_for_the_rate_limit(fake):
+    fake.rate_limit = 1
+    fake.window = 0.5
+    hbt, collector = connect(fake)
+    hbt.user()
+    hbt.content()
+    first, second = collector.spans
+    assert (first.status, second.status) == (200, 200)
+    assert first.headroom == 0
+    assert second.waited > 0.1
+    assert second.seconds >= second.waited
+
+
+def test_url_template():
+    assert api.url_template('user/feed/Wolf-Base/Meat',
+                            {'one': 'Wolf-Base', 'two': 'Meat'}) == \
+        'user/feed/{one}/{two}'
+    assert api.url_template('tasks/5eed-1/checklist/5eed-2/score', {}) == \
+        'tasks/{id}/checklist/{id}/score'
+
+
+def test_checklist_items_share_a_template(fake):
+    hbt, collector = connect(fake)
+    task = [task for task in fake.state['tasks'].values()
+            if task['checklist']][0]
+    for item in task['checklist']:
+        getattr(hbt.tasks, task['id'])(_method='post', _one='checklist',
+                                       _two=item['id'] + '/score')
+    assert set(span.template for span in collector.spans) == \
+        set(['tasks/{id}/checklist/{id}/score'])